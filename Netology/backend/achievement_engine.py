@@ -15,13 +15,25 @@ It is mainly used after events like logging in, completing
 onboarding, finishing a lesson, completing a quiz, or finishing
 a challenge. If an achievement gives bonus XP, that XP is also
 awarded here.
+
+The rules are compiled once per process into small check
+functions. The compiled catalog is kept in the shared catalog
+cache and only rebuilt when the achievements table changes,
+and each event only checks the achievements whose rules could
+be affected by it. Bonus XP from one unlock is applied to the
+stats in memory, so a whole chain of unlocks is worked out
+first and then saved together.
 """
 
 import json
-from datetime import datetime, timedelta
+from collections import namedtuple
 
+from catalog_cache import register_cache, stamp
 from db import get_db_connection, to_int
-from xp_system import add_xp_to_user, get_level_progress
+from login_streaks import load_login_streak
+from metrics import record_unlocks
+from user_stats import load_user_stats
+from xp_system import XP_ACHIEVEMENT, award_xp_batch, get_level_progress
 
 def parse_rule(raw):
     # Turn a stored rule into a Python dictionary.
@@ -36,21 +48,6 @@ def parse_rule(raw):
     return {}
 
 
-def login_streak(dates_desc):
-    # Count how many days in a row the user has logged in, ending today.
-    if not dates_desc:
-        return 0
-    check = datetime.now().date()
-    streak = 0
-    for d in dates_desc:
-        if d == check:
-            streak += 1
-            check -= timedelta(days=1)
-        else:
-            break
-    return streak
-
-
 def load_stats(cur, email):
     # Load the user stats needed to check achievement rules.
     cur.execute(
@@ -65,37 +62,20 @@ def load_stats(cur, email):
     level, _, _ = get_level_progress(total_xp)
     level = max(to_int(row[1], level), level)
 
-    cur.execute(
-        "SELECT login_date FROM user_logins WHERE user_email = %s ORDER BY login_date DESC LIMIT 365",
-        (email,),
-    )
-    dates = [r[0] for r in cur.fetchall()]
-
-    # Load the rest of the counts in one query.
-    cur.execute(
-        """
-        SELECT
-            (SELECT COUNT(*) FROM user_logins WHERE user_email = %s),
-            (SELECT COUNT(*) FROM user_courses WHERE user_email = %s),
-            (SELECT COUNT(*) FROM user_courses WHERE user_email = %s AND completed = TRUE),
-            (SELECT COUNT(*) FROM user_lessons WHERE user_email = %s),
-            (SELECT COUNT(*) FROM user_quizzes WHERE user_email = %s),
-            (SELECT COUNT(*) FROM user_challenges WHERE user_email = %s)
-        """,
-        (email, email, email, email, email, email),
-    )
-    counts = cur.fetchone()
+    # Load the rest of the counts and the streak from the user_stats row.
+    counts = load_user_stats(cur, email)
+    streak = load_login_streak(cur, email)
 
     return {
         "total_xp": total_xp,
         "level": level,
-        "logins_total": to_int(counts[0]),
-        "login_streak": login_streak(dates),
-        "courses_started": to_int(counts[1]),
-        "courses_completed": to_int(counts[2]),
-        "lessons_completed": to_int(counts[3]),
-        "quizzes_completed": to_int(counts[4]),
-        "challenges_completed": to_int(counts[5]),
+        "logins_total": counts["logins_total"],
+        "login_streak": streak["current_streak"],
+        "courses_started": counts["courses_started"],
+        "courses_completed": counts["courses_completed"],
+        "lessons_completed": counts["lessons_completed"],
+        "quizzes_completed": counts["quizzes_completed"],
+        "challenges_completed": counts["challenges_completed"],
     }
 
 
@@ -113,102 +93,247 @@ METRIC_KEYS = {
 }
 
 
-def rule_matches(rule, stats, event):
-    # Return True when one achievement rule has been met.
+# Which stats each event can change. XP and level can change after any
+# event because achievements give bonus XP, so they are always checked.
+# progress_sync is a /progress/batch save that can hold every kind of
+# completion. Events not listed here check the whole catalog.
+EVENT_METRICS = {
+    "login": {"logins_total", "login_streak"},
+    "lesson_complete": {"lessons_completed", "courses_started", "courses_completed"},
+    "quiz_complete": {"quizzes_completed", "courses_started", "courses_completed"},
+    "challenge_complete": {"challenges_completed", "courses_started", "courses_completed"},
+    "progress_sync": {"lessons_completed", "quizzes_completed", "challenges_completed",
+                      "courses_started", "courses_completed"},
+    "onboarding_complete": set(),
+    "xp_award": set(),
+}
+ALWAYS_METRICS = {"total_xp", "level"}
+
+# A compiled rule: a check(stats, event) function plus the stats and
+# events the rule looks at.
+CompiledRule = namedtuple("CompiledRule", "check metrics events")
+
+NEVER = CompiledRule(lambda stats, event: False, frozenset(), frozenset())
+
+
+def compile_rule(rule):
+    # Turn one parsed rule into a check function and the keys it depends on.
     kind = (rule.get("type") or "").strip().lower()
     if not kind:
-        return False
+        return NEVER
 
     if kind == "event":
         expected = (rule.get("event") or "").strip().lower()
-        return bool(expected and expected == event)
+        if not expected:
+            return NEVER
+        return CompiledRule(lambda stats, event: event == expected, frozenset(), frozenset({expected}))
 
-    if kind == "all_of":
+    if kind in ("all_of", "any_of"):
         children = rule.get("rules")
         if not isinstance(children, list) or not children:
-            return False
-        return all(rule_matches(parse_rule(c), stats, event) for c in children)
-
-    if kind == "any_of":
-        children = rule.get("rules")
-        if not isinstance(children, list) or not children:
-            return False
-        return any(rule_matches(parse_rule(c), stats, event) for c in children)
+            return NEVER
+        compiled = [compile_rule(parse_rule(c)) for c in children]
+        checks = tuple(c.check for c in compiled)
+        metrics = frozenset().union(*(c.metrics for c in compiled))
+        events = frozenset().union(*(c.events for c in compiled))
+        if kind == "all_of":
+            return CompiledRule(lambda stats, event: all(c(stats, event) for c in checks), metrics, events)
+        return CompiledRule(lambda stats, event: any(c(stats, event) for c in checks), metrics, events)
 
     key = METRIC_KEYS.get(kind)
     if not key:
-        return False
-    return to_int(stats.get(key)) >= max(1, to_int(rule.get("value"), 1))
+        return NEVER
+    target = max(1, to_int(rule.get("value"), 1))
+    return CompiledRule(lambda stats, event: to_int(stats.get(key)) >= target, frozenset({key}), frozenset())
 
 
-def evaluate_achievements_for_event(email, event=None):
-    # Check every achievement for one user and save anything newly unlocked.
+def rule_matches(rule, stats, event):
+    # Return True when one achievement rule has been met.
+    return bool(compile_rule(rule).check(stats, event))
+
+
+def build_catalog(rows, version=None):
+    # Compile the achievement rows and index them by event and by stat.
+    entries = []
+    by_event = {}
+    by_metric = {}
+    for aid, name, desc, icon, xp_reward, rarity, raw_rule in rows:
+        rule = compile_rule(parse_rule(raw_rule))
+        entries.append({
+            "id": aid,
+            "name": name,
+            "description": desc,
+            "icon": icon,
+            "xp_reward": max(0, to_int(xp_reward)),
+            "rarity": rarity,
+            "check": rule.check,
+        })
+        for event in rule.events:
+            by_event.setdefault(event, set()).add(aid)
+        for metric in rule.metrics:
+            by_metric.setdefault(metric, set()).add(aid)
+    return {"version": version, "entries": entries, "by_event": by_event, "by_metric": by_metric}
+
+
+def candidates_for_event(catalog, event):
+    # Return only the achievements this event could possibly unlock.
+    metrics = EVENT_METRICS.get(event)
+    if metrics is None:
+        return catalog["entries"]
+
+    ids = set(catalog["by_event"].get(event, ()))
+    for metric in metrics | ALWAYS_METRICS:
+        ids |= catalog["by_metric"].get(metric, set())
+    return [entry for entry in catalog["entries"] if entry["id"] in ids]
+
+
+def load_achievement_rows(cur):
+    # Read and compile the achievements table for the catalog cache.
+    cur.execute(
+        "SELECT id, name, description, icon, xp_reward, rarity, unlock_criteria FROM achievements ORDER BY id"
+    )
+    rows = cur.fetchall()
+    version = stamp(rows)
+    return build_catalog(rows, version), version
+
+
+# The compiled catalog, shared by every request in this process.
+ACHIEVEMENT_CACHE = register_cache("achievements", load_achievement_rows)
+
+
+def load_catalog(cur=None):
+    # Return the compiled catalog from memory, loading it when the cache is cold.
+    return ACHIEVEMENT_CACHE.get(cur)
+
+
+def plan_unlocks(candidates, stats, done, event):
+    # Work out every achievement this event unlocks without touching the database.
+    # Bonus XP from each unlock is added to a copy of the stats and the level is
+    # worked out again, so chains like "unlock -> level up -> level badge" are
+    # followed in memory until nothing else changes.
+    stats = dict(stats)
+    done = set(done)
+    planned = []
+
+    changed = True
+    while changed:
+        changed = False
+        for entry in candidates:
+            if entry["id"] in done or not entry["check"](stats, event):
+                continue
+            done.add(entry["id"])
+            planned.append(entry)
+            changed = True
+            if entry["xp_reward"] > 0:
+                stats["total_xp"] = to_int(stats.get("total_xp")) + entry["xp_reward"]
+                level, _, _ = get_level_progress(stats["total_xp"])
+                stats["level"] = max(to_int(stats.get("level"), 1), level)
+
+    return planned
+
+
+def save_unlocks(cur, email, planned):
+    # Save planned unlocks in one statement and return the IDs actually inserted.
+    cur.execute(
+        """
+        INSERT INTO user_achievements (user_email, achievement_id, name, description, tier, xp_awarded)
+        SELECT %s, a.id, a.name, a.description, a.tier, a.xp
+        FROM unnest(%s::varchar[], %s::varchar[], %s::text[], %s::varchar[], %s::int[])
+             AS a(id, name, description, tier, xp)
+        ON CONFLICT (user_email, achievement_id) DO NOTHING
+        RETURNING achievement_id
+        """,
+        (
+            email,
+            [e["id"] for e in planned],
+            [e["name"] for e in planned],
+            [e["description"] for e in planned],
+            [e["rarity"] for e in planned],
+            [e["xp_reward"] for e in planned],
+        ),
+    )
+    return {r[0] for r in cur.fetchall()}
+
+
+def load_done(cur, email):
+    # Return the IDs of the achievements a user already has.
+    cur.execute("SELECT achievement_id FROM user_achievements WHERE user_email = %s", (email,))
+    return {r[0] for r in cur.fetchall()}
+
+
+def evaluate_achievements(cur, email, event=None):
+    # Check the achievements an event could unlock for one user on an open cursor.
+    # Nothing is committed here, so the caller can keep the unlocks and
+    # their bonus XP in the same transaction as the work that caused them.
     # Returns a list of the achievements unlocked during this call.
     email = (email or "").strip().lower()
     if not email:
         return []
 
     event = (event or "").strip().lower()
+    unlocked = []
 
-    conn = get_db_connection()
-    cur = conn.cursor()
-    try:
-        unlocked = []
+    # Only check the achievements this event could unlock.
+    candidates = candidates_for_event(load_catalog(cur), event)
+    if not candidates:
+        return unlocked
+
+    stats = load_stats(cur, email)
+    if not stats:
+        return unlocked
+    done = load_done(cur, email)
+
+    # Normally this runs once. It only goes round again if another request
+    # saved some of the same badges first, because then the bonus XP used
+    # to plan the chain was not really awarded here.
+    for _ in range(3):
+        planned = plan_unlocks(candidates, stats, done, event)
+        if not planned:
+            break
 
-        # Load the achievement list once before checking it.
-        cur.execute(
-            "SELECT id, name, description, icon, xp_reward, rarity, unlock_criteria FROM achievements ORDER BY id"
+        inserted = save_unlocks(cur, email, planned)
+        record_unlocks(inserted)
+        granted = [entry for entry in planned if entry["id"] in inserted]
+        award_xp_batch(
+            cur,
+            email,
+            [(f"Achievement: {entry['id']}", entry["xp_reward"], XP_ACHIEVEMENT, entry["id"]) for entry in granted],
         )
-        catalog = cur.fetchall()
-
-        # Run a few passes so one unlock can award XP and trigger another.
-        for _ in range(5):
-            stats = load_stats(cur, email)
-            if not stats:
-                break
-
-            cur.execute("SELECT achievement_id FROM user_achievements WHERE user_email = %s", (email,))
-            done = {r[0] for r in cur.fetchall()}
-
-            new_this_pass = 0
-
-            for aid, name, desc, icon, xp_reward, rarity, raw_rule in catalog:
-                if aid in done:
-                    continue
-                if not rule_matches(parse_rule(raw_rule), stats, event):
-                    continue
-
-                xp = max(0, to_int(xp_reward))
-
-                cur.execute(
-                    "INSERT INTO user_achievements (user_email, achievement_id, name, description, tier, xp_awarded) VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT (user_email, achievement_id) DO NOTHING",
-                    (email, aid, name, desc, rarity, xp),
-                )
-                if cur.rowcount != 1:
-                    continue
-
-                conn.commit()
-                done.add(aid)
-                new_this_pass += 1
-
-                xp_added = 0
-                if xp > 0:
-                    xp_added, _ = add_xp_to_user(email, xp, action=f"Achievement: {aid}")
-
-                unlocked.append({
-                    "id": aid,
-                    "name": name,
-                    "description": desc,
-                    "icon": icon or "bi-award-fill",
-                    "rarity": rarity or "common",
-                    "xp_added": to_int(xp_added),
-                })
-
-            if new_this_pass == 0:
-                break
 
-        return unlocked
+        for entry in granted:
+            unlocked.append({
+                "id": entry["id"],
+                "name": entry["name"],
+                "description": entry["description"],
+                "icon": entry["icon"] or "bi-award-fill",
+                "rarity": entry["rarity"] or "common",
+                "xp_added": entry["xp_reward"],
+            })
+
+        if len(granted) == len(planned):
+            break
+
+        stats = load_stats(cur, email)
+        if not stats:
+            break
+        done = load_done(cur, email)
+
+    return unlocked
 
+
+def evaluate_achievements_for_event(email, event=None):
+    # Check every achievement for one user and save anything newly unlocked.
+    # Returns a list of the achievements unlocked during this call.
+    email = (email or "").strip().lower()
+    if not email:
+        return []
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        unlocked = evaluate_achievements(cur, email, event)
+        conn.commit()
+        return unlocked
     except Exception as e:
         print("Achievement engine error:", e)
         return []
@@ -0,0 +1,286 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+achievement_queue.py - Background Achievement Checks
+---
+This file lets achievement checks run in the background instead
+of inside the request. It is off by default and switched on with
+ACHIEVEMENTS_ASYNC=1.
+
+When it is on, completions, logins, award-xp and onboarding save
+a job in the achievement_jobs table and return straight away.
+Workers take jobs with FOR UPDATE SKIP LOCKED, so several can run
+at once without picking the same job. Each job is checked and
+marked done in one transaction, and the frontend collects the
+new badges from /api/user/achievements/pending.
+
+A job that fails is put back with a later run_after (30 seconds per
+attempt so far, set with ACHIEVEMENT_RETRY_SECONDS), so a lasting
+error does not hold up newer jobs, and is marked failed after
+MAX_ATTEMPTS tries.
+
+Workers can run inside each web process (ACHIEVEMENTS_WORKER=thread)
+or on their own with:
+    python -m achievement_queue --threads 2
+"""
+
+import argparse
+import os
+import threading
+import time
+
+import psycopg
+from psycopg.types.json import Jsonb
+
+from achievement_engine import evaluate_achievements, evaluate_achievements_for_event
+from db import connection_dsn, email_from, env_flag, env_int, get_db_connection, to_int
+
+# Channel used to wake workers as soon as a job is queued.
+JOB_CHANNEL = "achievement_jobs"
+
+# Give up on a job after this many failed attempts.
+MAX_ATTEMPTS = 5
+
+_worker_threads = []
+_worker_lock = threading.Lock()
+_stop = threading.Event()
+
+
+def async_enabled():
+    # Return True when achievement checks should be queued instead of run inline.
+    return env_flag("ACHIEVEMENTS_ASYNC", False)
+
+
+def retry_delay_seconds():
+    # Wait this long per failed attempt before trying a job again.
+    return max(0, env_int("ACHIEVEMENT_RETRY_SECONDS", 30))
+
+
+def enqueue_evaluation(cur, email, event):
+    # Save a job to check one user's achievements after an event.
+    cur.execute(
+        "INSERT INTO achievement_jobs (user_email, event) VALUES (%s, %s) RETURNING id",
+        (email, event),
+    )
+    job_id = cur.fetchone()[0]
+    cur.execute("SELECT pg_notify(%s, %s)", (JOB_CHANNEL, str(job_id)))
+    return job_id
+
+
+def queue_or_evaluate(cur, email, event):
+    # On an open cursor, queue the check in async mode or run it now.
+    # Returns (newly unlocked achievements, True if the check was queued).
+    if async_enabled():
+        enqueue_evaluation(cur, email, event)
+        return [], True
+    return evaluate_achievements(cur, email, event), False
+
+
+def queue_or_evaluate_for_event(email, event):
+    # Same as queue_or_evaluate(), but on its own connection.
+    email = email_from(email)
+    if not email:
+        return [], False
+    if not async_enabled():
+        return evaluate_achievements_for_event(email, event), False
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        enqueue_evaluation(cur, email, event)
+        conn.commit()
+        return [], True
+    except Exception as e:
+        print("Achievement queue error:", e)
+        return [], False
+    finally:
+        cur.close()
+        conn.close()
+
+
+def run_next_job(conn):
+    # Claim one queued job, check it, and mark it done in the same transaction.
+    # Returns False when there was nothing to do.
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            """
+            SELECT id, user_email, event
+            FROM achievement_jobs
+            WHERE status = 'queued' AND run_after <= CURRENT_TIMESTAMP
+            ORDER BY id
+            LIMIT 1
+            FOR UPDATE SKIP LOCKED
+            """
+        )
+        job = cur.fetchone()
+        if not job:
+            conn.rollback()
+            return False
+
+        job_id, email, event = job
+        try:
+            with conn.transaction():
+                unlocked = evaluate_achievements(cur, email, event)
+            cur.execute(
+                """
+                UPDATE achievement_jobs
+                SET status = 'done', attempts = attempts + 1, unlocked = %s, finished_at = CURRENT_TIMESTAMP
+                WHERE id = %s
+                """,
+                (Jsonb(unlocked), job_id),
+            )
+        except Exception as e:
+            print("Achievement job error:", e)
+            cur.execute(
+                """
+                UPDATE achievement_jobs
+                SET attempts = attempts + 1,
+                    last_error = %s,
+                    status = CASE WHEN attempts + 1 >= %s THEN 'failed' ELSE 'queued' END,
+                    run_after = CURRENT_TIMESTAMP + (attempts + 1) * make_interval(secs => %s)
+                WHERE id = %s
+                """,
+                (str(e), MAX_ATTEMPTS, retry_delay_seconds(), job_id),
+            )
+        conn.commit()
+        return True
+    finally:
+        cur.close()
+
+
+def drain_queue(limit=None):
+    # Run queued jobs until the queue is empty (or the limit is reached).
+    # Returns how many jobs were handled.
+    handled = 0
+    conn = get_db_connection()
+    try:
+        while limit is None or handled < limit:
+            if not run_next_job(conn):
+                break
+            handled += 1
+    finally:
+        conn.close()
+    return handled
+
+
+def take_pending_unlocks(cur, email):
+    # Return finished unlocks the user has not collected yet and mark them collected.
+    # Also returns how many of the user's jobs are still waiting.
+    cur.execute(
+        """
+        UPDATE achievement_jobs
+        SET delivered = TRUE
+        WHERE user_email = %s AND status = 'done' AND delivered = FALSE
+        RETURNING id, unlocked
+        """,
+        (email,),
+    )
+    unlocked = []
+    for _, items in sorted(cur.fetchall()):
+        unlocked.extend(items or [])
+
+    cur.execute(
+        "SELECT COUNT(*) FROM achievement_jobs WHERE user_email = %s AND status = 'queued'",
+        (email,),
+    )
+    return unlocked, to_int(cur.fetchone()[0])
+
+
+def wait_for_jobs(listener, timeout):
+    # Sleep until a job is queued or the timeout passes.
+    if listener is None:
+        _stop.wait(timeout)
+        return
+    for _ in listener.notifies(timeout=timeout, stop_after=1):
+        pass
+
+
+def open_listener():
+    # Open a separate connection that listens for new jobs.
+    try:
+        listener = psycopg.connect(connection_dsn(), autocommit=True)
+        listener.execute(f"LISTEN {JOB_CHANNEL}")
+        return listener
+    except Exception as e:
+        print("Achievement queue listen error:", e)
+        return None
+
+
+def worker_loop(poll_seconds=5):
+    # Keep draining the queue, waking up on NOTIFY or every poll_seconds.
+    listener = open_listener()
+    try:
+        while not _stop.is_set():
+            try:
+                drain_queue()
+            except Exception as e:
+                print("Achievement worker error:", e)
+            try:
+                wait_for_jobs(listener, poll_seconds)
+            except Exception as e:
+                print("Achievement queue listen error:", e)
+                if listener is not None:
+                    listener.close()
+                listener = None
+                _stop.wait(poll_seconds)
+                listener = open_listener()
+    finally:
+        if listener is not None:
+            listener.close()
+
+
+def start_worker_threads(count=None):
+    # Start background worker threads in this process (once per process).
+    count = max(1, to_int(count, 0) or env_int("ACHIEVEMENT_WORKER_THREADS", 1))
+    poll = max(1, env_int("ACHIEVEMENT_WORKER_POLL", 5))
+    with _worker_lock:
+        alive = [t for t in _worker_threads if t.is_alive()]
+        for number in range(len(alive), count):
+            thread = threading.Thread(
+                target=worker_loop,
+                args=(poll,),
+                name=f"achievement-worker-{os.getpid()}-{number}",
+                daemon=True,
+            )
+            thread.start()
+            alive.append(thread)
+        _worker_threads[:] = alive
+    return len(alive)
+
+
+def start_in_process_worker():
+    # Start worker threads when ACHIEVEMENTS_WORKER=thread is set.
+    if (os.getenv("ACHIEVEMENTS_WORKER") or "").strip().lower() == "thread":
+        return start_worker_threads()
+    return 0
+
+
+def main(argv=None):
+    # Run a standalone worker process until it is stopped.
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the achievement job worker.")
+    parser.add_argument("--threads", type=int, default=env_int("ACHIEVEMENT_WORKER_THREADS", 1))
+    parser.add_argument("--once", action="store_true", help="drain the queue once and exit")
+    args = parser.parse_args(argv)
+
+    if args.once:
+        print(f"Handled {drain_queue()} job(s).")
+        return 0
+
+    start_worker_threads(args.threads)
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        _stop.set()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -10,18 +10,28 @@ This file is the main starting point for the Netology backend.
 It creates the Flask app, enables CORS for the frontend, and
 registers the route files used across the project.
 
-It also serves the frontend files from the docs folder, redirects
-the root URL to the landing page, and provides a small health
-check route for deployment.
+It also serves the frontend files from the docs folder (compressed
+and fingerprinted by static_assets.py), redirects the root URL to
+the landing page, and provides a small health check route for
+deployment. Prometheus metrics are served on /metrics (see
+metrics.py).
 """
 
+from pathlib import Path
+
 from dotenv import load_dotenv
 from flask import Flask, redirect
 from flask_cors import CORS
 
-from auth_routes import auth, bcrypt as auth_bcrypt
+from auth_routes import auth
 from course_routes import courses
+from catalog_cache import cache_stats
+from db import pool_stats
+from metrics import init_app as init_metrics
 from onboarding_routes import onboarding
+from password_hashing import hashing_stats
+from query_log import init_app as init_query_log
+from static_assets import AssetStore
 from topology_routes import topology
 from user_routes import user_api
 
@@ -32,15 +42,15 @@ ALLOWED_ORIGINS = [
     "https://netology-fyp.onrender.com",
 ]
 
-app = Flask(
-    __name__,
-    static_folder="../docs",
-    static_url_path="",
-)
+# The frontend pages live in the docs folder next to the backend.
+DOCS_DIR = Path(__file__).resolve().parent.parent / "docs"
+
+app = Flask(__name__, static_folder=None)
 
 CORS(app, origins=ALLOWED_ORIGINS)
 
-auth_bcrypt.init_app(app)
+init_query_log(app)
+init_metrics(app)
 
 app.register_blueprint(auth)
 app.register_blueprint(courses)
@@ -55,7 +65,25 @@ def home():
     return redirect("/index.html")
 
 
+# Read, fingerprint and compress the frontend files once at startup.
+assets = AssetStore(DOCS_DIR).build()
+
+
+@app.get("/<path:filename>")
+def frontend_file(filename):
+    # Serve a page, CSS or JS file from the docs folder.
+    return assets.serve(filename)
+
+
 @app.get("/healthz")
 def healthz():
     # Simple check used by Render to see if the app is running.
-    return {"ok": True}
+    # The pool counters help size DB_POOL_MAX under load, and the
+    # catalog cache counters show how often the course data is reused.
+    # The hashing counters show how long logins wait for bcrypt.
+    return {
+        "ok": True,
+        "db_pool": pool_stats(),
+        "catalog_cache": cache_stats(),
+        "password_hashing": hashing_stats(),
+    }
@@ -13,17 +13,39 @@ and deleting an account.
 
 These routes are used by the login, signup, forgot password,
 dashboard, and account pages on the frontend.
+
+Passwords are hashed and checked in password_hashing.py, off the
+web worker. When too many are queued the routes answer 503. No
+database connection is held while a hash runs: the routes read what
+they need, hand the connection back, hash, and only then borrow one
+again to save.
+
+/award-xp pays each action once per user, using the user_xp_awards
+ledger. A client can also send an Idempotency-Key header; a retry
+with the same key gets the first call's result back instead of a
+"no XP" answer.
 """
 
 from flask import Blueprint, jsonify, request
-from flask_bcrypt import Bcrypt
+import psycopg
 
-from achievement_engine import evaluate_achievements_for_event
+from achievement_queue import queue_or_evaluate_for_event
 from db import email_from, get_db_connection, to_int
-from xp_system import get_level_progress, rank_for_level
+from login_streaks import load_login_streak
+from password_hashing import RETRY_AFTER_SECONDS, HashingBusy, check_password, hash_password
+from xp_system import XP_AWARD, award_xp as award_xp_on_cursor, get_level_progress, rank_for_level
 
 auth = Blueprint("auth", __name__)
-bcrypt = Bcrypt()
+
+# Longest Idempotency-Key header accepted (fits user_xp_awards.idempotency_key).
+MAX_IDEMPOTENCY_KEY = 255
+
+# Login days sent back by /record-login. The browser saves them over its
+# local login log, which the account page's 90-day heatmap and "last
+# active" date read (HEATMAP_DAYS in account.js), and the dashboard uses
+# for its 7-day calendar and streak count. The whole current streak is
+# sent if it is longer.
+LOGIN_LOG_DAYS = 90
 
 def valid_email(email):
     # Check that an email has an @ and a dot in the domain part.
@@ -66,6 +88,20 @@ def xp_payload(total_xp):
     }
 
 
+def busy_response():
+    # Tell the browser to try again shortly when password hashing is backed up.
+    response = jsonify({"success": False, "message": "The server is busy. Please try again in a moment."})
+    response.headers["Retry-After"] = str(RETRY_AFTER_SECONDS)
+    return response, 503
+
+
+def already_taken(field):
+    # Answer a signup whose email or username belongs to another account.
+    if field == "username":
+        return jsonify({"success": False, "message": "That username is already taken. Please choose another."}), 409
+    return jsonify({"success": False, "message": "That email is already registered. Please login instead."}), 409
+
+
 # User Routes
 
 @auth.post("/register")
@@ -99,13 +135,31 @@ def register():
     try:
         cur.execute("SELECT 1 FROM users WHERE email = %s", (email,))
         if cur.fetchone():
-            return jsonify({"success": False, "message": "That email is already registered. Please login instead."}), 409
+            return already_taken("email")
 
         cur.execute("SELECT 1 FROM users WHERE username = %s", (username,))
         if cur.fetchone():
-            return jsonify({"success": False, "message": "That username is already taken. Please choose another."}), 409
+            return already_taken("username")
+    except Exception as e:
+        print("Register error:", e)
+        return jsonify({"success": False, "message": "Signup failed. Please try again."}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    # Hash with no connection held, so a backed-up hashing pool cannot
+    # leave pooled connections idle in a transaction.
+    try:
+        pw_hash = hash_password(password)
+    except HashingBusy:
+        return busy_response()
+    except Exception as e:
+        print("Register error:", e)
+        return jsonify({"success": False, "message": "Signup failed. Please try again."}), 500
 
-        pw_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
         cur.execute(
             """
             INSERT INTO users (
@@ -120,6 +174,10 @@ def register():
         )
         conn.commit()
         return jsonify({"success": True})
+    except psycopg.errors.UniqueViolation as e:
+        # Someone else signed up with the same email or username while hashing.
+        conn.rollback()
+        return already_taken("username" if "username" in (e.diag.constraint_name or "") else "email")
     except Exception as e:
         print("Register error:", e)
         return jsonify({"success": False, "message": "Signup failed. Please try again."}), 500
@@ -146,7 +204,16 @@ def login():
             (email,),
         )
         user = cur.fetchone()
-        if not user or not bcrypt.check_password_hash(user[2], password):
+    except Exception as e:
+        print("Login error:", e)
+        return jsonify({"success": False, "message": "Login failed. Try again."}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+    # The connection is back in the pool before the password is checked.
+    try:
+        if not user or not check_password(user[2], password):
             return jsonify({"success": False, "message": "Invalid email or password."}), 401
 
         return jsonify({
@@ -160,12 +227,37 @@ def login():
             "onboarding_completed": bool(user[7]),
             "email": email,
         })
+    except HashingBusy:
+        return busy_response()
     except Exception as e:
         print("Login error:", e)
         return jsonify({"success": False, "message": "Login failed. Try again."}), 500
-    finally:
-        cur.close()
-        conn.close()
+
+
+def user_info_payload(cur, email):
+    # Build the /user-info response for one user, or None if there is no such user.
+    cur.execute(
+        """
+        SELECT first_name, last_name, xp, username, email, start_level, created_at
+        FROM users WHERE email = %s
+        """,
+        (email,),
+    )
+    user = cur.fetchone()
+    if not user:
+        return None
+
+    created_at = user[6]
+    return {
+        "success": True,
+        "first_name": user[0],
+        "last_name": user[1],
+        "username": user[3],
+        "email": user[4],
+        **xp_payload(user[2]),
+        "start_level": start_level(user[5]),
+        "created_at": created_at.isoformat() if created_at else None,
+    }
 
 
 @auth.get("/user-info")
@@ -178,28 +270,10 @@ def user_info():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute(
-            """
-            SELECT first_name, last_name, xp, username, email, start_level, created_at
-            FROM users WHERE email = %s
-            """,
-            (email,),
-        )
-        user = cur.fetchone()
-        if not user:
+        payload = user_info_payload(cur, email)
+        if not payload:
             return jsonify({"success": False, "message": "User not found."}), 404
-
-        created_at = user[6]
-        return jsonify({
-            "success": True,
-            "first_name": user[0],
-            "last_name": user[1],
-            "username": user[3],
-            "email": user[4],
-            **xp_payload(user[2]),
-            "start_level": start_level(user[5]),
-            "created_at": created_at.isoformat() if created_at else None,
-        })
+        return jsonify(payload)
     except Exception as e:
         print("User info error:", e)
         return jsonify({"success": False, "message": "Error loading user info."}), 500
@@ -215,31 +289,50 @@ def award_xp():
     email = email_from(data.get("email"))
     action = (data.get("action") or "").strip()
     xp = to_int(data.get("xp"))
+    idempotency_key = (request.headers.get("Idempotency-Key") or "").strip() or None
 
     if not email or not action or xp <= 0:
         return jsonify({"success": False, "message": "Email, action, and positive XP are required."}), 400
+    if idempotency_key and len(idempotency_key) > MAX_IDEMPOTENCY_KEY:
+        return jsonify({"success": False, "message": "Idempotency-Key is too long."}), 400
 
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute("SELECT 1 FROM xp_log WHERE user_email = %s AND action = %s LIMIT 1", (email, action))
-        already = cur.fetchone() is not None
+        # Claim the action first, so two requests at once cannot both pay out.
+        # A clash on either the action or the idempotency key means this
+        # user has been here before.
+        cur.execute(
+            """
+            INSERT INTO user_xp_awards (user_email, action, xp_awarded, idempotency_key)
+            SELECT email, %s, %s, %s FROM users WHERE email = %s
+            ON CONFLICT DO NOTHING
+            """,
+            (action, xp, idempotency_key, email),
+        )
 
         xp_added = 0
-        if not already:
-            cur.execute("UPDATE users SET xp = xp + %s WHERE email = %s RETURNING xp", (xp, email))
-            row = cur.fetchone()
-            if row:
-                new_level, _, _ = get_level_progress(row[0])
-                cur.execute(
-                    "UPDATE users SET numeric_level = %s, level = %s WHERE email = %s",
-                    (new_level, rank_for_level(new_level), email),
-                )
-                cur.execute(
-                    "INSERT INTO xp_log (user_email, action, xp_awarded) VALUES (%s, %s, %s)",
-                    (email, action, xp),
-                )
-                xp_added = xp
+        replayed = False
+        if cur.rowcount == 1:
+            xp_added, _ = award_xp_on_cursor(cur, email, xp, action, category=XP_AWARD, key=action)
+        else:
+            cur.execute(
+                """
+                SELECT action, xp_awarded, idempotency_key FROM user_xp_awards
+                WHERE user_email = %s AND (action = %s OR idempotency_key = %s)
+                """,
+                (email, action, idempotency_key),
+            )
+            for earlier_action, earlier_xp, earlier_key in cur.fetchall():
+                if idempotency_key and earlier_key == idempotency_key:
+                    if earlier_action != action:
+                        conn.rollback()
+                        return jsonify({
+                            "success": False,
+                            "message": "Idempotency-Key was already used for a different action.",
+                        }), 422
+                    # A retry of the call that paid out: send back what it paid.
+                    xp_added, replayed = to_int(earlier_xp), True
         conn.commit()
     except Exception as e:
         print("Award XP error:", e)
@@ -248,14 +341,16 @@ def award_xp():
         cur.close()
         conn.close()
 
-    new_achievements = evaluate_achievements_for_event(email, "xp_award")
+    new_achievements, queued = queue_or_evaluate_for_event(email, "xp_award")
     achievement_xp = sum(to_int(a.get("xp_added")) for a in new_achievements)
 
     return jsonify({
         "success": True,
         "xp_added": xp_added,
+        "replayed": replayed,
         "newly_unlocked": new_achievements,
         "achievement_xp_added": achievement_xp,
+        "achievements_pending": queued,
     })
 
 
@@ -274,22 +369,31 @@ def record_login():
             "INSERT INTO user_logins (user_email, login_date) VALUES (%s, CURRENT_DATE) ON CONFLICT (user_email, login_date) DO NOTHING",
             (email,),
         )
+        # The user_logins triggers have already updated the stored streak.
+        streak = load_login_streak(cur, email)
         cur.execute(
-            "SELECT login_date FROM user_logins WHERE user_email = %s ORDER BY login_date LIMIT 365",
-            (email,),
+            """
+            SELECT login_date FROM user_logins
+            WHERE user_email = %s AND login_date > CURRENT_DATE - GREATEST(%s, %s)
+            ORDER BY login_date
+            """,
+            (email, LOGIN_LOG_DAYS, streak["current_streak"]),
         )
         rows = cur.fetchall()
         conn.commit()
 
         log = [row[0].isoformat() for row in rows]
-        new_achievements = evaluate_achievements_for_event(email, "login")
+        new_achievements, queued = queue_or_evaluate_for_event(email, "login")
         achievement_xp = sum(to_int(a.get("xp_added")) for a in new_achievements)
 
         return jsonify({
             "success": True,
             "log": log,
+            "current_streak": streak["current_streak"],
+            "longest_streak": streak["longest_streak"],
             "newly_unlocked": new_achievements,
             "achievement_xp_added": achievement_xp,
+            "achievements_pending": queued,
         })
     except Exception as e:
         print("Record login error:", e)
@@ -317,11 +421,31 @@ def forgot_password():
     cur = conn.cursor()
     try:
         cur.execute("SELECT id FROM users WHERE email = %s", (email,))
+        found = cur.fetchone()
+    except Exception as e:
+        print("Forgot password error:", e)
+        return jsonify({"success": False, "message": "Server error."}), 500
+    finally:
+        cur.close()
+        conn.close()
+    if not found:
+        return jsonify({"success": False, "message": "No account found with that email."}), 404
+
+    # Hash with no connection held, then borrow one again to save it.
+    try:
+        pw_hash = hash_password(new_password)
+    except HashingBusy:
+        return busy_response()
+    except Exception as e:
+        print("Forgot password error:", e)
+        return jsonify({"success": False, "message": "Server error."}), 500
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("UPDATE users SET password_hash = %s WHERE email = %s RETURNING id", (pw_hash, email))
         if not cur.fetchone():
             return jsonify({"success": False, "message": "No account found with that email."}), 404
-
-        pw_hash = bcrypt.generate_password_hash(new_password).decode("utf-8")
-        cur.execute("UPDATE users SET password_hash = %s WHERE email = %s", (pw_hash, email))
         conn.commit()
         return jsonify({"success": True})
     except Exception as e:
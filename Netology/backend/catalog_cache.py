@@ -0,0 +1,178 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+catalog_cache.py - Shared Catalog Cache
+---
+This file keeps read-only catalogs (the courses, achievements and
+challenges tables) in memory so routes do not query them on every request.
+These tables only change when new content is deployed.
+
+Each catalog is loaded on first use and then served from memory
+until its time to live (CATALOG_CACHE_TTL seconds) runs out or it
+is cleared. A database trigger sends NOTIFY catalog_changed when
+one of the tables changes, and a listener thread in each worker clears
+the matching catalog, so every gunicorn worker picks up the change.
+
+Hit and miss counts are reported on /healthz and /metrics.
+"""
+
+import hashlib
+import threading
+import time
+
+import psycopg
+
+from db import connection_dsn, env_flag, env_int, get_db_connection
+from metrics import record_cache
+
+# Channel the catalog triggers send their table name on.
+CATALOG_CHANNEL = "catalog_changed"
+
+_caches = {}
+_listener_thread = None
+_listener_lock = threading.Lock()
+
+
+def stamp(rows):
+    # Build a short version stamp from a list of rows.
+    return hashlib.md5(repr(rows).encode()).hexdigest()
+
+
+class CatalogCache:
+    # A read-through cache for one catalog with a time to live.
+    # The loader gets an open cursor and returns (value, version).
+
+    def __init__(self, name, loader, ttl=None):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.value = None
+        self.version = None
+        self.loaded_at = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def ttl_seconds(self):
+        # Use the fixed TTL if one was given, otherwise read it from the environment.
+        if self.ttl is not None:
+            return self.ttl
+        return env_int("CATALOG_CACHE_TTL", 300)
+
+    def is_fresh(self):
+        loaded_at = self.loaded_at
+        return loaded_at is not None and time.monotonic() - loaded_at < self.ttl_seconds()
+
+    def get(self, cur=None):
+        # Return the cached catalog, loading it first if it is missing or stale.
+        # cur is only used on a miss; without one a pooled connection is borrowed.
+        if self.is_fresh():
+            self.hits += 1
+            record_cache(self.name, True)
+            return self.value
+
+        with self.lock:
+            # Another thread may have loaded it while this one waited.
+            if self.is_fresh():
+                self.hits += 1
+                record_cache(self.name, True)
+                return self.value
+            self.misses += 1
+            record_cache(self.name, False)
+            self.value, self.version = self.load(cur)
+            self.loaded_at = time.monotonic()
+            return self.value
+
+    def current_version(self, cur=None):
+        # Return the version stamp of the cached catalog.
+        self.get(cur)
+        return self.version
+
+    def load(self, cur):
+        if cur is not None:
+            return self.loader(cur)
+        conn = get_db_connection()
+        own_cur = conn.cursor()
+        try:
+            result = self.loader(own_cur)
+            conn.commit()
+            return result
+        finally:
+            own_cur.close()
+            conn.close()
+
+    def invalidate(self):
+        # Drop the cached catalog so the next request loads it again.
+        with self.lock:
+            self.loaded_at = None
+            self.invalidations += 1
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "version": self.version,
+            "cached": self.is_fresh(),
+        }
+
+
+def register_cache(name, loader, ttl=None):
+    # Create (or replace) the cache for one catalog and return it.
+    cache = CatalogCache(name, loader, ttl)
+    _caches[name] = cache
+    return cache
+
+
+def invalidate(name=None):
+    # Clear one catalog by name, or every catalog when no name is given.
+    for cache_name, cache in list(_caches.items()):
+        if name is None or cache_name == name:
+            cache.invalidate()
+
+
+def cache_stats():
+    # Return the counters for every catalog cache in this process.
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+def notify_catalog_changed(cur, name=""):
+    # Tell every worker to reload a catalog (or all of them for an empty name).
+    cur.execute("SELECT pg_notify(%s, %s)", (CATALOG_CHANNEL, name))
+
+
+def handle_notify(payload):
+    # Clear the catalog named in a NOTIFY message.
+    invalidate((payload or "").strip() or None)
+
+
+def listen_for_changes(retry_seconds=5):
+    # Clear catalogs whenever another process changes the tables.
+    while True:
+        try:
+            with psycopg.connect(connection_dsn(), autocommit=True) as listener:
+                listener.execute(f"LISTEN {CATALOG_CHANNEL}")
+                # Anything sent while we were not listening was missed.
+                invalidate()
+                for notify in listener.notifies():
+                    handle_notify(notify.payload)
+        except Exception as e:
+            print("Catalog listener error:", e)
+        time.sleep(retry_seconds)
+
+
+def start_listener():
+    # Start the NOTIFY listener thread once per process (set CATALOG_LISTEN=0 to turn off).
+    global _listener_thread
+    if not env_flag("CATALOG_LISTEN", True):
+        return False
+    with _listener_lock:
+        if _listener_thread is not None and _listener_thread.is_alive():
+            return True
+        _listener_thread = threading.Thread(target=listen_for_changes, name="catalog-listener", daemon=True)
+        _listener_thread.start()
+    return True
@@ -0,0 +1,71 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+course_progress.py - Course Progress
+---
+This file works out user_courses.progress and completed from the
+lessons, quizzes and challenges a user has done.
+
+A course has its lessons plus one quiz and one challenge per module
+to finish. The counting, the course totals and the save are all one
+INSERT ... SELECT, so the same statement serves one user and course
+after a completion, or every user of a course after its
+total_lessons or module_count changes.
+
+After a completion the stored progress only goes up. A rebuild
+(exact=True) writes the counted value even if it is lower.
+
+Run from the backend folder with:
+    python manage.py recalc-progress [--email EMAIL] [--course-id ID]
+"""
+
+# Every (user, course, activity) row, plus the existing user_courses
+# rows so a course with nothing done is set back to 0 on a rebuild.
+# {where} is replaced by the user and course filter.
+PROGRESS_SQL = """
+    INSERT INTO user_courses AS uc (user_email, course_id, progress, completed)
+    SELECT done.user_email, done.course_id,
+           LEAST(100, done.activities * 100 / totals.activities),
+           done.activities >= totals.activities
+    FROM (
+        SELECT user_email, course_id, SUM(counted) AS activities
+        FROM (
+            SELECT user_email, course_id, 1 AS counted FROM user_lessons WHERE {where}
+            UNION ALL SELECT user_email, course_id, 1 FROM user_quizzes    WHERE {where}
+            UNION ALL SELECT user_email, course_id, 1 FROM user_challenges WHERE {where}
+            UNION ALL SELECT user_email, course_id, 0 FROM user_courses    WHERE {where}
+        ) rows
+        WHERE user_email IS NOT NULL
+        GROUP BY user_email, course_id
+    ) done
+    JOIN courses c ON c.id = done.course_id AND c.is_active = TRUE
+    CROSS JOIN LATERAL (
+        SELECT GREATEST(1, c.total_lessons) + GREATEST(1, c.module_count) * 2 AS activities
+    ) totals
+    ON CONFLICT (user_email, course_id) DO UPDATE SET
+        progress   = {progress},
+        completed  = EXCLUDED.completed,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE uc.progress IS DISTINCT FROM {progress}
+       OR uc.completed IS DISTINCT FROM EXCLUDED.completed
+"""
+
+
+def recalculate_progress(cur, email=None, course_ids=None, exact=False):
+    # Recount progress for one user, some courses, both, or everyone.
+    # Returns how many user_courses rows were written.
+    filters, params = [], []
+    if email:
+        filters.append("user_email = %s")
+        params.append(email)
+    if course_ids is not None:
+        filters.append("course_id = ANY(%s)")
+        params.append([int(course_id) for course_id in course_ids])
+    where = " AND ".join(filters) or "TRUE"
+    progress = "EXCLUDED.progress" if exact else "GREATEST(uc.progress, EXCLUDED.progress)"
+
+    cur.execute(PROGRESS_SQL.format(where=where, progress=progress), params * 4)
+    return cur.rowcount
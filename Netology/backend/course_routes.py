@@ -13,13 +13,27 @@ data for the logged-in user.
 
 These routes are mainly used by the courses, course, lesson,
 quiz, dashboard, progress, and sandbox pages.
+
+/progress/batch saves many completions in one request (for a client
+coming back online, or an import). They are inserted with one
+statement per activity type, and the XP, course progress and
+achievement checks run once for the whole batch.
+
+Course details are read from the shared catalog cache, so only
+the user's own progress rows are queried on each request. The read
+routes also send ETags, so a repeat load that has not changed gets
+a 304 instead of the full JSON.
 """
 
 from flask import Blueprint, jsonify, request
 
-from achievement_engine import evaluate_achievements_for_event
-from db import email_from, get_db_connection, to_int
-from xp_system import add_xp_to_user
+from achievement_queue import queue_or_evaluate
+from catalog_cache import register_cache, stamp
+from course_progress import recalculate_progress
+from db import email_from, env_int, get_db_connection, to_int
+from http_cache import CATALOG_CACHE_CONTROL, PRIVATE_CACHE_CONTROL, add_cache_headers, make_etag, not_modified
+from user_stats import load_progress_version, load_user_stats
+from xp_system import award_xp, award_xp_batch
 
 courses = Blueprint("courses", __name__)
 
@@ -39,48 +53,164 @@ def course_row(row):
     }
 
 
-def recalculate_course_progress(cur, email, course_id):
-    # Update user_courses.progress based on all completed activities.
-    # Total activities = lessons + 1 quiz + 1 challenge per unit (module).
-    cur.execute(
-        "SELECT total_lessons, module_count FROM courses WHERE id = %s AND is_active = TRUE",
-        (course_id,),
-    )
-    row = cur.fetchone()
-    if not row:
-        return
-    total_lessons = max(1, to_int(row[0], 1))
-    module_count = max(1, to_int(row[1], 1))
-    total_activities = total_lessons + (module_count * 2)
-
+def load_course_rows(cur):
+    # Read the active courses for the catalog cache.
     cur.execute(
         """
-        SELECT
-            (SELECT COUNT(*) FROM user_lessons    WHERE user_email = %s AND course_id = %s),
-            (SELECT COUNT(*) FROM user_quizzes    WHERE user_email = %s AND course_id = %s),
-            (SELECT COUNT(*) FROM user_challenges WHERE user_email = %s AND course_id = %s)
-        """,
-        (email, course_id, email, course_id, email, course_id),
+        SELECT id, title, description, total_lessons, module_count,
+               xp_reward, difficulty, category, required_level, estimated_time
+        FROM courses
+        WHERE is_active = TRUE
+        ORDER BY id
+        """
     )
-    counts = cur.fetchone()
-    activities_done = sum(to_int(c, 0) for c in counts)
-    progress = min(100, int(activities_done / total_activities * 100))
-    is_complete = activities_done >= total_activities
+    rows = cur.fetchall()
+    listed = [course_row(r) for r in rows]
+    return {"courses": listed, "by_id": {c["id"]: c for c in listed}}, stamp(rows)
 
-    cur.execute(
-        "INSERT INTO user_courses (user_email, course_id, progress, completed) VALUES (%s, %s, %s, %s) ON CONFLICT (user_email, course_id) DO UPDATE SET progress = GREATEST(user_courses.progress, EXCLUDED.progress), completed = EXCLUDED.completed, updated_at = CURRENT_TIMESTAMP",
-        (email, course_id, progress, is_complete),
-    )
+
+# Active courses, shared by every request in this process.
+COURSE_CACHE = register_cache("courses", load_course_rows)
 
 
-def check_achievements(email, event):
-    # Check for new achievements and return the unlocks plus their XP total.
+def find_course(course_id, cur=None):
+    # Return one active course from the cache, or None if there is no such course.
+    return COURSE_CACHE.get(cur)["by_id"].get(course_id)
+
+
+def check_achievements(conn, cur, email, event):
+    # Check for new achievements inside the open transaction, or queue the
+    # check for a worker when ACHIEVEMENTS_ASYNC is on.
+    # A savepoint keeps an achievement error from undoing the completion itself.
     try:
-        new_achievements = evaluate_achievements_for_event(email, event) or []
+        with conn.transaction():
+            new_achievements, queued = queue_or_evaluate(cur, email, event)
     except Exception as err:
         print(f"Achievement error ({event}):", err)
-        new_achievements = []
-    return new_achievements, sum(to_int(a.get("xp_added")) for a in new_achievements)
+        new_achievements, queued = [], False
+    return new_achievements, sum(to_int(a.get("xp_added")) for a in new_achievements), queued
+
+
+# Completion pipeline settings for each activity type:
+# (completion table, XP log action, achievement event)
+COMPLETION_TYPES = {
+    "lesson": ("user_lessons", "Lesson Completed", "lesson_complete"),
+    "quiz": ("user_quizzes", "Quiz Completed", "quiz_complete"),
+    "challenge": ("user_challenges", "Challenge Completed", "challenge_complete"),
+}
+
+
+# Lowest lesson number and default XP for each activity type, matching
+# the single completion routes.
+COMPLETION_DEFAULTS = {
+    "lesson": (1, 0),
+    "quiz": (0, 5),
+    "challenge": (0, 15),
+}
+
+
+def complete_activity(conn, cur, kind, email, course_id, lesson_number, xp):
+    # Save one completion, its course progress, XP, level, and achievements.
+    # Everything runs on one connection and is committed once at the end, so a
+    # double click cannot award the same XP twice and nothing is half saved.
+    table, action, event = COMPLETION_TYPES[kind]
+
+    # Save the activity only once.
+    cur.execute(
+        f"""
+        INSERT INTO {table} (user_email, course_id, lesson_number, xp_awarded)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (user_email, course_id, lesson_number) DO NOTHING
+        """,
+        (email, course_id, lesson_number, xp),
+    )
+    first_time = cur.rowcount == 1
+
+    # Update progress and XP any time an activity is completed for the first time.
+    xp_added = 0
+    if first_time:
+        recalculate_progress(cur, email, [course_id])
+        xp_added, _ = award_xp(cur, email, xp, action=action, key=f"{course_id}:{lesson_number}")
+
+    new_achievements, achievement_xp, queued = check_achievements(conn, cur, email, event)
+    conn.commit()
+    return {
+        "success": True,
+        "xp_added": xp_added,
+        "already_completed": not first_time,
+        "newly_unlocked": new_achievements,
+        "achievement_xp_added": achievement_xp,
+        "achievements_pending": queued,
+    }
+
+
+def max_batch_size():
+    # Largest number of completions /progress/batch takes in one request.
+    return max(1, env_int("PROGRESS_BATCH_MAX", 500))
+
+
+def batch_completions(cur, items):
+    # Check and clean the completions sent to /progress/batch.
+    # Returns (completions, None), or (None, message) for the first bad one.
+    completions = []
+    for index, item in enumerate(items):
+        item = item if isinstance(item, dict) else {}
+        kind = str(item.get("type") or "").strip().lower()
+        if kind not in COMPLETION_TYPES:
+            return None, f"Completion {index} has an unknown type."
+        lowest, default_xp = COMPLETION_DEFAULTS[kind]
+        course_id = to_int(item.get("course_id"), 0)
+        lesson_number = to_int(item.get("lesson_number"), -1)
+        if lesson_number < lowest or not course_exists(cur, course_id):
+            return None, f"Completion {index} needs a real course_id and lesson_number."
+        xp = max(0, to_int(item.get("earned_xp") or item.get("xp"), default_xp))
+        completions.append((kind, course_id, lesson_number, xp))
+    return completions, None
+
+
+def complete_activities(conn, cur, email, completions):
+    # Save many completions at once. Each activity type is one multi-row
+    # insert, then the XP is added in one update, progress is worked out
+    # in one statement, and achievements are checked once. Committed once.
+    by_kind = {}
+    for kind, course_id, lesson_number, xp in completions:
+        by_kind.setdefault(kind, []).append((course_id, lesson_number, xp))
+
+    awards = []
+    touched_courses = set()
+    for kind, rows in by_kind.items():
+        table, action, _ = COMPLETION_TYPES[kind]
+        # Repeats (in the batch or already saved) are skipped by ON CONFLICT.
+        cur.execute(
+            f"""
+            INSERT INTO {table} (user_email, course_id, lesson_number, xp_awarded)
+            SELECT %s, c.course_id, c.lesson_number, c.xp
+            FROM unnest(%s::int[], %s::int[], %s::int[]) AS c(course_id, lesson_number, xp)
+            ON CONFLICT (user_email, course_id, lesson_number) DO NOTHING
+            RETURNING course_id, lesson_number, xp_awarded
+            """,
+            (email, *([row[i] for row in rows] for i in range(3))),
+        )
+        for course_id, lesson_number, xp in cur.fetchall():
+            touched_courses.add(course_id)
+            awards.append((action, xp, None, f"{course_id}:{lesson_number}"))
+
+    if touched_courses:
+        recalculate_progress(cur, email, sorted(touched_courses))
+    xp_added, _ = award_xp_batch(cur, email, awards)
+
+    new_achievements, achievement_xp, queued = check_achievements(conn, cur, email, "progress_sync")
+    conn.commit()
+    return {
+        "success": True,
+        "saved": len(awards),
+        "already_completed": len(completions) - len(awards),
+        "xp_added": xp_added,
+        "courses_updated": sorted(touched_courses),
+        "newly_unlocked": new_achievements,
+        "achievement_xp_added": achievement_xp,
+        "achievements_pending": queued,
+    }
 
 
 def request_data():
@@ -90,32 +220,23 @@ def request_data():
 
 def course_exists(cur, course_id):
     # Check that a course is real and active before saving progress.
-    cur.execute("SELECT 1 FROM courses WHERE id = %s AND is_active = TRUE", (course_id,))
-    return cur.fetchone() is not None
+    return find_course(course_id, cur) is not None
 
 
 @courses.get("/courses")
 def list_courses():
     # Return all active courses.
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute(
-            """
-            SELECT id, title, description, total_lessons, module_count,
-                   xp_reward, difficulty, category, required_level, estimated_time
-            FROM courses
-            WHERE is_active = TRUE
-            ORDER BY id
-            """
-        )
-        return jsonify({"success": True, "courses": [course_row(r) for r in cur.fetchall()]})
+        catalog = COURSE_CACHE.get()
+        etag = make_etag("courses", COURSE_CACHE.version)
+        cached = not_modified(etag, CATALOG_CACHE_CONTROL)
+        if cached:
+            return cached
+        response = jsonify({"success": True, "courses": catalog["courses"]})
+        return add_cache_headers(response, etag, CATALOG_CACHE_CONTROL)
     except Exception as e:
         print("List courses error:", e)
         return jsonify({"success": False, "message": "Could not load courses."}), 500
-    finally:
-        cur.close()
-        conn.close()
 
 
 @courses.get("/course")
@@ -125,28 +246,53 @@ def get_course():
     if course_id <= 0:
         return jsonify({"success": False, "message": "Course ID required."}), 400
 
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        cur.execute(
-            """
-            SELECT id, title, description, total_lessons, module_count,
-                   xp_reward, difficulty, category, required_level, estimated_time
-            FROM courses
-            WHERE id = %s AND is_active = TRUE
-            """,
-            (course_id,),
-        )
-        row = cur.fetchone()
-        if not row:
+        course = find_course(course_id)
+        if not course:
             return jsonify({"success": False, "message": "Course not found."}), 404
-        return jsonify({"success": True, **course_row(row)})
+        etag = make_etag("course", course_id, COURSE_CACHE.version)
+        cached = not_modified(etag, CATALOG_CACHE_CONTROL)
+        if cached:
+            return cached
+        return add_cache_headers(jsonify({"success": True, **course}), etag, CATALOG_CACHE_CONTROL)
     except Exception as e:
         print("Get course error:", e)
         return jsonify({"success": False, "message": "Error fetching course."}), 500
-    finally:
-        cur.close()
-        conn.close()
+
+
+def user_courses_payload(cur, email):
+    # Build the /user-courses response: every course with the user's progress.
+    # The course details come from the cache, so only the user's rows are read here.
+    catalog = COURSE_CACHE.get(cur)
+    cur.execute(
+        "SELECT course_id, progress, completed FROM user_courses WHERE user_email = %s",
+        (email,),
+    )
+    progress_by_course = {row[0]: row[1:] for row in cur.fetchall()}
+
+    result = []
+    for course in catalog["courses"]:
+        progress, completed = progress_by_course.get(course["id"], (0, False))
+        progress = to_int(progress, 0)
+        is_complete = bool(completed)
+        status = "completed" if is_complete else ("in-progress" if progress > 0 else "not-started")
+        result.append({**course, "progress_pct": progress, "status": status})
+    return {"success": True, "courses": result}
+
+
+def progress_summary_payload(cur, email, counts=None):
+    # Build the /user-progress-summary response from the user_stats counters.
+    counts = counts or load_user_stats(cur, email)
+    total_courses = len(COURSE_CACHE.get(cur)["courses"])
+    return {
+        "success": True,
+        "lessons_done":    counts["lessons_completed"],
+        "quizzes_done":    counts["quizzes_completed"],
+        "challenges_done": counts["challenges_completed"],
+        "courses_done":    counts["courses_completed"],
+        "in_progress":     counts["courses_in_progress"],
+        "total_courses":   to_int(total_courses),
+    }
 
 
 @courses.get("/user-courses")
@@ -159,25 +305,7 @@ def user_courses():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute(
-            """
-            SELECT c.id, c.title, c.description, c.total_lessons, c.module_count,
-                   c.xp_reward, c.difficulty, c.category, c.required_level, c.estimated_time,
-                   COALESCE(uc.progress, 0), COALESCE(uc.completed, FALSE)
-            FROM courses c
-            LEFT JOIN user_courses uc ON uc.course_id = c.id AND uc.user_email = %s
-            WHERE c.is_active = TRUE
-            ORDER BY c.id
-            """,
-            (email,),
-        )
-        result = []
-        for row in cur.fetchall():
-            progress = to_int(row[10], 0)
-            is_complete = bool(row[11])
-            status = "completed" if is_complete else ("in-progress" if progress > 0 else "not-started")
-            result.append({**course_row(row), "progress_pct": progress, "status": status})
-        return jsonify({"success": True, "courses": result})
+        return jsonify(user_courses_payload(cur, email))
     except Exception as e:
         print("User courses error:", e)
         return jsonify({"success": False, "message": "Could not load user courses."}), 500
@@ -204,34 +332,7 @@ def complete_lesson():
         if not course_exists(cur, course_id):
             return jsonify({"success": False, "message": "Course not found."}), 404
 
-        # Save the lesson only once.
-        cur.execute(
-            """
-            INSERT INTO user_lessons (user_email, course_id, lesson_number, xp_awarded)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (user_email, course_id, lesson_number) DO NOTHING
-            """,
-            (email, course_id, lesson_number, xp),
-        )
-        first_time = cur.rowcount == 1
-
-        # Update progress any time a lesson is completed for the first time.
-        if first_time:
-            recalculate_course_progress(cur, email, course_id)
-
-        conn.commit()
-
-        xp_added = 0
-        if first_time:
-            xp_added, _ = add_xp_to_user(email, xp, action="Lesson Completed")
-
-        new_achievements, achievement_xp = check_achievements(email, "lesson_complete")
-        return jsonify({
-            "success": True,
-            "xp_added": xp_added,
-            "newly_unlocked": new_achievements,
-            "achievement_xp_added": achievement_xp,
-        })
+        return jsonify(complete_activity(conn, cur, "lesson", email, course_id, lesson_number, xp))
     except Exception as e:
         print("Complete lesson error:", e)
         return jsonify({"success": False, "message": "Could not update lesson."}), 500
@@ -258,33 +359,7 @@ def complete_quiz():
         if not course_exists(cur, course_id):
             return jsonify({"success": False, "message": "Course not found."}), 404
 
-        cur.execute(
-            """
-            INSERT INTO user_quizzes (user_email, course_id, lesson_number, xp_awarded)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (user_email, course_id, lesson_number) DO NOTHING
-            """,
-            (email, course_id, lesson_number, xp_award),
-        )
-        first_time = cur.rowcount == 1
-
-        if first_time:
-            recalculate_course_progress(cur, email, course_id)
-
-        conn.commit()
-
-        xp_added = 0
-        if first_time:
-            xp_added, _ = add_xp_to_user(email, xp_award, action="Quiz Completed")
-
-        new_achievements, achievement_xp = check_achievements(email, "quiz_complete")
-        return jsonify({
-            "success": True,
-            "xp_added": xp_added,
-            "already_completed": not first_time,
-            "newly_unlocked": new_achievements,
-            "achievement_xp_added": achievement_xp,
-        })
+        return jsonify(complete_activity(conn, cur, "quiz", email, course_id, lesson_number, xp_award))
     except Exception as e:
         print("Complete quiz error:", e)
         return jsonify({"success": False, "message": "Could not complete quiz."}), 500
@@ -311,36 +386,37 @@ def complete_challenge():
         if not course_exists(cur, course_id):
             return jsonify({"success": False, "message": "Course not found."}), 404
 
-        cur.execute(
-            """
-            INSERT INTO user_challenges (user_email, course_id, lesson_number, xp_awarded)
-            VALUES (%s, %s, %s, %s)
-            ON CONFLICT (user_email, course_id, lesson_number) DO NOTHING
-            """,
-            (email, course_id, lesson_number, xp_award),
-        )
-        first_time = cur.rowcount == 1
+        return jsonify(complete_activity(conn, cur, "challenge", email, course_id, lesson_number, xp_award))
+    except Exception as e:
+        print("Complete challenge error:", e)
+        return jsonify({"success": False, "message": "Could not complete challenge."}), 500
+    finally:
+        cur.close()
+        conn.close()
 
-        if first_time:
-            recalculate_course_progress(cur, email, course_id)
 
-        conn.commit()
+@courses.post("/progress/batch")
+def progress_batch():
+    # Save many lesson, quiz and challenge completions in one request.
+    data = request.get_json(silent=True) or {}
+    email = email_from(data.get("email"))
+    items = data.get("completions")
+    if not email or not isinstance(items, list) or not items:
+        return jsonify({"success": False, "message": "Email and a list of completions required."}), 400
+    if len(items) > max_batch_size():
+        return jsonify({"success": False, "message": f"At most {max_batch_size()} completions per request."}), 413
 
-        xp_added = 0
-        if first_time:
-            xp_added, _ = add_xp_to_user(email, xp_award, action="Challenge Completed")
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        completions, problem = batch_completions(cur, items)
+        if problem:
+            return jsonify({"success": False, "message": problem}), 400
 
-        new_achievements, achievement_xp = check_achievements(email, "challenge_complete")
-        return jsonify({
-            "success": True,
-            "xp_added": xp_added,
-            "already_completed": not first_time,
-            "newly_unlocked": new_achievements,
-            "achievement_xp_added": achievement_xp,
-        })
+        return jsonify(complete_activities(conn, cur, email, completions))
     except Exception as e:
-        print("Complete challenge error:", e)
-        return jsonify({"success": False, "message": "Could not complete challenge."}), 500
+        print("Progress batch error:", e)
+        return jsonify({"success": False, "message": "Could not save progress."}), 500
     finally:
         cur.close()
         conn.close()
@@ -357,6 +433,15 @@ def user_course_status():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
+        # Any completion bumps the user's progress_version, so an unchanged
+        # version means the browser's copy is still right.
+        version, updated_at = load_progress_version(cur, email)
+        etag = make_etag("course-status", course_id, version)
+        if version is not None:
+            cached = not_modified(etag, PRIVATE_CACHE_CONTROL, updated_at)
+            if cached:
+                return cached
+
         # Load lessons, quizzes, and challenges in one query.
         cur.execute(
             """
@@ -379,7 +464,10 @@ def user_course_status():
             else:
                 challenges.append(n)
 
-        return jsonify({"success": True, "lessons": lessons, "quizzes": quizzes, "challenges": challenges})
+        response = jsonify({"success": True, "lessons": lessons, "quizzes": quizzes, "challenges": challenges})
+        if version is None:
+            return response
+        return add_cache_headers(response, etag, PRIVATE_CACHE_CONTROL, updated_at)
     except Exception as e:
         print("User course status error:", e)
         return jsonify({"success": False, "message": "Could not load course status."}), 500
@@ -398,28 +486,7 @@ def user_progress_summary():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute(
-            """
-            SELECT
-                (SELECT COUNT(*) FROM user_lessons WHERE user_email = %s),
-                (SELECT COUNT(*) FROM user_quizzes WHERE user_email = %s),
-                (SELECT COUNT(*) FROM user_challenges WHERE user_email = %s),
-                (SELECT COUNT(*) FROM user_courses WHERE user_email = %s AND completed = TRUE),
-                (SELECT COUNT(*) FROM user_courses WHERE user_email = %s AND completed = FALSE AND progress > 0),
-                (SELECT COUNT(*) FROM courses WHERE is_active = TRUE)
-            """,
-            (email, email, email, email, email),
-        )
-        row = cur.fetchone()
-        return jsonify({
-            "success": True,
-            "lessons_done":    to_int(row[0]),
-            "quizzes_done":    to_int(row[1]),
-            "challenges_done": to_int(row[2]),
-            "courses_done":    to_int(row[3]),
-            "in_progress":     to_int(row[4]),
-            "total_courses":   to_int(row[5]),
-        })
+        return jsonify(progress_summary_payload(cur, email))
     except Exception as e:
         print("User progress summary error:", e)
         return jsonify({"success": False, "message": "Could not load progress summary."}), 500
@@ -0,0 +1,82 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+daily_activity.py - Daily Activity Rows
+---
+This file reads and backfills user_daily_activity, the one row per
+user per day behind the account heatmap.
+
+New activity is added by database triggers in netology_schema.sql
+as lessons, quizzes, challenges, XP, logins and saved topologies
+are written. backfill_daily_activity() adds up the history that
+was written before those triggers existed. It keeps the larger of
+the stored and counted numbers, so running it again (or after the
+triggers have already counted a day) never counts anything twice.
+"""
+
+from db import to_int
+
+# Columns returned for each day, in order.
+ACTIVITY_COLUMNS = ("xp_earned", "lessons_completed", "quizzes_completed", "challenges_completed",
+                    "login_count", "sandbox_topologies_created")
+
+# Every source row as (user, day, amount per column).
+SOURCE_ROWS_SQL = """
+    SELECT user_email, created_at::date AS day, xp_awarded AS xp, 0 AS lessons, 0 AS quizzes,
+           0 AS challenges, 0 AS logins, 0 AS topologies FROM xp_log
+    UNION ALL SELECT user_email, completed_at::date, 0, 1, 0, 0, 0, 0 FROM user_lessons
+    UNION ALL SELECT user_email, completed_at::date, 0, 0, 1, 0, 0, 0 FROM user_quizzes
+    UNION ALL SELECT user_email, completed_at::date, 0, 0, 0, 1, 0, 0 FROM user_challenges
+    UNION ALL SELECT user_email, login_date,         0, 0, 0, 0, 1, 0 FROM user_logins
+    UNION ALL SELECT user_email, created_at::date,   0, 0, 0, 0, 0, 1 FROM saved_topologies
+"""
+
+
+def backfill_daily_activity(cur, email=None):
+    # Add up the source tables into user_daily_activity for one user or everyone.
+    # Returns how many day rows were written.
+    where = "AND user_email = %s" if email else ""
+    updates = ", ".join(f"{column} = GREATEST(d.{column}, EXCLUDED.{column})" for column in ACTIVITY_COLUMNS)
+    cur.execute(
+        f"""
+        INSERT INTO user_daily_activity AS d (user_email, activity_date, {', '.join(ACTIVITY_COLUMNS)})
+        SELECT user_email, day, COALESCE(SUM(xp), 0), SUM(lessons), SUM(quizzes),
+               SUM(challenges), SUM(logins), SUM(topologies)
+        FROM ({SOURCE_ROWS_SQL}) src
+        WHERE user_email IS NOT NULL AND day IS NOT NULL {where}
+        GROUP BY user_email, day
+        ON CONFLICT (user_email, activity_date) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP
+        """,
+        (email,) if email else None,
+    )
+    return cur.rowcount
+
+
+def load_daily_activity(cur, email, days):
+    # Return the user's activity for the last `days` days, oldest first.
+    cur.execute(
+        f"""
+        SELECT activity_date, {', '.join(ACTIVITY_COLUMNS)}
+        FROM user_daily_activity
+        WHERE user_email = %s AND activity_date >= CURRENT_DATE - (%s::int - 1)
+        ORDER BY activity_date
+        """,
+        (email, days),
+    )
+    activity = []
+    for row in cur.fetchall():
+        xp, lessons, quizzes, challenges, logins, topologies = (to_int(value) for value in row[1:])
+        activity.append({
+            "date": str(row[0]),
+            "xp": xp,
+            "lessons": lessons,
+            "quizzes": quizzes,
+            "challenges": challenges,
+            "logins": logins,
+            "topologies": topologies,
+            "count": lessons + quizzes + challenges + logins,
+        })
+    return activity
@@ -7,15 +7,33 @@ Date: 16/04/2026
 db.py - Database Helpers
 ---
 This file contains the shared database helper functions used
-across the Netology backend. It opens PostgreSQL connections
+across the Netology backend. It hands out PostgreSQL connections
 and also includes a couple of small utility helpers for
 cleaning emails and safely converting values to integers.
 
+Connections come from a small pool that each worker process
+creates the first time it needs the database. Calling close()
+on a pooled connection hands it back to the pool instead of
+closing it, so the route files do not need to change.
+
+Every connection uses the timed cursor from query_log.py, so each
+request's query count and database time can be reported
+(QUERY_STATS=0 turns this off).
+
 These helpers are reused by most backend route files.
 """
 
 import os
+import threading
+
 import psycopg
+from psycopg.pq import TransactionStatus
+from psycopg_pool import ConnectionPool
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
 
 def connection_dsn():
     # Build the PostgreSQL connection string from environment variables.
@@ -29,9 +47,164 @@ def connection_dsn():
     )
 
 
+def env_int(name, default):
+    # Read a whole number setting from the environment.
+    return to_int(os.getenv(name), default)
+
+
+def env_flag(name, default=True):
+    # Read an on/off setting from the environment.
+    raw = (os.getenv(name) or "").strip().lower()
+    if not raw:
+        return default
+    return raw not in ("0", "false", "no", "off")
+
+
+def reset_connection(conn):
+    # Put a returned connection back to the normal transaction mode.
+    conn.autocommit = False
+
+
+def cursor_factory():
+    # Return the cursor class for new connections.
+    # Imported here because query_log itself imports this module.
+    if not env_flag("QUERY_STATS"):
+        return psycopg.Cursor
+    from query_log import InstrumentedCursor
+    return InstrumentedCursor
+
+
+def configure_connection(conn):
+    # Set up each new pooled connection.
+    conn.cursor_factory = cursor_factory()
+
+
+def get_pool():
+    # Return this process's connection pool, creating it on first use.
+    # Gunicorn forks workers from the master, so a pool copied from the
+    # parent process is never reused. Each worker builds its own.
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = ConnectionPool(
+                connection_dsn(),
+                min_size=max(0, env_int("DB_POOL_MIN", 1)),
+                max_size=max(1, env_int("DB_POOL_MAX", 10)),
+                max_idle=max(1, env_int("DB_POOL_MAX_IDLE", 300)),
+                timeout=max(1, env_int("DB_POOL_TIMEOUT", 30)),
+                check=ConnectionPool.check_connection,
+                configure=configure_connection,
+                reset=reset_connection,
+                name=f"netology-{pid}",
+                open=True,
+            )
+            _pool_pid = pid
+    return _pool
+
+
+def reset_pool():
+    # Forget a pool inherited from a parent process without closing its sockets.
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool_pid != os.getpid():
+            _pool = None
+            _pool_pid = None
+
+
+def close_pool():
+    # Close this process's pool, for example when a worker exits.
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.close()
+        _pool = None
+        _pool_pid = None
+
+
+class PooledConnection:
+    # Wrap a pooled connection so close() returns it to the pool.
+    # Everything else (cursor, commit, execute, autocommit) goes
+    # straight through to the real psycopg connection.
+
+    def __init__(self, pool, conn):
+        object.__setattr__(self, "_pool", pool)
+        object.__setattr__(self, "_conn", conn)
+
+    def __getattr__(self, name):
+        return getattr(self.connection(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.connection(), name, value)
+
+    def connection(self):
+        # Return the real connection, or fail if it was already handed back.
+        if self._conn is None:
+            raise psycopg.OperationalError("the connection is closed")
+        return self._conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._conn is not None:
+            if exc_type is None:
+                self._conn.commit()
+            else:
+                self._conn.rollback()
+        self.close()
+
+    @property
+    def closed(self):
+        return self._conn is None or self._conn.closed
+
+    def close(self):
+        # Hand the connection back, dropping any work that was not committed.
+        conn = self._conn
+        if conn is None:
+            return
+        object.__setattr__(self, "_conn", None)
+        try:
+            if conn.info.transaction_status in (TransactionStatus.INTRANS, TransactionStatus.INERROR):
+                conn.rollback()
+        except psycopg.Error:
+            pass
+        self._pool.putconn(conn)
+
+
 def get_db_connection():
-    # Open a new PostgreSQL connection for the app.
-    return psycopg.connect(connection_dsn())
+    # Borrow a PostgreSQL connection for the app.
+    # Set DB_POOL_ENABLED=0 to go back to one new connection per call.
+    if not env_flag("DB_POOL_ENABLED"):
+        return psycopg.connect(connection_dsn(), cursor_factory=cursor_factory())
+    pool = get_pool()
+    return PooledConnection(pool, pool.getconn())
+
+
+def pool_stats():
+    # Return pool counters so the pool can be sized under load.
+    pool = _pool if _pool_pid == os.getpid() else None
+    if pool is None:
+        return {"enabled": env_flag("DB_POOL_ENABLED"), "open": False}
+
+    stats = pool.get_stats()
+    return {
+        "enabled": True,
+        "open": True,
+        "min_size": pool.min_size,
+        "max_size": pool.max_size,
+        "size": stats.get("pool_size", 0),
+        "available": stats.get("pool_available", 0),
+        "waiting": stats.get("requests_waiting", 0),
+        "checkouts": stats.get("requests_num", 0),
+        "wait_ms": stats.get("requests_wait_ms", 0),
+        "exhausted": stats.get("requests_queued", 0),
+        "timeouts": stats.get("requests_errors", 0),
+        "connections_lost": stats.get("connections_lost", 0),
+    }
 
 
 def to_int(value, default=0):
@@ -8,20 +8,122 @@ gunicorn.conf.py - Gunicorn Deployment Config
 ---
 This file contains the Gunicorn settings used when the Netology
 backend is deployed. It tells Gunicorn which port to bind to,
-how many worker processes to run, and how long to wait before
-timing out a request.
+how many worker processes (and threads) to run, and how long to
+wait before timing out a request.
+
+GUNICORN_MODE picks how requests are served:
+  gthread (default) - a few processes, each with a pool of threads,
+                      so a request waiting on the database does not
+                      hold up the rest.
+  sync              - one request at a time per process, as before.
+Worker and thread counts are worked out from the CPU count and can
+be set directly with WEB_CONCURRENCY and GUNICORN_THREADS.
+
+When Gunicorn is ready it creates any missing xp_log month
+partitions and adds the default challenges if the table is empty,
+so requests never have to write while loading the catalog.
+
+It also makes sure each worker builds its own database pool
+after the fork, and closes that pool (and its password hashing
+processes) when the worker exits.
+Each worker also starts the thread that clears its catalog cache
+when a catalog table changes, and with
+ACHIEVEMENTS_WORKER=thread its background achievement job threads.
+
+Every worker writes its Prometheus metrics to files in
+PROMETHEUS_MULTIPROC_DIR so /metrics can add up all of them. The
+folder is emptied when Gunicorn starts, and a worker's live gauges
+are dropped when it exits.
 
 It is used for the live backend deployment rather than the
 frontend pages themselves.
 """
 
+import multiprocessing
 import os
+from pathlib import Path
+import tempfile
+
+from db import env_int
 
 # Bind Gunicorn to the port provided by the hosting platform.
 bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
 
-# Run two worker processes for the Flask app.
-workers = 2
+CPU_COUNT = multiprocessing.cpu_count()
+
+# Small instances report the host's CPUs, so the process count is capped.
+MAX_WORKERS = max(1, env_int("GUNICORN_MAX_WORKERS", 4))
+
+mode = (os.environ.get("GUNICORN_MODE") or "gthread").strip().lower()
+
+if mode == "sync":
+    # One request per process, so use the usual 2 x CPUs + 1 processes.
+    worker_class = "sync"
+    workers = env_int("WEB_CONCURRENCY", min(CPU_COUNT * 2 + 1, MAX_WORKERS))
+    threads = 1
+else:
+    # Requests mostly wait on PostgreSQL, so a few threads per CPU keep it busy.
+    worker_class = "gthread"
+    workers = env_int("WEB_CONCURRENCY", min(max(2, CPU_COUNT), MAX_WORKERS))
+    threads = env_int("GUNICORN_THREADS", min(CPU_COUNT * 4, 32))
+
+# Every thread may need a database connection at once, plus a couple
+# for the background threads, so size the pool to match.
+os.environ.setdefault("DB_POOL_MAX", str(threads + 2))
+
+# prometheus_client reads this when it is first imported, so it is set
+# here before the app (and so the metrics module) is loaded.
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "netology-metrics"))
+
+# Keep idle browser connections open briefly so threads can reuse them.
+keepalive = 5
 
 # Allow longer requests before Gunicorn stops waiting.
-timeout = 120
+timeout = env_int("GUNICORN_TIMEOUT", 120)
+
+
+def on_starting(server):
+    # Start with an empty metrics folder so counts from an earlier run are not added in.
+    folder = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    folder.mkdir(parents=True, exist_ok=True)
+    for file in folder.glob("*.db"):
+        file.unlink()
+
+
+def when_ready(server):
+    # Make sure the coming months have xp_log partitions. A deploy every
+    # few months keeps them ahead; manage.py maintain-xp-log does the rest.
+    import xp_log_partitions
+    xp_log_partitions.ensure_partitions_now()
+
+    import user_routes
+    user_routes.seed_challenges_now()
+
+
+def post_fork(server, worker):
+    # Drop any database pool copied from the master so the worker opens its own.
+    import db
+    db.reset_pool()
+
+    # Threads do not survive a fork, so the catalog listener and
+    # queue workers start here.
+    import catalog_cache
+    catalog_cache.start_listener()
+
+    import achievement_queue
+    achievement_queue.start_in_process_worker()
+
+
+def worker_exit(server, worker):
+    # Close the worker's database connections and hashing processes when it shuts down.
+    import db
+    db.close_pool()
+
+    import password_hashing
+    password_hashing.shutdown()
+
+
+def child_exit(server, worker):
+    # Runs in the master, so it still works when a worker is killed.
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
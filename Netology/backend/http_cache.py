@@ -0,0 +1,79 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+http_cache.py - Conditional GET Helpers
+---
+This file adds ETag, Last-Modified and Cache-Control headers to
+read-only routes, and answers repeat requests with 304 Not Modified
+when the browser already has the current copy.
+
+The ETag is built from a version the route already knows, such as
+the catalog cache version or the user's progress_version counter in
+user_stats, so a 304 can be sent before the rest of the page data
+is loaded or turned into JSON.
+
+If-None-Match is always used when the browser sends it. Dates are
+only a fallback, and HTTP dates are whole seconds, so Last-Modified
+is rounded up from the real change time and is left off while that
+second is still running (another write in it would go unnoticed).
+"""
+
+from datetime import datetime, timedelta
+import hashlib
+
+from flask import Response, request
+
+# Catalog data only changes on deploy, so browsers may reuse it briefly.
+CATALOG_CACHE_CONTROL = "public, max-age=60"
+
+# Per-user data must be checked every time, but a 304 is cheap.
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts):
+    # Build a strong ETag value from the versions a response depends on.
+    return hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def http_last_modified(last_modified):
+    # Round a change time up to a whole second, so the HTTP date sent is
+    # never earlier than the change. Returns None while that second has
+    # not finished yet, as a write later in it would get the same date.
+    if last_modified is None:
+        return None
+    if last_modified.microsecond:
+        last_modified = last_modified.replace(microsecond=0) + timedelta(seconds=1)
+    if last_modified > datetime.now(last_modified.tzinfo):
+        return None
+    return last_modified
+
+
+def is_not_modified(etag, last_modified=None):
+    # Check the request's If-None-Match header, or If-Modified-Since
+    # only when there is no If-None-Match.
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    last_modified = http_last_modified(last_modified)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def add_cache_headers(response, etag, cache_control, last_modified=None):
+    # Set the validator and caching headers on a response.
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    last_modified = http_last_modified(last_modified)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    return response
+
+
+def not_modified(etag, cache_control, last_modified=None):
+    # Return a 304 response when the browser's copy is current, otherwise None.
+    if not is_not_modified(etag, last_modified):
+        return None
+    return add_cache_headers(Response(status=304), etag, cache_control, last_modified)
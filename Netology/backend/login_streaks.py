@@ -0,0 +1,110 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+login_streaks.py - Login Streaks
+---
+This file reads the login streaks kept in user_stats.
+
+A streak is a run of days in a row in user_logins. The database
+finds the runs with a gaps-and-islands query (the login_streak_runs
+and login_streaks views in netology_schema.sql), and triggers on
+user_logins save each user's latest run, longest run and last login
+day, so checking a streak is one primary key lookup.
+
+The latest run only counts as the current streak while it reaches
+today. manage.py rebuild-stats and verify-stats cover these columns
+along with the other counters.
+"""
+
+from db import to_int
+
+# How many past streaks /api/user/streaks lists by default.
+STREAK_HISTORY_LIMIT = 10
+
+# The streak columns in user_stats.
+STREAK_COLUMNS = ("current_streak", "longest_streak", "last_login_date")
+
+# Work the streaks out from user_logins. {where} filters user_stats.
+REBUILD_SQL = """
+    UPDATE user_stats s SET (current_streak, longest_streak, last_login_date, updated_at) = (
+        SELECT COALESCE(MAX(r.current_streak), 0), COALESCE(MAX(r.longest_streak), 0),
+               MAX(r.last_login_date), CURRENT_TIMESTAMP
+        FROM login_streaks r WHERE r.user_email = s.user_email
+    )
+    WHERE {where}
+"""
+
+
+def empty_streak():
+    # Return the streak of a user who has never logged in.
+    return {"current_streak": 0, "longest_streak": 0, "last_login_date": None}
+
+
+def load_login_streak(cur, email):
+    # Load one user's current and longest streak with a primary key lookup.
+    cur.execute(
+        """
+        SELECT CASE WHEN last_login_date = CURRENT_DATE THEN current_streak ELSE 0 END,
+               longest_streak, last_login_date
+        FROM user_stats WHERE user_email = %s
+        """,
+        (email,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return empty_streak()
+    return {"current_streak": to_int(row[0]), "longest_streak": to_int(row[1]), "last_login_date": row[2]}
+
+
+def load_streak_history(cur, email, limit=STREAK_HISTORY_LIMIT):
+    # Return the user's longest streaks, longest (then latest) first.
+    cur.execute(
+        """
+        SELECT first_day, last_day, days FROM login_streak_runs
+        WHERE user_email = %s
+        ORDER BY days DESC, last_day DESC
+        LIMIT %s
+        """,
+        (email, limit),
+    )
+    return [
+        {"start": row[0].isoformat(), "end": row[1].isoformat(), "days": to_int(row[2])}
+        for row in cur.fetchall()
+    ]
+
+
+def rebuild_login_streaks(cur, email=None):
+    # Work the streak columns out again for one user or everyone.
+    # Returns how many rows were written.
+    where = "s.user_email = %s" if email else "TRUE"
+    cur.execute(REBUILD_SQL.format(where=where), (email,) if email else None)
+    return cur.rowcount
+
+
+def verify_login_streaks(cur, email=None):
+    # Compare the stored streaks with user_logins.
+    # Returns one (email, column, stored, actual) tuple per difference.
+    where = "s.user_email = %s" if email else "TRUE"
+    cur.execute(
+        f"""
+        SELECT s.user_email, s.current_streak, s.longest_streak, s.last_login_date,
+               COALESCE(r.current_streak, 0), COALESCE(r.longest_streak, 0), r.last_login_date
+        FROM user_stats s
+        LEFT JOIN login_streaks r ON r.user_email = s.user_email
+        WHERE {where}
+        ORDER BY s.user_email
+        """,
+        (email,) if email else None,
+    )
+    drift = []
+    size = len(STREAK_COLUMNS)
+    for row in cur.fetchall():
+        stored = row[1:1 + size]
+        actual = row[1 + size:]
+        for column, have, want in zip(STREAK_COLUMNS, stored, actual):
+            if have != want:
+                drift.append((row[0], column, have, want))
+    return drift
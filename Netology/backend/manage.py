@@ -0,0 +1,172 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+manage.py - Maintenance Commands
+---
+This file holds the small command line jobs used to look after
+the Netology database. They are run by hand from the backend
+folder, for example after a deploy or when something looks off.
+
+Commands:
+  python manage.py rebuild-stats [--email EMAIL]
+  python manage.py verify-stats [--email EMAIL]
+  python manage.py reload-catalog [--name courses|achievements|challenges]
+  python manage.py maintain-xp-log [--keep-months N] [--drop]
+  python manage.py backfill-activity [--email EMAIL]
+  python manage.py recalc-progress [--email EMAIL] [--course-id ID]
+"""
+
+import argparse
+import sys
+
+from dotenv import load_dotenv
+
+from catalog_cache import notify_catalog_changed
+from course_progress import recalculate_progress
+from daily_activity import backfill_daily_activity
+from db import email_from, get_db_connection
+from login_streaks import rebuild_login_streaks, verify_login_streaks
+from user_stats import rebuild_user_stats, verify_user_stats
+from xp_log_partitions import ensure_partitions, old_partitions, retire_partition
+
+
+def rebuild_stats(args):
+    # Recount user_stats (and the login streaks) from the source tables.
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        email = email_from(args.email) or None
+        written = rebuild_user_stats(cur, email)
+        rebuild_login_streaks(cur, email)
+        conn.commit()
+        print(f"Rebuilt stats for {written} user(s).")
+        return 0
+    finally:
+        cur.close()
+        conn.close()
+
+
+def verify_stats(args):
+    # Report any counters that no longer match the source tables.
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        email = email_from(args.email) or None
+        drift = verify_user_stats(cur, email) + verify_login_streaks(cur, email)
+        for email, column, stored, actual in drift:
+            print(f"{email}: {column} stored={stored} actual={actual}")
+        print(f"{len(drift)} difference(s) found.")
+        return 1 if drift else 0
+    finally:
+        cur.close()
+        conn.close()
+
+
+def reload_catalog(args):
+    # Ask every running worker to reload its cached catalogs.
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        notify_catalog_changed(cur, args.name or "")
+        conn.commit()
+        print(f"Sent reload for {args.name or 'all catalogs'}.")
+        return 0
+    finally:
+        cur.close()
+        conn.close()
+
+
+def maintain_xp_log(args):
+    # Create upcoming xp_log months, then roll up and detach the old ones.
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        created = ensure_partitions(cur, args.months_ahead)
+        conn.commit()
+        print(f"Created {created} new partition(s).")
+
+        for name in old_partitions(cur, args.keep_months):
+            days = retire_partition(cur, name, args.drop)
+            conn.commit()
+            print(f"{name}: rolled up {days} day row(s), {'dropped' if args.drop else 'detached'}.")
+        return 0
+    finally:
+        cur.close()
+        conn.close()
+
+
+def backfill_activity(args):
+    # Fill in user_daily_activity from the source tables.
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        written = backfill_daily_activity(cur, email_from(args.email) or None)
+        conn.commit()
+        print(f"Backfilled {written} day row(s).")
+        return 0
+    finally:
+        cur.close()
+        conn.close()
+
+
+def recalc_progress(args):
+    # Recount course progress, e.g. after a course's lesson or module count changed.
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        course_ids = [args.course_id] if args.course_id else None
+        written = recalculate_progress(cur, email_from(args.email) or None, course_ids, exact=True)
+        conn.commit()
+        print(f"Updated progress on {written} course row(s).")
+        return 0
+    finally:
+        cur.close()
+        conn.close()
+
+
+def build_parser():
+    # Set up the command line options for each maintenance job.
+    parser = argparse.ArgumentParser(description="Netology maintenance commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-stats", help="recount user_stats from the source tables")
+    rebuild.add_argument("--email", help="only rebuild this user")
+    rebuild.set_defaults(run=rebuild_stats)
+
+    verify = commands.add_parser("verify-stats", help="check user_stats against the source tables")
+    verify.add_argument("--email", help="only check this user")
+    verify.set_defaults(run=verify_stats)
+
+    reload = commands.add_parser("reload-catalog", help="tell running workers to reload cached catalogs")
+    reload.add_argument("--name", choices=["courses", "achievements", "challenges"], help="only reload this catalog")
+    reload.set_defaults(run=reload_catalog)
+
+    xp_log = commands.add_parser("maintain-xp-log", help="add upcoming xp_log partitions and retire old ones")
+    xp_log.add_argument("--months-ahead", type=int, default=3, help="months of partitions to create ahead")
+    xp_log.add_argument("--keep-months", type=int, help="months of xp_log to keep (default XP_LOG_RETENTION_MONTHS or 12)")
+    xp_log.add_argument("--drop", action="store_true", help="drop old partitions instead of detaching them")
+    xp_log.set_defaults(run=maintain_xp_log)
+
+    activity = commands.add_parser("backfill-activity", help="fill in user_daily_activity from the source tables")
+    activity.add_argument("--email", help="only backfill this user")
+    activity.set_defaults(run=backfill_activity)
+
+    progress = commands.add_parser("recalc-progress", help="recount user_courses progress from the completions")
+    progress.add_argument("--email", help="only recount this user")
+    progress.add_argument("--course-id", type=int, help="only recount this course")
+    progress.set_defaults(run=recalc_progress)
+
+    return parser
+
+
+def main(argv=None):
+    load_dotenv()
+    args = build_parser().parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
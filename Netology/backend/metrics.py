@@ -0,0 +1,157 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+metrics.py - Prometheus Metrics
+---
+This file keeps the counters served on /metrics in the Prometheus
+text format, so request latency can be graphed and alerted on.
+
+It records:
+  - requests and their latency for each route (endpoint and status)
+  - SQL statements and database time for each route
+  - the database pool's size, free connections and waiting threads
+  - achievement unlocks for each badge
+  - XP awarded for each xp_log category
+  - catalog cache hits and misses (the hit ratio is worked out in
+    Prometheus from these two)
+
+Gunicorn runs several worker processes, so each one writes its
+numbers to files in PROMETHEUS_MULTIPROC_DIR (set up by
+gunicorn.conf.py) and /metrics adds them all up, whichever worker
+answers. Without that folder the numbers cover this process only.
+
+Unlocks and XP are counted when they are written, so a request that
+fails and rolls back afterwards can be counted once too often.
+"""
+
+import os
+import time
+
+from flask import Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+
+from db import pool_stats
+from query_log import current_stats
+
+# Latency buckets in seconds, from a cached catalog read up to a slow login.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter(
+    "netology_http_requests_total", "HTTP requests handled.",
+    ["method", "endpoint", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "netology_http_request_duration_seconds", "Time taken to answer a request.",
+    ["method", "endpoint"], buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter(
+    "netology_db_queries_total", "SQL statements run while handling requests.",
+    ["endpoint"],
+)
+DB_SECONDS = Counter(
+    "netology_db_seconds_total", "Time spent waiting on PostgreSQL while handling requests.",
+    ["endpoint"],
+)
+
+# The pool gauges are per worker, so live workers are added together.
+POOL_SIZE = Gauge("netology_db_pool_size", "Open database connections.", multiprocess_mode="livesum")
+POOL_AVAILABLE = Gauge("netology_db_pool_available", "Idle database connections.", multiprocess_mode="livesum")
+POOL_WAITING = Gauge("netology_db_pool_waiting", "Threads waiting for a connection.", multiprocess_mode="livesum")
+POOL_MAX = Gauge("netology_db_pool_max_size", "Largest size the pools may grow to.", multiprocess_mode="livesum")
+
+ACHIEVEMENT_UNLOCKS = Counter(
+    "netology_achievement_unlocks_total", "Achievements unlocked.",
+    ["achievement"],
+)
+XP_AWARDED = Counter(
+    "netology_xp_awarded_total", "XP awarded.",
+    ["category"],
+)
+CACHE_REQUESTS = Counter(
+    "netology_catalog_cache_requests_total", "Catalog cache reads.",
+    ["cache", "result"],
+)
+
+
+def multiprocess_dir():
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.environ.get("prometheus_multiproc_dir")
+
+
+def record_xp(awards):
+    # Count XP awards given as (category name, amount) pairs. The names
+    # come from the fixed xp_log categories, so the series stay few.
+    for category, amount in awards:
+        if amount > 0:
+            XP_AWARDED.labels(category).inc(amount)
+
+
+def record_unlocks(achievement_ids):
+    for achievement_id in achievement_ids:
+        ACHIEVEMENT_UNLOCKS.labels(achievement_id).inc()
+
+
+def record_cache(name, hit):
+    CACHE_REQUESTS.labels(name, "hit" if hit else "miss").inc()
+
+
+def record_pool():
+    # Copy this worker's pool numbers into the gauges.
+    stats = pool_stats()
+    POOL_SIZE.set(stats.get("size", 0))
+    POOL_AVAILABLE.set(stats.get("available", 0))
+    POOL_WAITING.set(stats.get("waiting", 0))
+    POOL_MAX.set(stats.get("max_size", 0))
+
+
+def begin_request():
+    g.metrics_started = time.perf_counter()
+
+
+def finish_request(response):
+    # Count the request, its latency and its database work.
+    started = g.get("metrics_started")
+    if started is None:
+        return response
+
+    # Unmatched URLs share one label so 404 scans do not add series.
+    endpoint = request.endpoint or "unmatched"
+    REQUESTS.labels(request.method, endpoint, str(response.status_code)).inc()
+    REQUEST_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - started)
+
+    stats = current_stats()
+    if stats is not None and stats.count:
+        DB_QUERIES.labels(endpoint).inc(stats.count)
+        DB_SECONDS.labels(endpoint).inc(stats.total_ms / 1000)
+
+    record_pool()
+    return response
+
+
+def render():
+    # Return every metric in the Prometheus text format.
+    if multiprocess_dir():
+        # Gather the files written by every worker.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_app(app):
+    # Record every request and serve the numbers on /metrics.
+    app.before_request(begin_request)
+    app.after_request(finish_request)
+    app.add_url_rule("/metrics", "metrics", render, methods=["GET"])
@@ -173,16 +173,185 @@ ALTER TABLE user_challenges ADD COLUMN IF NOT EXISTS xp_awarded INTEGER DEFAULT
 
 
 -- XP LOG
--- Audit trail of every XP award.
+-- Audit trail of every XP award, split into one partition per month
+-- (xp_log_2026_04 and so on) so date range reads only open the months
+-- they need. xp_log_default catches rows for months without a partition.
+-- Upcoming months are created by xp_log_ensure_partitions(), and old
+-- months are rolled up into user_daily_activity and detached with:
+--   python manage.py maintain-xp-log
+--
+-- category says what kind of award a row is (the numbers match
+-- xp_system.py): 0 other, 1 lesson, 2 quiz, 3 challenge, 4 achievement,
+-- 5 one-off award from /award-xp. action_key says which one: "course:lesson"
+-- for completions, the achievement id, or the /award-xp action.
+
+-- Databases made before partitioning have a plain xp_log table. Move it
+-- aside here; its rows are copied into the partitions further down.
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass('xp_log') AND relkind = 'r') THEN
+        ALTER TABLE xp_log RENAME TO xp_log_unpartitioned;
+        ALTER INDEX IF EXISTS xp_log_pkey RENAME TO xp_log_unpartitioned_pkey;
+        ALTER SEQUENCE IF EXISTS xp_log_id_seq RENAME TO xp_log_unpartitioned_id_seq;
+        IF EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'xp_log_user_email_fkey') THEN
+            ALTER TABLE xp_log_unpartitioned
+                RENAME CONSTRAINT xp_log_user_email_fkey TO xp_log_unpartitioned_user_email_fkey;
+        END IF;
+        DROP INDEX IF EXISTS xp_log_user_action_idx;
+        DROP INDEX IF EXISTS xp_log_user_created_idx;
+    END IF;
+END;
+$$;
 
 CREATE TABLE IF NOT EXISTS xp_log (
-    id          SERIAL PRIMARY KEY,
+    id          BIGSERIAL,
     user_email  VARCHAR(255) REFERENCES users(email) ON DELETE CASCADE,
     action      VARCHAR(255),
     xp_awarded  INTEGER,
-    created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at  TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    category    SMALLINT NOT NULL DEFAULT 0,
+    action_key  VARCHAR(255),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE IF NOT EXISTS xp_log_default PARTITION OF xp_log DEFAULT;
+
+-- Create the partition for the month holding month_start, if it is missing.
+-- Rows for that month already in xp_log_default are moved into it first,
+-- because a partition cannot be attached while the default holds its rows.
+CREATE OR REPLACE FUNCTION xp_log_create_partition(month_start DATE) RETURNS BOOLEAN AS $$
+DECLARE
+    first_day DATE := date_trunc('month', month_start)::date;
+    next_day  DATE := (date_trunc('month', month_start) + INTERVAL '1 month')::date;
+    part_name TEXT := 'xp_log_' || to_char(month_start, 'YYYY_MM');
+BEGIN
+    IF to_regclass(part_name) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+    EXECUTE format('CREATE TABLE %I (LIKE xp_log INCLUDING DEFAULTS)', part_name);
+    EXECUTE format(
+        'WITH moved AS (DELETE FROM xp_log_default WHERE created_at >= %L AND created_at < %L RETURNING *)
+         INSERT INTO %I SELECT * FROM moved',
+        first_day, next_day, part_name);
+    EXECUTE format('ALTER TABLE xp_log ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+        part_name, first_day, next_day);
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Make sure partitions exist from first_month up to months_ahead months
+-- after the current one. Returns how many were created.
+CREATE OR REPLACE FUNCTION xp_log_ensure_partitions(months_ahead INTEGER DEFAULT 3,
+                                                    first_month DATE DEFAULT CURRENT_DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    created     INTEGER := 0;
+BEGIN
+    FOR month_start IN
+        SELECT generate_series(date_trunc('month', first_month),
+                               date_trunc('month', CURRENT_DATE) + make_interval(months => months_ahead),
+                               INTERVAL '1 month')::date
+    LOOP
+        IF xp_log_create_partition(month_start) THEN
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Work out the category and key of an old row from its action text alone.
+-- Free-text actions could only come from /award-xp.
+CREATE OR REPLACE FUNCTION xp_action_category(action TEXT) RETURNS SMALLINT AS $$
+    SELECT CASE
+        WHEN action = 'Lesson Completed'    THEN 1
+        WHEN action = 'Quiz Completed'      THEN 2
+        WHEN action = 'Challenge Completed' THEN 3
+        WHEN action LIKE 'Achievement:%'    THEN 4
+        WHEN action IS NULL                 THEN 0
+        ELSE 5
+    END::smallint;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION xp_action_key(action TEXT) RETURNS VARCHAR AS $$
+    SELECT CASE xp_action_category(action)
+        WHEN 4 THEN btrim(substr(action, length('Achievement:') + 1))
+        WHEN 5 THEN action
+    END;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Copy the rows of an old plain xp_log into the partitions, keeping the ids.
+DO $$
+DECLARE
+    oldest DATE;
+BEGIN
+    IF to_regclass('xp_log_unpartitioned') IS NOT NULL THEN
+        SELECT MIN(created_at)::date INTO oldest FROM xp_log_unpartitioned;
+        PERFORM xp_log_ensure_partitions(3, COALESCE(oldest, CURRENT_DATE));
+        INSERT INTO xp_log (id, user_email, action, xp_awarded, created_at, category, action_key)
+        SELECT id, user_email, action, xp_awarded, COALESCE(created_at, CURRENT_TIMESTAMP),
+               xp_action_category(action), xp_action_key(action)
+        FROM xp_log_unpartitioned;
+        PERFORM setval(pg_get_serial_sequence('xp_log', 'id'),
+                       GREATEST((SELECT MAX(id) FROM xp_log_unpartitioned), 1));
+        DROP TABLE xp_log_unpartitioned;
+    END IF;
+END;
+$$;
+
+SELECT xp_log_ensure_partitions(3);
+
+-- Databases made before categories only have the action text. Add the
+-- columns and fill them in from it once. Completions logged before this
+-- have no record of which lesson they were for, so their key stays NULL.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM information_schema.columns
+                   WHERE table_name = 'xp_log' AND column_name = 'category') THEN
+        ALTER TABLE xp_log
+            ADD COLUMN category   SMALLINT NOT NULL DEFAULT 0,
+            ADD COLUMN action_key VARCHAR(255);
+        UPDATE xp_log SET category = xp_action_category(action), action_key = xp_action_key(action)
+        WHERE action IS NOT NULL;
+    END IF;
+END;
+$$;
+
+
+-- ONE-OFF XP AWARDS
+-- Actions awarded through /award-xp, which only pay out once per user.
+-- Kept apart from xp_log so the check still works after old xp_log
+-- months are detached.
+
+CREATE TABLE IF NOT EXISTS user_xp_awards (
+    user_email  VARCHAR(255) NOT NULL REFERENCES users(email) ON DELETE CASCADE,
+    action      VARCHAR(255) NOT NULL,
+    xp_awarded  INTEGER      NOT NULL,
+    awarded_at  TIMESTAMP    DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_email, action)
 );
 
+-- The client's Idempotency-Key for the call that paid out, so a retry
+-- gets the same answer back. Unique per user when it is given.
+ALTER TABLE user_xp_awards ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(255);
+CREATE UNIQUE INDEX IF NOT EXISTS user_xp_awards_idempotency_idx
+    ON user_xp_awards (user_email, idempotency_key) WHERE idempotency_key IS NOT NULL;
+
+-- Fill it once from the awards already in xp_log.
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM user_xp_awards) THEN
+        INSERT INTO user_xp_awards (user_email, action, xp_awarded, awarded_at)
+        SELECT DISTINCT ON (user_email, action) user_email, action, xp_awarded, created_at
+        FROM xp_log
+        WHERE user_email IS NOT NULL AND action IS NOT NULL AND category = 5
+        ORDER BY user_email, action, created_at
+        ON CONFLICT DO NOTHING;
+    END IF;
+END;
+$$;
+
 
 -- LOGIN ACTIVITY
 -- One row per user per calendar day.
@@ -196,7 +365,9 @@ CREATE TABLE IF NOT EXISTS user_logins (
 
 
 -- DAILY ACTIVITY
--- Aggregated daily stats for the account heatmap.
+-- Aggregated daily stats for the account heatmap, one row per user per
+-- day. Kept up to date by the triggers in DAILY ACTIVITY UPKEEP below.
+-- Fill in older history with: python manage.py backfill-activity
 
 CREATE TABLE IF NOT EXISTS user_daily_activity (
     id            SERIAL PRIMARY KEY,
@@ -331,6 +502,9 @@ CREATE TABLE IF NOT EXISTS challenges (
     expires_at      TIMESTAMP
 );
 
+-- Older databases were made before action_target was added.
+ALTER TABLE challenges ADD COLUMN IF NOT EXISTS action_target VARCHAR(255);
+
 CREATE UNIQUE INDEX IF NOT EXISTS challenges_title_challenge_type_key
     ON challenges (title, challenge_type);
 
@@ -345,6 +519,423 @@ CREATE TABLE IF NOT EXISTS user_challenge_progress (
 );
 
 
+-- USER STATS
+-- One row of running counters per user, kept up to date by triggers
+-- so pages can read every count with one primary key lookup.
+-- Rebuild or check it with: python manage.py rebuild-stats / verify-stats
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_email           VARCHAR(255) PRIMARY KEY REFERENCES users(email) ON DELETE CASCADE,
+    logins_total         INTEGER   NOT NULL DEFAULT 0,
+    lessons_completed    INTEGER   NOT NULL DEFAULT 0,
+    quizzes_completed    INTEGER   NOT NULL DEFAULT 0,
+    challenges_completed INTEGER   NOT NULL DEFAULT 0,
+    courses_started      INTEGER   NOT NULL DEFAULT 0,
+    courses_active       INTEGER   NOT NULL DEFAULT 0,
+    courses_in_progress  INTEGER   NOT NULL DEFAULT 0,
+    courses_completed    INTEGER   NOT NULL DEFAULT 0,
+    topologies_saved     INTEGER   NOT NULL DEFAULT 0,
+    lesson_sessions      INTEGER   NOT NULL DEFAULT 0,
+    updated_at           TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create the counter row when a user signs up.
+CREATE OR REPLACE FUNCTION user_stats_user_added() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO user_stats (user_email) VALUES (NEW.email) ON CONFLICT (user_email) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_stats_insert ON users;
+CREATE TRIGGER users_stats_insert AFTER INSERT ON users
+    FOR EACH ROW EXECUTE FUNCTION user_stats_user_added();
+
+-- Add or remove one per row for tables that are simple counts.
+-- TG_ARGV[0] is the user_stats column to change.
+CREATE OR REPLACE FUNCTION user_stats_count_rows() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        EXECUTE format(
+            'INSERT INTO user_stats AS s (user_email, %1$I)
+             SELECT user_email, COUNT(*) FROM changed_rows WHERE user_email IS NOT NULL GROUP BY user_email
+             ON CONFLICT (user_email) DO UPDATE
+                SET %1$I = s.%1$I + EXCLUDED.%1$I, updated_at = CURRENT_TIMESTAMP',
+            TG_ARGV[0]);
+    ELSE
+        EXECUTE format(
+            'UPDATE user_stats s SET %1$I = GREATEST(s.%1$I - d.removed, 0), updated_at = CURRENT_TIMESTAMP
+             FROM (SELECT user_email, COUNT(*) AS removed FROM changed_rows GROUP BY user_email) d
+             WHERE s.user_email = d.user_email',
+            TG_ARGV[0]);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_logins_stats_insert ON user_logins;
+CREATE TRIGGER user_logins_stats_insert AFTER INSERT ON user_logins
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('logins_total');
+DROP TRIGGER IF EXISTS user_logins_stats_delete ON user_logins;
+CREATE TRIGGER user_logins_stats_delete AFTER DELETE ON user_logins
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('logins_total');
+
+DROP TRIGGER IF EXISTS user_lessons_stats_insert ON user_lessons;
+CREATE TRIGGER user_lessons_stats_insert AFTER INSERT ON user_lessons
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('lessons_completed');
+DROP TRIGGER IF EXISTS user_lessons_stats_delete ON user_lessons;
+CREATE TRIGGER user_lessons_stats_delete AFTER DELETE ON user_lessons
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('lessons_completed');
+
+DROP TRIGGER IF EXISTS user_quizzes_stats_insert ON user_quizzes;
+CREATE TRIGGER user_quizzes_stats_insert AFTER INSERT ON user_quizzes
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('quizzes_completed');
+DROP TRIGGER IF EXISTS user_quizzes_stats_delete ON user_quizzes;
+CREATE TRIGGER user_quizzes_stats_delete AFTER DELETE ON user_quizzes
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('quizzes_completed');
+
+DROP TRIGGER IF EXISTS user_challenges_stats_insert ON user_challenges;
+CREATE TRIGGER user_challenges_stats_insert AFTER INSERT ON user_challenges
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('challenges_completed');
+DROP TRIGGER IF EXISTS user_challenges_stats_delete ON user_challenges;
+CREATE TRIGGER user_challenges_stats_delete AFTER DELETE ON user_challenges
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('challenges_completed');
+
+DROP TRIGGER IF EXISTS saved_topologies_stats_insert ON saved_topologies;
+CREATE TRIGGER saved_topologies_stats_insert AFTER INSERT ON saved_topologies
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('topologies_saved');
+DROP TRIGGER IF EXISTS saved_topologies_stats_delete ON saved_topologies;
+CREATE TRIGGER saved_topologies_stats_delete AFTER DELETE ON saved_topologies
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('topologies_saved');
+
+DROP TRIGGER IF EXISTS lesson_sessions_stats_insert ON lesson_sessions;
+CREATE TRIGGER lesson_sessions_stats_insert AFTER INSERT ON lesson_sessions
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('lesson_sessions');
+DROP TRIGGER IF EXISTS lesson_sessions_stats_delete ON lesson_sessions;
+CREATE TRIGGER lesson_sessions_stats_delete AFTER DELETE ON lesson_sessions
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_count_rows('lesson_sessions');
+
+-- Course counts depend on progress and completed, so they are worked out
+-- again for just the users whose user_courses rows changed.
+CREATE OR REPLACE FUNCTION user_stats_courses_changed() RETURNS TRIGGER AS $$
+BEGIN
+    WITH counts AS (
+        SELECT e.user_email,
+               COUNT(uc.id) AS started,
+               COUNT(uc.id) FILTER (WHERE uc.progress > 0) AS active,
+               COUNT(uc.id) FILTER (WHERE uc.completed = FALSE AND uc.progress > 0) AS in_progress,
+               COUNT(uc.id) FILTER (WHERE uc.completed = TRUE) AS completed
+        FROM (SELECT DISTINCT user_email FROM changed_rows WHERE user_email IS NOT NULL) e
+        LEFT JOIN user_courses uc ON uc.user_email = e.user_email
+        GROUP BY e.user_email
+    )
+    UPDATE user_stats s SET
+        courses_started     = c.started,
+        courses_active      = c.active,
+        courses_in_progress = c.in_progress,
+        courses_completed   = c.completed,
+        updated_at          = CURRENT_TIMESTAMP
+    FROM counts c
+    WHERE s.user_email = c.user_email;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_courses_stats_insert ON user_courses;
+CREATE TRIGGER user_courses_stats_insert AFTER INSERT ON user_courses
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_courses_changed();
+DROP TRIGGER IF EXISTS user_courses_stats_update ON user_courses;
+CREATE TRIGGER user_courses_stats_update AFTER UPDATE ON user_courses
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_courses_changed();
+DROP TRIGGER IF EXISTS user_courses_stats_delete ON user_courses;
+CREATE TRIGGER user_courses_stats_delete AFTER DELETE ON user_courses
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_courses_changed();
+
+-- progress_version goes up on every change to a user's row, so read
+-- routes can use it as an ETag for that user's progress.
+ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS progress_version BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION user_stats_bump_version() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.progress_version := OLD.progress_version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_stats_version ON user_stats;
+CREATE TRIGGER user_stats_version BEFORE UPDATE ON user_stats
+    FOR EACH ROW EXECUTE FUNCTION user_stats_bump_version();
+
+-- XP, level and profile changes are kept on users, not here, but they
+-- still change the dashboard, so they bump the version too.
+CREATE OR REPLACE FUNCTION user_stats_user_changed() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE user_stats SET updated_at = CURRENT_TIMESTAMP WHERE user_email = NEW.email;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS users_stats_update ON users;
+CREATE TRIGGER users_stats_update
+    AFTER UPDATE OF first_name, last_name, username, xp, numeric_level, level, start_level ON users
+    FOR EACH ROW
+    WHEN ((OLD.first_name, OLD.last_name, OLD.username, OLD.xp, OLD.numeric_level, OLD.level, OLD.start_level)
+          IS DISTINCT FROM
+          (NEW.first_name, NEW.last_name, NEW.username, NEW.xp, NEW.numeric_level, NEW.level, NEW.start_level))
+    EXECUTE FUNCTION user_stats_user_changed();
+
+-- Earned achievements are not counted here, but they still change the
+-- user's progress pages, so they touch the row to bump the version.
+CREATE OR REPLACE FUNCTION user_stats_achievements_changed() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE user_stats s SET updated_at = CURRENT_TIMESTAMP
+    WHERE s.user_email IN (SELECT DISTINCT user_email FROM changed_rows);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_achievements_stats_insert ON user_achievements;
+CREATE TRIGGER user_achievements_stats_insert AFTER INSERT ON user_achievements
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_achievements_changed();
+DROP TRIGGER IF EXISTS user_achievements_stats_delete ON user_achievements;
+CREATE TRIGGER user_achievements_stats_delete AFTER DELETE ON user_achievements
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_achievements_changed();
+
+-- Fill in counters for users that existed before this table.
+INSERT INTO user_stats (
+    user_email, logins_total, lessons_completed, quizzes_completed, challenges_completed,
+    courses_started, courses_active, courses_in_progress, courses_completed,
+    topologies_saved, lesson_sessions
+)
+SELECT u.email,
+       (SELECT COUNT(*) FROM user_logins      WHERE user_email = u.email),
+       (SELECT COUNT(*) FROM user_lessons     WHERE user_email = u.email),
+       (SELECT COUNT(*) FROM user_quizzes     WHERE user_email = u.email),
+       (SELECT COUNT(*) FROM user_challenges  WHERE user_email = u.email),
+       (SELECT COUNT(*) FROM user_courses     WHERE user_email = u.email),
+       (SELECT COUNT(*) FROM user_courses     WHERE user_email = u.email AND progress > 0),
+       (SELECT COUNT(*) FROM user_courses     WHERE user_email = u.email AND completed = FALSE AND progress > 0),
+       (SELECT COUNT(*) FROM user_courses     WHERE user_email = u.email AND completed = TRUE),
+       (SELECT COUNT(*) FROM saved_topologies WHERE user_email = u.email),
+       (SELECT COUNT(*) FROM lesson_sessions  WHERE user_email = u.email)
+FROM users u
+ON CONFLICT (user_email) DO NOTHING;
+
+
+-- LOGIN STREAKS
+-- A streak is a run of days in a row in user_logins. login_date minus
+-- the row's number in date order is the same for every day of one run
+-- (gaps and islands), so grouping on it gives each run.
+-- Triggers keep the latest run, the longest run and the last login day
+-- in user_stats, so a streak check is one primary key lookup.
+
+CREATE OR REPLACE VIEW login_streak_runs AS
+SELECT user_email, MIN(login_date) AS first_day, MAX(login_date) AS last_day, COUNT(*)::int AS days
+FROM (
+    SELECT user_email, login_date,
+           login_date - (ROW_NUMBER() OVER (PARTITION BY user_email ORDER BY login_date))::int AS island
+    FROM user_logins
+) logins
+GROUP BY user_email, island;
+
+CREATE OR REPLACE VIEW login_streaks AS
+SELECT user_email,
+       (ARRAY_AGG(days ORDER BY last_day DESC))[1] AS current_streak,
+       MAX(days) AS longest_streak,
+       MAX(last_day) AS last_login_date
+FROM login_streak_runs
+GROUP BY user_email;
+
+ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS current_streak  INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS longest_streak  INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE user_stats ADD COLUMN IF NOT EXISTS last_login_date DATE;
+
+-- Work the streaks out again for just the users whose logins changed.
+-- The lookup by user_email reaches the user_logins primary key.
+CREATE OR REPLACE FUNCTION user_stats_logins_changed() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE user_stats s SET (current_streak, longest_streak, last_login_date, updated_at) = (
+        SELECT COALESCE(MAX(r.current_streak), 0), COALESCE(MAX(r.longest_streak), 0),
+               MAX(r.last_login_date), CURRENT_TIMESTAMP
+        FROM login_streaks r WHERE r.user_email = s.user_email
+    )
+    WHERE s.user_email = ANY(ARRAY(SELECT DISTINCT user_email FROM changed_rows));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_logins_streaks_insert ON user_logins;
+CREATE TRIGGER user_logins_streaks_insert AFTER INSERT ON user_logins
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_logins_changed();
+DROP TRIGGER IF EXISTS user_logins_streaks_delete ON user_logins;
+CREATE TRIGGER user_logins_streaks_delete AFTER DELETE ON user_logins
+    REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION user_stats_logins_changed();
+
+-- Fill in streaks for logins saved before these columns.
+UPDATE user_stats s SET (current_streak, longest_streak, last_login_date) = (
+    SELECT COALESCE(MAX(r.current_streak), 0), COALESCE(MAX(r.longest_streak), 0), MAX(r.last_login_date)
+    FROM login_streaks r WHERE r.user_email = s.user_email
+)
+WHERE s.last_login_date IS DISTINCT FROM (SELECT MAX(login_date) FROM user_logins WHERE user_email = s.user_email);
+
+-- DAILY ACTIVITY UPKEEP
+-- Add each new completion, XP award, login and saved topology to the
+-- user's user_daily_activity row for that day as it is written, so the
+-- heatmap reads one index range. The kind of activity comes from the
+-- table the row was written to.
+-- TG_ARGV[0] is the user_daily_activity column to add to,
+-- TG_ARGV[1] the source column holding the time or date, and
+-- TG_ARGV[2] the amount each row adds ('1' or a column name).
+CREATE OR REPLACE FUNCTION daily_activity_add_rows() RETURNS TRIGGER AS $$
+BEGIN
+    EXECUTE format(
+        'INSERT INTO user_daily_activity AS d (user_email, activity_date, %1$I)
+         SELECT user_email, %2$I::date, SUM(%3$s) FROM changed_rows
+         WHERE user_email IS NOT NULL AND %2$I IS NOT NULL
+         GROUP BY user_email, %2$I::date
+         ON CONFLICT (user_email, activity_date) DO UPDATE
+            SET %1$I = COALESCE(d.%1$I, 0) + EXCLUDED.%1$I, updated_at = CURRENT_TIMESTAMP',
+        TG_ARGV[0], TG_ARGV[1], TG_ARGV[2]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS xp_log_daily_activity ON xp_log;
+CREATE TRIGGER xp_log_daily_activity AFTER INSERT ON xp_log
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION daily_activity_add_rows('xp_earned', 'created_at', 'xp_awarded');
+
+DROP TRIGGER IF EXISTS user_lessons_daily_activity ON user_lessons;
+CREATE TRIGGER user_lessons_daily_activity AFTER INSERT ON user_lessons
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION daily_activity_add_rows('lessons_completed', 'completed_at', '1');
+
+DROP TRIGGER IF EXISTS user_quizzes_daily_activity ON user_quizzes;
+CREATE TRIGGER user_quizzes_daily_activity AFTER INSERT ON user_quizzes
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION daily_activity_add_rows('quizzes_completed', 'completed_at', '1');
+
+DROP TRIGGER IF EXISTS user_challenges_daily_activity ON user_challenges;
+CREATE TRIGGER user_challenges_daily_activity AFTER INSERT ON user_challenges
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION daily_activity_add_rows('challenges_completed', 'completed_at', '1');
+
+DROP TRIGGER IF EXISTS user_logins_daily_activity ON user_logins;
+CREATE TRIGGER user_logins_daily_activity AFTER INSERT ON user_logins
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION daily_activity_add_rows('login_count', 'login_date', '1');
+
+DROP TRIGGER IF EXISTS saved_topologies_daily_activity ON saved_topologies;
+CREATE TRIGGER saved_topologies_daily_activity AFTER INSERT ON saved_topologies
+    REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION daily_activity_add_rows('sandbox_topologies_created', 'created_at', '1');
+
+
+-- CATALOG CHANGES
+-- Tell every backend worker to reload its cached copy of the
+-- courses, achievements or challenges table when one changes.
+
+CREATE OR REPLACE FUNCTION notify_catalog_changed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('catalog_changed', TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS courses_catalog_changed ON courses;
+CREATE TRIGGER courses_catalog_changed AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON courses
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed();
+
+DROP TRIGGER IF EXISTS achievements_catalog_changed ON achievements;
+CREATE TRIGGER achievements_catalog_changed AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON achievements
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed();
+
+DROP TRIGGER IF EXISTS challenges_catalog_changed ON challenges;
+CREATE TRIGGER challenges_catalog_changed AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON challenges
+    FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed();
+
+
+-- ACHIEVEMENT JOBS
+-- Queued achievement checks, used when ACHIEVEMENTS_ASYNC is on.
+-- Workers claim rows with FOR UPDATE SKIP LOCKED and the frontend
+-- collects finished unlocks from /api/user/achievements/pending.
+
+CREATE TABLE IF NOT EXISTS achievement_jobs (
+    id          BIGSERIAL PRIMARY KEY,
+    user_email  VARCHAR(255) NOT NULL REFERENCES users(email) ON DELETE CASCADE,
+    event       VARCHAR(50)  NOT NULL,
+    status      VARCHAR(20)  NOT NULL DEFAULT 'queued',
+    attempts    INTEGER      NOT NULL DEFAULT 0,
+    unlocked    JSONB        NOT NULL DEFAULT '[]'::jsonb,
+    delivered   BOOLEAN      NOT NULL DEFAULT FALSE,
+    last_error  TEXT,
+    created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- A failed job waits until run_after before it is tried again.
+ALTER TABLE achievement_jobs ADD COLUMN IF NOT EXISTS run_after TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS achievement_jobs_queued_idx
+    ON achievement_jobs (id) WHERE status = 'queued';
+
+CREATE INDEX IF NOT EXISTS achievement_jobs_user_idx
+    ON achievement_jobs (user_email) WHERE delivered = FALSE;
+
+
+-- DASHBOARD SNAPSHOTS
+-- The last /api/user/dashboard response built for each user.
+-- snapshot_key covers the user's progress_version, the date and the
+-- catalog versions, so an old snapshot is simply rebuilt on next load.
+
+CREATE TABLE IF NOT EXISTS user_dashboard_snapshots (
+    user_email   VARCHAR(255) PRIMARY KEY REFERENCES users(email) ON DELETE CASCADE,
+    snapshot_key VARCHAR(64) NOT NULL,
+    payload      JSONB       NOT NULL,
+    built_at     TIMESTAMP   DEFAULT CURRENT_TIMESTAMP
+);
+
+
+-- HOT QUERY INDEXES
+-- Indexes for the per-user queries the routes run on every page load.
+-- INCLUDE adds the selected columns to the index so PostgreSQL can
+-- answer from the index alone. Check them with:
+--   python scripts/explain_queries.py
+
+-- A user's XP by category over a date range (and the daily activity backfill).
+-- Made on the partitioned table, so every month's partition gets its own copy.
+DROP INDEX IF EXISTS xp_log_user_created_idx;
+CREATE INDEX IF NOT EXISTS xp_log_user_category_idx
+    ON xp_log (user_email, category, created_at) INCLUDE (xp_awarded);
+
+-- /load-topologies lists a user's saved networks, newest first.
+CREATE INDEX IF NOT EXISTS saved_topologies_user_created_idx
+    ON saved_topologies (user_email, created_at DESC) INCLUDE (name);
+
+-- /user-courses and the user_stats counts read progress and completed per user.
+CREATE INDEX IF NOT EXISTS user_courses_user_progress_idx
+    ON user_courses (user_email) INCLUDE (course_id, progress, completed);
+
+
 -- SEED DATA
 
 -- 9 COURSES (IDs 1-9 = COURSE_CONTENT keys)
@@ -452,4 +1043,4 @@ ON CONFLICT (title, challenge_type) DO UPDATE SET
     required_action = EXCLUDED.required_action;
 
 
--- DONE - 13 tables | 9 courses | 20 achievements | 11 challenges
+-- DONE - 15 tables | 9 courses | 20 achievements | 11 challenges
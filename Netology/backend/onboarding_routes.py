@@ -16,7 +16,7 @@ These routes are mainly used by onboarding-tour.js.
 
 from flask import Blueprint, jsonify, request
 
-from achievement_engine import evaluate_achievements_for_event
+from achievement_queue import queue_or_evaluate_for_event
 from db import email_from, get_db_connection
 
 onboarding = Blueprint("onboarding", __name__)
@@ -81,12 +81,13 @@ def complete_onboarding():
         cur.close()
         conn.close()
 
-    newly_unlocked = evaluate_achievements_for_event(user_email, "onboarding_complete")
+    newly_unlocked, queued = queue_or_evaluate_for_event(user_email, "onboarding_complete")
     achievement_xp_added = sum(int(item.get("xp_added") or 0) for item in newly_unlocked)
     return jsonify({
         "success": True,
         "newly_unlocked": newly_unlocked,
         "achievement_xp_added": achievement_xp_added,
+        "achievements_pending": queued,
     })
 
 
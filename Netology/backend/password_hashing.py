@@ -0,0 +1,173 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+password_hashing.py - Password Hashing Pool
+---
+This file hashes and checks passwords for the auth routes.
+
+bcrypt is slow on purpose, so running it inside a web worker holds
+that worker for the whole hash. Here the work is sent to a small
+process pool instead (PASSWORD_HASH_WORKERS processes), so the web
+workers stay free for other requests.
+
+Only PASSWORD_HASH_QUEUE hashes may be waiting or running at once
+in each web worker. Past that, or when a hash takes longer than
+PASSWORD_HASH_TIMEOUT seconds, HashingBusy is raised and the route
+answers 503 with a Retry-After header instead of stalling. A slot is
+only freed once its hash has really finished, and a pool whose child
+process died is replaced on the next call. The cost
+factor comes from BCRYPT_LOG_ROUNDS, and PASSWORD_HASH_POOL=0 runs
+everything inline. Timing counters are reported on /healthz.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as HashTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+import bcrypt
+
+from db import env_flag, env_int
+
+# Seconds the browser is told to wait after a 503.
+RETRY_AFTER_SECONDS = 2
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_slots = None
+_stats_lock = threading.Lock()
+_stats = {"hashes": 0, "checks": 0, "rejected": 0, "total_ms": 0.0, "max_ms": 0.0}
+
+
+class HashingBusy(Exception):
+    # Raised when too many passwords are already waiting to be hashed.
+    pass
+
+
+def make_hash(password, rounds):
+    # Hash one password (runs in the pool processes).
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds)).decode("utf-8")
+
+
+def matches_hash(pw_hash, password):
+    # Check one password against its stored hash (runs in the pool processes).
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), pw_hash.encode("utf-8"))
+    except ValueError:
+        # A malformed stored hash never matches.
+        return False
+
+
+def get_executor():
+    # Return this process's hashing pool, creating it on first use.
+    # A pool copied over by a fork belongs to the parent, so a new one is made.
+    global _executor, _executor_pid, _slots
+    pid = os.getpid()
+    if _executor is not None and _executor_pid == pid:
+        return _executor
+    with _executor_lock:
+        if _executor is None or _executor_pid != pid:
+            # spawn keeps the children clear of the web worker's threads and sockets.
+            _executor = ProcessPoolExecutor(
+                max_workers=max(1, env_int("PASSWORD_HASH_WORKERS", 2)),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            _executor_pid = pid
+            _slots = threading.BoundedSemaphore(max(1, env_int("PASSWORD_HASH_QUEUE", 8)))
+    return _executor
+
+
+def discard_executor(executor):
+    # Forget a pool whose child process died, so get_executor() makes a new one.
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown():
+    # Stop this process's hashing pool (used when a gunicorn worker exits).
+    global _executor
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def record(kind, started):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _stats_lock:
+        _stats[kind] += 1
+        _stats["total_ms"] += elapsed_ms
+        _stats["max_ms"] = max(_stats["max_ms"], elapsed_ms)
+
+
+def reject():
+    # Count a refused hash and tell the route to answer 503.
+    with _stats_lock:
+        _stats["rejected"] += 1
+    raise HashingBusy()
+
+
+def run(kind, fn, *args):
+    # Run fn in the pool (or inline), refusing work once the queue is full.
+    started = time.perf_counter()
+    if not env_flag("PASSWORD_HASH_POOL", True):
+        result = fn(*args)
+        record(kind, started)
+        return result
+
+    executor = get_executor()
+    slots = _slots
+    if not slots.acquire(blocking=False):
+        reject()
+    try:
+        future = executor.submit(fn, *args)
+    except BrokenProcessPool:
+        slots.release()
+        discard_executor(executor)
+        reject()
+    # The slot is held until the hash is really done, even if this
+    # request stops waiting for it, so the queue limit still holds.
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        result = future.result(timeout=env_int("PASSWORD_HASH_TIMEOUT", 30))
+    except HashTimeout:
+        reject()
+    except BrokenProcessPool:
+        discard_executor(executor)
+        reject()
+    record(kind, started)
+    return result
+
+
+def hash_password(password):
+    # Return a bcrypt hash of the password as text.
+    return run("hashes", make_hash, password, env_int("BCRYPT_LOG_ROUNDS", 12))
+
+
+def check_password(pw_hash, password):
+    # Return True if the password matches the stored hash.
+    if not pw_hash:
+        return False
+    return run("checks", matches_hash, pw_hash, password)
+
+
+def hashing_stats():
+    # Return the hashing counters for this process.
+    with _stats_lock:
+        done = _stats["hashes"] + _stats["checks"]
+        return {
+            "hashes": _stats["hashes"],
+            "checks": _stats["checks"],
+            "rejected": _stats["rejected"],
+            "avg_ms": round(_stats["total_ms"] / done, 2) if done else 0.0,
+            "max_ms": round(_stats["max_ms"], 2),
+        }
@@ -0,0 +1,195 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+query_log.py - Per-Request Query Stats
+---
+This file times every SQL statement the backend runs and adds the
+numbers up for each request: how many queries ran, how long the
+database took, how many rows came back, and which statement was
+the slowest.
+
+The connections from db.get_db_connection use InstrumentedCursor,
+so the route files do not change. At the end of each request the
+totals are sent back in a Server-Timing header (visible in the
+browser's network tab) and written as one JSON log line.
+
+Any statement slower than SLOW_QUERY_MS (default 200) is logged on
+its own with the parameter values left out, so emails and password
+hashes never reach the logs. REQUEST_LOG=0 turns the per-request
+line off. start_capture() keeps the statements themselves, which
+scripts/explain_queries.py uses to check their query plans.
+"""
+
+import contextvars
+import json
+import re
+import time
+
+import psycopg
+from flask import g, request
+
+from db import env_flag, env_int
+
+_current = contextvars.ContextVar("query_stats", default=None)
+
+# Set by start_capture() to collect every statement with its parameters.
+_captured = None
+
+
+class QueryStats:
+    # Running totals for the statements of one request.
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.rows = 0
+        self.slowest_ms = 0.0
+        self.slowest_sql = None
+
+    def add(self, sql_text, elapsed_ms, rows):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.rows += rows
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_sql = sql_text
+
+
+def sql_text(query, conn=None):
+    # Turn a query (text, bytes or psycopg.sql object) into one line of SQL.
+    if isinstance(query, bytes):
+        text = query.decode("utf-8", "replace")
+    elif isinstance(query, str):
+        text = query
+    else:
+        try:
+            text = query.as_string(conn)
+        except Exception:
+            text = repr(query)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def redacted_params(params):
+    # Describe the parameters without their values, e.g. ["str", "int"].
+    if params is None:
+        return []
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def record(query, params, elapsed_ms, rows, conn=None):
+    # Add one statement to the current request and log it if it was slow.
+    if _captured is not None:
+        _captured.append((query, params))
+    stats = _current.get()
+    if stats is None and elapsed_ms < env_int("SLOW_QUERY_MS", 200):
+        return
+    text = sql_text(query, conn)
+    if stats is not None:
+        stats.add(text, elapsed_ms, rows)
+    if elapsed_ms >= env_int("SLOW_QUERY_MS", 200):
+        print(json.dumps({
+            "event": "slow_query",
+            "ms": round(elapsed_ms, 2),
+            "rows": rows,
+            "sql": text,
+            "params": redacted_params(params),
+            "path": request.path if stats is not None else None,
+        }), flush=True)
+
+
+class InstrumentedCursor(psycopg.Cursor):
+    # A psycopg cursor that reports each statement's time and row count.
+
+    def execute(self, query, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, params, **kwargs)
+        finally:
+            record(query, params, (time.perf_counter() - started) * 1000, self.rows_returned(), self.connection)
+
+    def executemany(self, query, params_seq, **kwargs):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, params_seq, **kwargs)
+        finally:
+            record(query, None, (time.perf_counter() - started) * 1000, self.rows_returned(), self.connection)
+
+    def rows_returned(self):
+        result = self.pgresult
+        return result.ntuples if result is not None else 0
+
+
+def start_capture():
+    # Start keeping every statement run in this process, e.g. to EXPLAIN them.
+    global _captured
+    _captured = []
+
+
+def stop_capture():
+    # Stop keeping statements and return the (query, params) pairs seen.
+    global _captured
+    captured, _captured = _captured or [], None
+    return captured
+
+
+def current_stats():
+    # Return the totals for the request being handled, or None outside a request.
+    return _current.get()
+
+
+def begin_request():
+    g.query_stats_token = _current.set(QueryStats())
+    g.request_started = time.perf_counter()
+
+
+def server_timing(stats, total_ms):
+    # Build the Server-Timing header value for one request.
+    return (
+        f'db;dur={stats.total_ms:.2f};desc="{stats.count} queries, {stats.rows} rows", '
+        f"app;dur={max(0.0, total_ms - stats.total_ms):.2f}, "
+        f"total;dur={total_ms:.2f}"
+    )
+
+
+def finish_request(response):
+    # Add the Server-Timing header and write the request's log line.
+    stats = _current.get()
+    started = g.get("request_started")
+    if stats is None or started is None:
+        return response
+
+    total_ms = (time.perf_counter() - started) * 1000
+    response.headers["Server-Timing"] = server_timing(stats, total_ms)
+    if env_flag("REQUEST_LOG", True):
+        print(json.dumps({
+            "event": "request",
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "ms": round(total_ms, 2),
+            "queries": stats.count,
+            "db_ms": round(stats.total_ms, 2),
+            "rows": stats.rows,
+            "slowest_ms": round(stats.slowest_ms, 2),
+            "slowest_sql": stats.slowest_sql,
+        }), flush=True)
+    return response
+
+
+def end_request(exc=None):
+    token = g.pop("query_stats_token", None)
+    if token is not None:
+        _current.reset(token)
+
+
+def init_app(app):
+    # Turn on query stats for every request the app handles.
+    app.before_request(begin_request)
+    app.after_request(finish_request)
+    app.teardown_request(end_request)
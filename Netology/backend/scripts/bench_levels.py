@@ -0,0 +1,86 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+bench_levels.py - Level Calculation Benchmark
+---
+This script times the level calculation in xp_system against the
+old while-loop version that subtracted 100, 200, 300... per level.
+
+It checks three versions across XP values from 0 to 10^9:
+  1. The old loop.
+  2. The default StepCurve (integer square root).
+  3. A table-driven XpCurve using the same 100-per-level steps.
+
+All three must agree before any timings are printed.
+
+Run from the backend folder with:
+    python scripts/bench_levels.py
+"""
+
+import argparse
+from pathlib import Path
+import sys
+import timeit
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from xp_system import LEVEL_CURVE, XpCurve  # noqa: E402
+
+
+def loop_level_progress(total_xp):
+    # The original while-loop version, kept here only for comparison.
+    xp = max(0, int(total_xp))
+    level = 1
+    needed = 100
+    while xp >= needed:
+        xp -= needed
+        level += 1
+        needed += 100
+    return level, xp, needed
+
+
+def sample_xp_values():
+    # XP values spread from 0 up to 10^9, with more of them at the low end.
+    values = [0, 1, 99, 100, 101, 299, 300, 999, 1000]
+    power = 1
+    while power <= 10 ** 9:
+        values.extend([power, power * 3, power * 5])
+        power *= 10
+    return sorted(v for v in set(values) if v <= 10 ** 9)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare level calculation speed.")
+    parser.add_argument("--repeat", type=int, default=2000, help="calls per XP value")
+    args = parser.parse_args()
+
+    table_curve = XpCurve(lambda level: 100 * level, table_levels=5000)
+    versions = [
+        ("loop", loop_level_progress),
+        ("closed_form", LEVEL_CURVE.progress),
+        ("table_bisect", table_curve.progress),
+    ]
+
+    for xp in sample_xp_values():
+        expected = loop_level_progress(xp)
+        for name, func in versions[1:]:
+            if func(xp) != expected:
+                raise SystemExit(f"{name} disagrees with the loop at {xp} XP")
+
+    print(f"{'xp':>12} {'level':>6} " + " ".join(f"{name + ' us':>16}" for name, _ in versions))
+    for xp in sample_xp_values():
+        timings = []
+        for _, func in versions:
+            seconds = timeit.timeit(lambda: func(xp), number=args.repeat)
+            timings.append(seconds / args.repeat * 1_000_000)
+        level = LEVEL_CURVE.progress(xp)[0]
+        print(f"{xp:>12} {level:>6} " + " ".join(f"{t:>16.3f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+bench_serving.py - Serving Mode Load Test
+---
+This script starts the backend under Gunicorn in each serving mode
+(GUNICORN_MODE=sync and gthread) and hammers the read endpoints with
+many clients at once, then prints requests per second and latency
+for each endpoint and mode.
+
+It uses the same database settings as the app (.env or DB_*), so
+point it at a test database. --email picks the user whose progress
+routes are loaded.
+
+Run from the backend folder with:
+    python scripts/bench_serving.py --seconds 10 --clients 32
+"""
+
+import argparse
+import os
+from pathlib import Path
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+ROOT = Path(__file__).resolve().parents[1]
+
+MODES = ("sync", "gthread")
+
+
+def read_endpoints(email):
+    # The GET routes the dashboard and course pages load most often.
+    return [
+        "/healthz",
+        "/courses",
+        "/course?id=1",
+        f"/user-courses?email={email}",
+        f"/user-course-status?email={email}&course_id=1",
+        f"/user-progress-summary?email={email}",
+        f"/api/user/achievements?user_email={email}",
+        f"/api/user/challenges?type=daily&user_email={email}",
+        "/index.html",
+    ]
+
+
+def wait_until_up(base_url, seconds=30):
+    # Poll /healthz until the server answers.
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + "/healthz", timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.25)
+    raise SystemExit(f"Server at {base_url} did not start")
+
+
+def start_server(mode, port):
+    # Start Gunicorn with the deployment config in one serving mode.
+    env = {**os.environ, "GUNICORN_MODE": mode, "PORT": str(port)}
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def load(url, clients, seconds):
+    # Send requests from many threads for a fixed time.
+    # Returns (completed, errors, latencies in ms).
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def client():
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as response:
+                    response.read()
+                elapsed = (time.perf_counter() - started) * 1000
+                with lock:
+                    latencies.append(elapsed)
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                with lock:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies), errors[0], latencies
+
+
+def bench(base_url, mode, args):
+    for path in read_endpoints(args.email):
+        done, errors, latencies = load(base_url + path, args.clients, args.seconds)
+        print(
+            f"{mode:<8} {path[:52]:<52} {done / args.seconds:>9.1f} {errors:>7} "
+            f"{percentile(latencies, 0.5):>9.1f} {percentile(latencies, 0.95):>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare Gunicorn serving modes on the read endpoints.")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--seconds", type=float, default=10, help="seconds per endpoint")
+    parser.add_argument("--clients", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--email", default="loadtest@test.com", help="user for the progress routes")
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'endpoint':<52} {'req/s':>9} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9}")
+    if args.url:
+        bench(args.url.rstrip("/"), "external", args)
+        return
+
+    base_url = f"http://127.0.0.1:{args.port}"
+    for mode in args.modes:
+        server = start_server(mode, args.port)
+        try:
+            wait_until_up(base_url)
+            bench(base_url, mode, args)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+
+if __name__ == "__main__":
+    main()
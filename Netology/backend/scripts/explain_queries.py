@@ -0,0 +1,158 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+explain_queries.py - Query Plan Check
+---
+This script checks that none of the queries the routes send reads a
+whole large table.
+
+It sends one of each request from the load test mix
+(load_harness.py) through the Flask app for one user, keeping every
+statement with query_log.start_capture(). Each statement is then run
+again under EXPLAIN (ANALYZE, BUFFERS) inside a transaction that is
+rolled back. Any sequential scan of a table with at least --min-rows
+rows is reported and the script exits with 1, so it can gate a
+change to the schema or the routes.
+
+Run it on a large synthetic database, for example one filled by
+generate_dataset.py. The requests really run, so the chosen user
+(--email, or the user with the most XP) gains a little progress.
+
+Run from the backend folder with:
+    python scripts/explain_queries.py --min-rows 10000
+"""
+
+import argparse
+import json
+import os
+from pathlib import Path
+import random
+import sys
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from dotenv import load_dotenv  # noqa: E402
+import psycopg  # noqa: E402
+
+from db import connection_dsn  # noqa: E402
+from load_harness import load_courses, request_mix  # noqa: E402
+from query_log import sql_text, start_capture, stop_capture  # noqa: E402
+
+# Statements EXPLAIN can run. Everything else (pg_notify, SET...) is skipped.
+EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "VALUES")
+
+
+def pick_user(conn, email):
+    if email:
+        return email
+    row = conn.execute("SELECT email FROM users ORDER BY xp DESC LIMIT 1").fetchone()
+    if not row:
+        raise SystemExit("No users in the database, run generate_dataset.py first")
+    return row[0]
+
+
+def capture_requests(email, courses, seed):
+    # Send each request in the mix once and return {endpoint: [(query, params)]}.
+    from app import app
+
+    client = app.test_client()
+    rng = random.Random(seed)
+    statements = {}
+    for _, name, build in request_mix(courses):
+        method, path, body, form = build(rng, email)
+        start_capture()
+        try:
+            client.open(path, method=method, json=body, data=form)
+        finally:
+            statements[name] = stop_capture()
+    return statements
+
+
+def plan_nodes(node):
+    # Yield a plan node and every node below it.
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def table_rows(conn, table, sizes):
+    # Return the planner's row estimate for a table.
+    if table not in sizes:
+        row = conn.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", (table,)).fetchone()
+        sizes[table] = max(0, row[0]) if row else 0
+    return sizes[table]
+
+
+def explain(conn, text, params):
+    # Run one statement under EXPLAIN ANALYZE and undo anything it wrote.
+    try:
+        with conn.transaction(force_rollback=True):
+            row = conn.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {text}", params).fetchone()
+    except psycopg.Error as e:
+        return None, str(e).strip().splitlines()[0]
+    plan = row[0] if not isinstance(row[0], str) else json.loads(row[0])
+    return plan[0], None
+
+
+def check(conn, statements, min_rows):
+    # Print every statement's plan summary and return the number of problems.
+    problems = 0
+    sizes = {}
+    seen = set()
+    for endpoint, captured in statements.items():
+        for query, params in captured:
+            text = sql_text(query, conn)
+            if text in seen or not text.upper().startswith(EXPLAINABLE):
+                continue
+            seen.add(text)
+
+            result, error = explain(conn, text, params)
+            if error:
+                print(f"skip {endpoint:<22} {error}")
+                continue
+
+            top = result["Plan"]
+            scans = [
+                (node["Relation Name"], table_rows(conn, node["Relation Name"], sizes))
+                for node in plan_nodes(top)
+                if node["Node Type"] == "Seq Scan"
+            ]
+            large = [(table, rows) for table, rows in scans if rows >= min_rows]
+            buffers = top.get("Shared Hit Blocks", 0) + top.get("Shared Read Blocks", 0)
+            status = "SEQ " if large else "ok  "
+            print(f"{status} {endpoint:<22} {result['Execution Time']:>9.2f} ms {buffers:>7} buf  {text[:90]}")
+            for table, rows in large:
+                print(f"       sequential scan on {table} ({rows:,} rows)")
+            problems += len(large)
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="EXPLAIN every query the routes run and fail on large sequential scans.")
+    parser.add_argument("--email", help="user to send the requests as (default: the user with the most XP)")
+    parser.add_argument("--min-rows", type=int, default=10_000, help="smallest table a sequential scan is reported on")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the request mix")
+    args = parser.parse_args()
+
+    load_dotenv()
+    # Keep the output to the plans, and hash passwords inline.
+    os.environ["REQUEST_LOG"] = "0"
+    os.environ.setdefault("PASSWORD_HASH_POOL", "0")
+
+    with psycopg.connect(connection_dsn(), autocommit=True) as conn:
+        email = pick_user(conn, args.email)
+        courses = load_courses(conn)
+        statements = capture_requests(email, courses, args.seed)
+        problems = check(conn, statements, args.min_rows)
+
+    print(f"{problems} large sequential scan(s) found.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
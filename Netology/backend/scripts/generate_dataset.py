@@ -0,0 +1,229 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+generate_dataset.py - Synthetic Dataset Generator
+---
+This script fills a database built from netology_schema.sql with
+synthetic users so the schema can be tested at 100k to 1M users.
+
+For each user it writes login history (with a current streak),
+lesson, quiz and challenge completions, xp_log rows, course
+progress, saved topologies and lesson sessions. Most users do a
+little and a few do a lot, like real learners.
+
+Rows are loaded with COPY in chunks of --chunk users, one
+transaction per chunk. Each user's data depends only on --seed and
+the user's number, so the same seed always gives the same data, and
+running again with a bigger --users only adds the missing users
+(a top-up). Dates are counted back from --anchor (default today).
+
+Generated users use the @dataset.netology domain. --drop removes
+them again.
+
+Run from the backend folder with:
+    python scripts/generate_dataset.py --users 100000
+    python scripts/generate_dataset.py --users 250000   # adds 150k more
+"""
+
+import argparse
+from datetime import date, datetime, timedelta
+import json
+from pathlib import Path
+import random
+import sys
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from dotenv import load_dotenv  # noqa: E402
+import bcrypt  # noqa: E402
+import psycopg  # noqa: E402
+
+from db import connection_dsn  # noqa: E402
+from xp_system import XP_CHALLENGE, XP_LESSON, XP_QUIZ, get_level_progress, rank_for_level  # noqa: E402
+
+USER_DOMAIN = "dataset.netology"
+USER_PASSWORD = "Dataset123!"
+
+# COPY targets, in the order they are loaded (users first for the foreign keys).
+TABLES = {
+    "users": ("first_name", "last_name", "username", "email", "password_hash", "xp", "numeric_level",
+              "level", "start_level", "is_first_login", "onboarding_completed", "created_at"),
+    "user_logins": ("user_email", "login_date"),
+    "user_lessons": ("user_email", "course_id", "lesson_number", "xp_awarded", "completed_at"),
+    "user_quizzes": ("user_email", "course_id", "lesson_number", "xp_awarded", "completed_at"),
+    "user_challenges": ("user_email", "course_id", "lesson_number", "xp_awarded", "completed_at"),
+    "xp_log": ("user_email", "action", "xp_awarded", "created_at", "category", "action_key"),
+    "user_courses": ("user_email", "course_id", "progress", "completed", "started_at", "updated_at"),
+    "saved_topologies": ("user_email", "name", "devices", "connections", "created_at"),
+    "lesson_sessions": ("user_email", "course_id", "lesson_number", "devices", "connections", "updated_at"),
+}
+
+FIRST_NAMES = ["Aoife", "Sean", "Niamh", "Conor", "Ciara", "Darragh", "Saoirse", "Eoin", "Roisin", "Cian"]
+LAST_NAMES = ["Murphy", "Kelly", "Byrne", "Ryan", "Walsh", "Doyle", "Brennan", "Lynch", "Nolan", "Quinn"]
+DEVICE_TYPES = ["router", "switch", "pc", "server", "firewall"]
+
+
+def user_email(n):
+    return f"gen{n}@{USER_DOMAIN}"
+
+
+def at(day, rng):
+    # A random time of day on one date.
+    return datetime.combine(day, datetime.min.time()) + timedelta(seconds=rng.randint(8 * 3600, 23 * 3600))
+
+
+def topology_json(rng):
+    size = rng.randint(2, 12)
+    devices = [{"id": f"d{i}", "type": rng.choice(DEVICE_TYPES), "x": rng.randint(0, 900), "y": rng.randint(0, 600)}
+               for i in range(size)]
+    connections = [{"from": f"d{rng.randrange(i)}", "to": f"d{i}"} for i in range(1, size)]
+    return json.dumps(devices), json.dumps(connections)
+
+
+def generate_user(n, seed, courses, anchor, pw_hash):
+    # Return {table: [rows]} for user n. Only seed and n decide the result.
+    rng = random.Random(f"{seed}:{n}")
+    email = user_email(n)
+    rows = {table: [] for table in TABLES}
+
+    # Activity follows a long tail: most users are light, a few are heavy.
+    activity = min(1.0, rng.paretovariate(1.5) / 10)
+    age_days = rng.randint(1, 365)
+    joined = anchor - timedelta(days=age_days)
+
+    # Logins: a current streak plus random earlier days since joining.
+    streak = min(age_days, int(rng.expovariate(1 / (2 + 20 * activity))))
+    days = {anchor - timedelta(days=i) for i in range(streak)}
+    extra = int(age_days * activity * rng.uniform(0.2, 0.9))
+    days.update(anchor - timedelta(days=rng.randint(0, age_days)) for _ in range(extra))
+    days.add(joined)
+    login_days = sorted(days)
+    rows["user_logins"] = [(email, day) for day in login_days]
+
+    xp = 0
+    course_count = min(len(courses), int(activity * len(courses)) + rng.choice([0, 1, 1, 2]))
+    for course_id, total_lessons, module_count in rng.sample(courses, k=course_count):
+        per_module = max(1, total_lessons // module_count)
+        done_lessons = max(1, min(total_lessons, int(total_lessons * min(1.0, activity * rng.uniform(0.5, 3)))))
+        finished = 0
+        for lesson in range(1, done_lessons + 1):
+            when = at(rng.choice(login_days), rng)
+            rows["user_lessons"].append((email, course_id, lesson, 10, when))
+            rows["xp_log"].append((email, "Lesson Completed", 10, when, XP_LESSON, f"{course_id}:{lesson}"))
+            xp += 10
+            finished += 1
+            if lesson % per_module == 0:
+                rows["user_quizzes"].append((email, course_id, lesson, 5, when))
+                rows["xp_log"].append((email, "Quiz Completed", 5, when, XP_QUIZ, f"{course_id}:{lesson}"))
+                xp += 5
+                finished += 1
+                if rng.random() < 0.3 + 0.6 * activity:
+                    rows["user_challenges"].append((email, course_id, lesson, 15, when))
+                    rows["xp_log"].append((email, "Challenge Completed", 15, when, XP_CHALLENGE, f"{course_id}:{lesson}"))
+                    xp += 15
+                    finished += 1
+            if rng.random() < 0.15:
+                rows["lesson_sessions"].append((email, course_id, lesson, *topology_json(rng), when))
+        activities = total_lessons + module_count * 2
+        started = at(login_days[0], rng)
+        rows["user_courses"].append(
+            (email, course_id, min(100, int(finished / activities * 100)), finished >= activities, started, started)
+        )
+
+    for i in range(int(rng.expovariate(1 / (0.5 + 4 * activity)))):
+        rows["saved_topologies"].append((email, f"Network {i + 1}", *topology_json(rng), at(rng.choice(login_days), rng)))
+
+    level = get_level_progress(xp)[0]
+    rows["users"].append((
+        rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES), f"gen_{n}", email, pw_hash, xp, level,
+        rank_for_level(level), rng.choice(["novice", "novice", "intermediate", "advanced"]),
+        False, rng.random() < 0.8, at(joined, rng),
+    ))
+    return rows
+
+
+def copy_rows(cur, table, rows):
+    with cur.copy(f"COPY {table} ({', '.join(TABLES[table])}) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+def load_courses(cur):
+    cur.execute("SELECT id, total_lessons, module_count FROM courses WHERE is_active = TRUE ORDER BY id")
+    return [(cid, max(1, lessons or 1), max(1, modules or 1)) for cid, lessons, modules in cur.fetchall()]
+
+
+def existing_users(cur):
+    # Count the generated users already loaded. Users are always added in
+    # order inside committed chunks, so this is also the next user number.
+    cur.execute("SELECT COUNT(*) FROM users WHERE email LIKE %s", (f"%@{USER_DOMAIN}",))
+    return cur.fetchone()[0]
+
+
+def generate(conn, target, seed, chunk, anchor, rounds):
+    cur = conn.cursor()
+    courses = load_courses(cur)
+    if not courses:
+        raise SystemExit("No active courses, load netology_schema.sql first")
+
+    start = existing_users(cur)
+    if start >= target:
+        print(f"{start} generated users already loaded, nothing to add.")
+        return
+
+    # Every user shares one password hash so generating stays fast.
+    pw_hash = bcrypt.hashpw(USER_PASSWORD.encode(), bcrypt.gensalt(rounds)).decode()
+    began = time.monotonic()
+    totals = {table: 0 for table in TABLES}
+    for first in range(start, target, chunk):
+        batch = {table: [] for table in TABLES}
+        for n in range(first, min(first + chunk, target)):
+            for table, rows in generate_user(n, seed, courses, anchor, pw_hash).items():
+                batch[table].extend(rows)
+        for table in TABLES:
+            copy_rows(cur, table, batch[table])
+            totals[table] += len(batch[table])
+        conn.commit()
+        done = min(first + chunk, target)
+        print(f"{done}/{target} users ({done - start} new) in {time.monotonic() - began:.0f}s")
+
+    cur.execute("ANALYZE")
+    conn.commit()
+    for table, count in totals.items():
+        print(f"  {table:<18} {count:>12,} rows")
+
+
+def drop(conn):
+    # Remove every generated user. Their rows go with them by cascade.
+    cur = conn.cursor()
+    cur.execute("DELETE FROM users WHERE email LIKE %s", (f"%@{USER_DOMAIN}",))
+    print(f"Removed {cur.rowcount} generated users.")
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic Netology users with COPY.")
+    parser.add_argument("--users", type=int, default=100_000, help="total generated users wanted")
+    parser.add_argument("--seed", type=int, default=1, help="random seed (same seed, same data)")
+    parser.add_argument("--chunk", type=int, default=5_000, help="users per COPY transaction")
+    parser.add_argument("--anchor", type=date.fromisoformat, default=date.today(), help="date the history ends on")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="cost of the shared password hash")
+    parser.add_argument("--drop", action="store_true", help="remove the generated users instead")
+    args = parser.parse_args()
+
+    load_dotenv()
+    with psycopg.connect(connection_dsn()) as conn:
+        if args.drop:
+            drop(conn)
+        else:
+            generate(conn, args.users, args.seed, max(1, args.chunk), args.anchor, args.bcrypt_rounds)
+
+
+if __name__ == "__main__":
+    main()
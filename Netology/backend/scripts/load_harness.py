@@ -0,0 +1,420 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+load_harness.py - Backend Load Test
+---
+This script load tests the whole backend against a throwaway
+PostgreSQL database and writes the results as JSON, so two commits
+can be compared.
+
+It:
+  1. Optionally starts a temporary PostgreSQL cluster (--temp-cluster,
+     needs initdb and pg_ctl on the PATH) or uses the DB_* settings,
+     for example a Postgres container.
+  2. Loads netology_schema.sql (--schema) and seeds --users synthetic
+     users with lesson, quiz, challenge, login and topology history.
+  3. Starts Gunicorn with the deployment config (or uses --url).
+  4. Replays a weighted mix of requests across every blueprint from
+     --clients threads for --seconds.
+  5. Prints (or saves with --output) throughput and p50/p95/p99
+     latency for each endpoint. --compare shows the change against
+     an earlier results file.
+
+Seeded users use the @loadtest.netology domain, and seeding again
+replaces the earlier ones. Signup, password reset and account deletion are
+left out of the mix because they change the seeded users.
+
+Example, from the backend folder:
+    python scripts/load_harness.py --temp-cluster --schema --users 500 \\
+        --seconds 30 --output results.json
+"""
+
+import argparse
+from datetime import date, timedelta
+import json
+import os
+from pathlib import Path
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import bcrypt  # noqa: E402
+import psycopg  # noqa: E402
+
+from bench_serving import percentile, start_server, wait_until_up  # noqa: E402
+from db import connection_dsn  # noqa: E402
+from xp_system import XP_CHALLENGE, XP_LESSON, XP_QUIZ, get_level_progress, rank_for_level  # noqa: E402
+
+# Seeded users all share this domain so they are easy to find and remove.
+USER_DOMAIN = "loadtest.netology"
+USER_PASSWORD = "LoadTest123!"
+
+
+# Temporary database
+
+def start_temp_cluster(port):
+    # Create and start a throwaway PostgreSQL cluster, and point DB_* at it.
+    initdb, pg_ctl = shutil.which("initdb"), shutil.which("pg_ctl")
+    if not initdb or not pg_ctl:
+        raise SystemExit("initdb and pg_ctl are needed for --temp-cluster (or set DB_* for a container)")
+    data_dir = tempfile.mkdtemp(prefix="netology-pg-")
+    subprocess.run([initdb, "-D", data_dir, "-U", "postgres", "--auth=trust"], check=True, stdout=subprocess.DEVNULL)
+    subprocess.run(
+        [pg_ctl, "-D", data_dir, "-o", f"-p {port} -k {data_dir}", "-l", f"{data_dir}/server.log", "-w", "start"],
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+    os.environ.pop("DATABASE_URL", None)
+    os.environ.update(DB_HOST="127.0.0.1", DB_PORT=str(port), DB_USER="postgres", DB_PASSWORD="", DB_NAME="postgres")
+    return data_dir
+
+
+def stop_temp_cluster(data_dir):
+    subprocess.run([shutil.which("pg_ctl"), "-D", data_dir, "-m", "fast", "stop"], stdout=subprocess.DEVNULL)
+    shutil.rmtree(data_dir, ignore_errors=True)
+
+
+def load_schema(conn):
+    # Run netology_schema.sql (tables, triggers and the course catalog).
+    conn.execute((ROOT / "netology_schema.sql").read_text())
+    conn.commit()
+
+
+# Seeding
+
+def load_courses(conn):
+    rows = conn.execute("SELECT id, total_lessons, module_count FROM courses WHERE is_active = TRUE ORDER BY id")
+    return [(cid, max(1, lessons or 1), max(1, modules or 1)) for cid, lessons, modules in rows.fetchall()]
+
+
+def topology(rng, size):
+    # A small random network: a few devices and a chain of links between them.
+    devices = [{"id": f"d{i}", "type": rng.choice(["router", "switch", "pc"])} for i in range(size)]
+    connections = [{"from": f"d{i}", "to": f"d{i + 1}"} for i in range(size - 1)]
+    return json.dumps(devices), json.dumps(connections)
+
+
+def user_history(rng, email, courses, today):
+    # Build every row for one synthetic user.
+    rows = {name: [] for name in ("logins", "lessons", "quizzes", "challenges", "xp_log", "courses", "topologies", "sessions")}
+
+    # Logins: a current streak plus some scattered older days.
+    streak = rng.choice([0, 1, 2, 3, 5, 7, 14, 30])
+    days = {today - timedelta(days=i) for i in range(streak)}
+    days.update(today - timedelta(days=rng.randint(1, 180)) for _ in range(rng.randint(0, 40)))
+    rows["logins"] = [(email, day) for day in sorted(days)]
+
+    # Courses: the first few lessons of up to three courses, with the
+    # module quiz (and usually the challenge) after each module.
+    for course_id, total_lessons, module_count in rng.sample(courses, k=min(len(courses), rng.randint(0, 3))):
+        per_module = max(1, total_lessons // module_count)
+        finished = 0
+        for lesson in range(1, rng.randint(1, total_lessons) + 1):
+            rows["lessons"].append((email, course_id, lesson, 10))
+            rows["xp_log"].append((email, "Lesson Completed", 10, XP_LESSON, f"{course_id}:{lesson}"))
+            finished += 1
+            if lesson % per_module == 0:
+                rows["quizzes"].append((email, course_id, lesson, 5))
+                rows["xp_log"].append((email, "Quiz Completed", 5, XP_QUIZ, f"{course_id}:{lesson}"))
+                finished += 1
+                if rng.random() < 0.6:
+                    rows["challenges"].append((email, course_id, lesson, 15))
+                    rows["xp_log"].append((email, "Challenge Completed", 15, XP_CHALLENGE, f"{course_id}:{lesson}"))
+                    finished += 1
+            if rng.random() < 0.2:
+                rows["sessions"].append((email, course_id, lesson, *topology(rng, rng.randint(2, 6))))
+        activities = total_lessons + module_count * 2
+        progress = min(100, int(finished / activities * 100))
+        rows["courses"].append((email, course_id, progress, finished >= activities))
+
+    for i in range(rng.choice([0, 0, 1, 2, 3])):
+        rows["topologies"].append((email, f"Network {i + 1}", *topology(rng, rng.randint(2, 10))))
+
+    xp = sum(r[2] for r in rows["xp_log"])
+    return xp, rows
+
+
+INSERTS = {
+    "logins": "INSERT INTO user_logins (user_email, login_date) VALUES (%s, %s)",
+    "lessons": "INSERT INTO user_lessons (user_email, course_id, lesson_number, xp_awarded) VALUES (%s, %s, %s, %s)",
+    "quizzes": "INSERT INTO user_quizzes (user_email, course_id, lesson_number, xp_awarded) VALUES (%s, %s, %s, %s)",
+    "challenges": "INSERT INTO user_challenges (user_email, course_id, lesson_number, xp_awarded) VALUES (%s, %s, %s, %s)",
+    "xp_log": "INSERT INTO xp_log (user_email, action, xp_awarded, category, action_key) VALUES (%s, %s, %s, %s, %s)",
+    "courses": "INSERT INTO user_courses (user_email, course_id, progress, completed) VALUES (%s, %s, %s, %s)",
+    "topologies": "INSERT INTO saved_topologies (user_email, name, devices, connections) VALUES (%s, %s, %s, %s)",
+    "sessions": "INSERT INTO lesson_sessions (user_email, course_id, lesson_number, devices, connections) VALUES (%s, %s, %s, %s, %s)",
+}
+
+
+def remove_users(conn):
+    conn.execute("DELETE FROM users WHERE email LIKE %s", (f"%@{USER_DOMAIN}",))
+    conn.commit()
+
+
+def seed_users(conn, count, seed, rounds):
+    # Insert count synthetic users and their history. Returns their emails.
+    rng = random.Random(seed)
+    courses = load_courses(conn)
+    # Every user shares one password hash so seeding stays fast.
+    pw_hash = bcrypt.hashpw(USER_PASSWORD.encode(), bcrypt.gensalt(rounds)).decode()
+    today = date.today()
+
+    emails = []
+    users = []
+    batches = {name: [] for name in INSERTS}
+    for n in range(count):
+        email = f"user{n}@{USER_DOMAIN}"
+        xp, rows = user_history(rng, email, courses, today)
+        level = get_level_progress(xp)[0]
+        users.append((f"Load{n}", "Test", f"loadtest_{n}", email, pw_hash, xp, level, rank_for_level(level)))
+        for name, items in rows.items():
+            batches[name].extend(items)
+        emails.append(email)
+
+    with conn.cursor() as cur:
+        cur.executemany(
+            "INSERT INTO users (first_name, last_name, username, email, password_hash, xp, numeric_level, level, "
+            "is_first_login, onboarding_completed) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, FALSE, TRUE)",
+            users,
+        )
+        for name, sql in INSERTS.items():
+            if batches[name]:
+                cur.executemany(sql, batches[name])
+    conn.commit()
+    return emails
+
+
+# Request mix
+
+def request_mix(courses):
+    # (weight, endpoint name, builder) where builder(rng, email) returns
+    # (method, path, json body or None, form body or None).
+    def pick_course(rng):
+        return rng.choice(courses)
+
+    def lesson(rng):
+        course_id, total_lessons, _ = pick_course(rng)
+        return course_id, rng.randint(1, total_lessons)
+
+    def empty_topology(rng):
+        devices, connections = topology(rng, rng.randint(2, 6))
+        return json.loads(devices), json.loads(connections)
+
+    def complete(kind):
+        def build(rng, email):
+            course_id, number = lesson(rng)
+            return "POST", f"/complete-{kind}", {"email": email, "course_id": course_id, "lesson_number": number}, None
+        return build
+
+    def save_session(rng, email):
+        course_id, number = lesson(rng)
+        devices, connections = empty_topology(rng)
+        body = {"email": email, "course_id": course_id, "lesson_number": number, "devices": devices, "connections": connections}
+        return "POST", "/lesson-session/save", body, None
+
+    def save_topology(rng, email):
+        devices, connections = empty_topology(rng)
+        return "POST", "/save-topology", {"email": email, "name": "Load test", "devices": devices, "connections": connections}, None
+
+    def get(path):
+        return lambda rng, email: ("GET", path.format(email=urllib.parse.quote(email), course=pick_course(rng)[0]), None, None)
+
+    return [
+        (5, "login", lambda rng, email: ("POST", "/login", None, {"email": email, "password": USER_PASSWORD})),
+        (3, "record-login", lambda rng, email: ("POST", "/record-login", {"email": email}, None)),
+        (5, "user-info", get("/user-info?email={email}")),
+        (1, "award-xp", lambda rng, email: ("POST", "/award-xp", {"email": email, "action": "Load test bonus", "xp": 5}, None)),
+        (6, "courses", get("/courses")),
+        (4, "course", get("/course?id={course}")),
+        (10, "user-courses", get("/user-courses?email={email}")),
+        (8, "user-course-status", get("/user-course-status?email={email}&course_id={course}")),
+        (6, "user-progress-summary", get("/user-progress-summary?email={email}")),
+        (8, "complete-lesson", complete("lesson")),
+        (3, "complete-quiz", complete("quiz")),
+        (2, "complete-challenge", complete("challenge")),
+        (5, "activity", get("/api/user/activity?user_email={email}")),
+        (5, "achievements", get("/api/user/achievements?user_email={email}")),
+        (2, "achievements-pending", get("/api/user/achievements/pending?user_email={email}")),
+        (5, "challenges", get("/api/user/challenges?type=daily&user_email={email}")),
+        (4, "streaks", get("/api/user/streaks?user_email={email}")),
+        (6, "lesson-session-save", save_session),
+        (4, "lesson-session-load", lambda rng, email: ("GET", "/lesson-session/load?email={}&course_id={}&lesson_number={}".format(
+            urllib.parse.quote(email), *lesson(rng)), None, None)),
+        (1, "save-topology", save_topology),
+        (3, "load-topologies", get("/load-topologies?email={email}")),
+        (1, "onboarding-steps", get("/api/onboarding/steps")),
+        (1, "onboarding-step", lambda rng, email: ("POST", "/api/onboarding/step/welcome", {"user_email": email}, None)),
+        (2, "healthz", get("/healthz")),
+    ]
+
+
+def send(base_url, method, path, body, form):
+    # Send one request and return its status code.
+    headers = {}
+    data = None
+    if body is not None:
+        data = json.dumps(body).encode()
+        headers["Content-Type"] = "application/json"
+    elif form is not None:
+        data = urllib.parse.urlencode(form).encode()
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    req = urllib.request.Request(base_url + path, data=data, headers=headers, method=method)
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as err:
+        return err.code
+
+
+def replay(base_url, emails, mix, clients, seconds, seed):
+    # Run the weighted mix from many threads. Returns per-endpoint results.
+    weights = [item[0] for item in mix]
+    results = {name: {"latencies": [], "errors": 0} for _, name, _ in mix}
+    lock = threading.Lock()
+    stop_at = time.monotonic() + seconds
+
+    def client(number):
+        rng = random.Random(seed * 1000 + number)
+        while time.monotonic() < stop_at:
+            _, name, build = rng.choices(mix, weights)[0]
+            method, path, body, form = build(rng, rng.choice(emails))
+            started = time.perf_counter()
+            try:
+                status = send(base_url, method, path, body, form)
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                status = 0
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                results[name]["latencies"].append(elapsed)
+                if status == 0 or status >= 500:
+                    results[name]["errors"] += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def summarise(latencies, errors, seconds):
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / seconds, 2),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+    }
+
+
+def build_report(results, args, mode):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    everything = [ms for item in results.values() for ms in item["latencies"]]
+    return {
+        "commit": commit,
+        "mode": mode,
+        "users": args.users,
+        "clients": args.clients,
+        "seconds": args.seconds,
+        "total": summarise(everything, sum(item["errors"] for item in results.values()), args.seconds),
+        "endpoints": {
+            name: summarise(item["latencies"], item["errors"], args.seconds)
+            for name, item in sorted(results.items())
+        },
+    }
+
+
+def compare(report, baseline_path):
+    # Print the change in throughput and p95 against an earlier report.
+    baseline = json.loads(Path(baseline_path).read_text())
+    print(f"{'endpoint':<24} {'rps':>10} {'change':>8} {'p95 ms':>10} {'change':>8}", file=sys.stderr)
+    for name, now in sorted(report["endpoints"].items()):
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            continue
+
+        def change(key):
+            return f"{(now[key] - before[key]) / before[key] * 100:+.0f}%" if before[key] else "n/a"
+
+        print(f"{name:<24} {now['rps']:>10.1f} {change('rps'):>8} {now['p95_ms']:>10.1f} {change('p95_ms'):>8}", file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a test database and load test every backend endpoint.")
+    parser.add_argument("--temp-cluster", action="store_true", help="start a throwaway PostgreSQL cluster")
+    parser.add_argument("--pg-port", type=int, default=55432, help="port for --temp-cluster")
+    parser.add_argument("--schema", action="store_true", help="load netology_schema.sql first")
+    parser.add_argument("--users", type=int, default=200, help="synthetic users to seed (0 to reuse existing ones)")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12, help="cost of the seeded password hash")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for data and the request mix")
+    parser.add_argument("--mode", default=os.environ.get("GUNICORN_MODE", "gthread"), help="GUNICORN_MODE to start")
+    parser.add_argument("--port", type=int, default=5057)
+    parser.add_argument("--url", help="load test an already running server instead of starting one")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", help="earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    data_dir = start_temp_cluster(args.pg_port) if args.temp_cluster else None
+    server = None
+    try:
+        with psycopg.connect(connection_dsn()) as conn:
+            if args.schema:
+                load_schema(conn)
+            if args.users:
+                remove_users(conn)
+                emails = seed_users(conn, args.users, args.seed, args.bcrypt_rounds)
+            else:
+                rows = conn.execute("SELECT email FROM users WHERE email LIKE %s", (f"%@{USER_DOMAIN}",))
+                emails = [row[0] for row in rows.fetchall()]
+            courses = load_courses(conn)
+        if not emails or not courses:
+            raise SystemExit("No load test users or courses in the database (try --schema --users 200)")
+
+        if args.url:
+            base_url, mode = args.url.rstrip("/"), "external"
+        else:
+            base_url, mode = f"http://127.0.0.1:{args.port}", args.mode
+            server = start_server(mode, args.port)
+            wait_until_up(base_url)
+
+        results = replay(base_url, emails, request_mix(courses), args.clients, args.seconds, args.seed)
+        report = build_report(results, args, mode)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+        if data_dir:
+            stop_temp_cluster(data_dir)
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
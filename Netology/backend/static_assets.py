@@ -0,0 +1,149 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+static_assets.py - Frontend File Serving
+---
+This file serves the frontend pages from the docs folder.
+
+When the app starts it reads every file under docs/ once, gives
+each CSS and JS file a fingerprinted name with a short hash of its
+contents (for example css/style.1a2b3c4d5e.css), and keeps gzip and
+brotli (if the brotli package is installed) copies in memory.
+
+The HTML pages are rewritten to point at the fingerprinted names.
+Fingerprinted files never change, so browsers can cache them for a
+year, while the pages themselves are always checked with an ETag.
+There is no build step, so the docs folder still works as it is on
+GitHub Pages.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import re
+from collections import namedtuple
+from pathlib import Path
+
+from flask import Response, abort, request
+
+from http_cache import add_cache_headers, not_modified
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Fingerprinted files only change name, never content.
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Pages and files loaded by their plain name are checked on every load.
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+# File types that get a fingerprinted name.
+FINGERPRINT_SUFFIXES = {".css", ".js"}
+
+# File types worth compressing.
+COMPRESS_SUFFIXES = {".html", ".css", ".js", ".svg", ".json", ".txt"}
+
+# href="..." and src="..." attributes in the HTML pages.
+ASSET_LINK = re.compile(r'(href|src)="([^"#?]+)"')
+
+# body is the raw file, encoded maps "gzip"/"br" to compressed copies.
+Asset = namedtuple("Asset", ["body", "encoded", "etag", "mimetype", "immutable"])
+
+
+def fingerprint(path, body):
+    # Return the fingerprinted name for a file, e.g. js/app.<hash>.js.
+    digest = hashlib.sha256(body).hexdigest()[:10]
+    name = Path(path)
+    return str(name.with_name(f"{name.stem}.{digest}{name.suffix}"))
+
+
+def compress(path, body):
+    # Return the gzip and brotli copies that are smaller than the file.
+    if Path(path).suffix not in COMPRESS_SUFFIXES:
+        return {}
+    encoded = {"gzip": gzip.compress(body, 9, mtime=0)}
+    if brotli is not None:
+        encoded["br"] = brotli.compress(body)
+    return {name: data for name, data in encoded.items() if len(data) < len(body)}
+
+
+def make_asset(path, body):
+    # Build the stored copy of one file, served by its plain name.
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    etag = hashlib.md5(body).hexdigest()
+    return Asset(body, compress(path, body), etag, mimetype, False)
+
+
+class AssetStore:
+    # Every frontend file, keyed by the URL path it is served on.
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.assets = {}
+        self.fingerprints = {}
+
+    def files(self):
+        # Yield (url path, contents) for every file, skipping hidden ones.
+        for file in sorted(self.root.rglob("*")):
+            relative = file.relative_to(self.root)
+            if file.is_file() and not any(part.startswith(".") for part in relative.parts):
+                yield relative.as_posix(), file.read_bytes()
+
+    def build(self):
+        # Load, fingerprint and compress every file, then rewrite the pages.
+        pages = []
+        for path, body in self.files():
+            if path.endswith(".html"):
+                pages.append((path, body))
+                continue
+            asset = make_asset(path, body)
+            self.assets[path] = asset
+            if Path(path).suffix in FINGERPRINT_SUFFIXES:
+                hashed = fingerprint(path, body)
+                self.fingerprints[path] = hashed
+                self.assets[hashed] = asset._replace(immutable=True)
+
+        for path, body in pages:
+            self.assets[path] = make_asset(path, self.rewrite_page(body))
+        return self
+
+    def rewrite_page(self, body):
+        # Point the page's CSS and JS links at their fingerprinted names.
+        def swap(match):
+            target = self.fingerprints.get(match.group(2))
+            return f'{match.group(1)}="{target}"' if target else match.group(0)
+
+        return ASSET_LINK.sub(swap, body.decode("utf-8")).encode("utf-8")
+
+    def url_for(self, path):
+        # Return the fingerprinted name for a file, or the plain name if it has none.
+        return self.fingerprints.get(path, path)
+
+    def serve(self, path):
+        # Send one file in the best encoding the browser accepts.
+        asset = self.assets.get(path)
+        if asset is None:
+            abort(404)
+
+        encoding = None
+        for name in ("br", "gzip"):
+            if name in asset.encoded and request.accept_encodings[name]:
+                encoding = name
+                break
+
+        # Each encoding is a different set of bytes, so it gets its own ETag.
+        etag = f"{asset.etag}-{encoding}" if encoding else asset.etag
+        cache_control = IMMUTABLE_CACHE_CONTROL if asset.immutable else REVALIDATE_CACHE_CONTROL
+        response = not_modified(etag, cache_control)
+        if response is None:
+            response = Response(asset.encoded[encoding] if encoding else asset.body, mimetype=asset.mimetype)
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+            add_cache_headers(response, etag, cache_control)
+        response.vary.add("Accept-Encoding")
+        return response
@@ -44,6 +44,8 @@ DB_MODULES = (
     "topology_routes.get_db_connection",
     "xp_system.get_db_connection",
     "achievement_engine.get_db_connection",
+    "achievement_queue.get_db_connection",
+    "catalog_cache.get_db_connection",
 )
 
 
@@ -0,0 +1,147 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_achievement_queue.py - Background Achievement Check Tests
+---
+This file checks the queued achievement checks in achievement_queue.py.
+
+It covers:
+  1. Turning async mode on and off with ACHIEVEMENTS_ASYNC.
+  2. Routes queueing a job instead of checking straight away.
+  3. Workers running jobs, skipping ones already claimed, and
+     waiting before retrying a failed one.
+  4. Collecting finished unlocks from the pending endpoint.
+
+"""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from achievement_queue import async_enabled, drain_queue
+from db import get_db_connection
+
+
+@pytest.fixture
+def async_mode(monkeypatch):
+    monkeypatch.setenv("ACHIEVEMENTS_ASYNC", "1")
+
+
+# async_enabled()
+
+def test_async_is_off_by_default(monkeypatch):
+    monkeypatch.delenv("ACHIEVEMENTS_ASYNC", raising=False)
+    assert async_enabled() is False
+
+
+def test_async_can_be_switched_on(async_mode):
+    assert async_enabled() is True
+
+
+def test_pending_missing_email(integration_client):
+    resp = integration_client.get("/api/user/achievements/pending")
+    assert resp.status_code == 400
+
+
+# Real database checks
+
+@pytest.mark.integration
+def test_login_checks_inline_when_async_is_off(integration_client, make_user, monkeypatch):
+    monkeypatch.delenv("ACHIEVEMENTS_ASYNC", raising=False)
+    make_user("queue1@test.com")
+    body = json.loads(integration_client.post("/record-login", json={"email": "queue1@test.com"}).data)
+    assert body["achievements_pending"] is False
+    assert "first_login" in [a["id"] for a in body["newly_unlocked"]]
+
+
+@pytest.mark.integration
+def test_login_queues_a_job(integration_client, make_user, db, async_mode):
+    make_user("queue2@test.com")
+    body = json.loads(integration_client.post("/record-login", json={"email": "queue2@test.com"}).data)
+    assert body["achievements_pending"] is True
+    assert body["newly_unlocked"] == []
+    row = db.execute(
+        "SELECT event, status FROM achievement_jobs WHERE user_email = 'queue2@test.com'"
+    ).fetchone()
+    assert row == ("login", "queued")
+
+
+@pytest.mark.integration
+def test_worker_unlocks_and_pending_delivers_once(integration_client, make_user, db, async_mode):
+    make_user("queue3@test.com")
+    integration_client.post("/record-login", json={"email": "queue3@test.com"})
+
+    waiting = json.loads(integration_client.get("/api/user/achievements/pending?user_email=queue3@test.com").data)
+    assert waiting["newly_unlocked"] == []
+    assert waiting["queued"] == 1
+
+    assert drain_queue() >= 1
+    first = json.loads(integration_client.get("/api/user/achievements/pending?user_email=queue3@test.com").data)
+    assert "first_login" in [a["id"] for a in first["newly_unlocked"]]
+    assert first["queued"] == 0
+
+    second = json.loads(integration_client.get("/api/user/achievements/pending?user_email=queue3@test.com").data)
+    assert second["newly_unlocked"] == []
+
+
+@pytest.mark.integration
+def test_completion_queues_a_job(integration_client, make_user, db, async_mode):
+    make_user("queue4@test.com")
+    body = json.loads(integration_client.post(
+        "/complete-lesson",
+        data={"email": "queue4@test.com", "course_id": "2", "lesson_number": "1", "earned_xp": "10"},
+    ).data)
+    assert body["achievements_pending"] is True
+    assert body["xp_added"] == 10
+    row = db.execute(
+        "SELECT event FROM achievement_jobs WHERE user_email = 'queue4@test.com'"
+    ).fetchone()
+    assert row == ("lesson_complete",)
+
+
+@pytest.mark.integration
+def test_worker_skips_claimed_jobs(integration_client, make_user, db, async_mode):
+    make_user("queue5@test.com")
+    integration_client.post("/record-login", json={"email": "queue5@test.com"})
+    db.execute("UPDATE achievement_jobs SET status = 'done' WHERE status = 'queued' AND user_email LIKE '%@test.com' AND user_email <> 'queue5@test.com'")
+
+    # Another worker holds the job, so this drain must leave it alone.
+    holder = get_db_connection()
+    try:
+        holder.execute("SELECT id FROM achievement_jobs WHERE user_email = 'queue5@test.com' FOR UPDATE")
+        assert drain_queue() == 0
+    finally:
+        holder.rollback()
+        holder.close()
+
+    assert drain_queue() == 1
+    status = db.execute(
+        "SELECT status FROM achievement_jobs WHERE user_email = 'queue5@test.com'"
+    ).fetchone()[0]
+    assert status == "done"
+
+
+@pytest.mark.integration
+def test_failed_job_waits_before_retrying(integration_client, make_user, db, async_mode):
+    make_user("queue6@test.com")
+    integration_client.post("/record-login", json={"email": "queue6@test.com"})
+    db.execute("UPDATE achievement_jobs SET status = 'done' WHERE status = 'queued' AND user_email LIKE '%@test.com' AND user_email <> 'queue6@test.com'")
+
+    # One failure, then the same drain must not pick the job straight back up.
+    with patch("achievement_queue.evaluate_achievements", side_effect=RuntimeError("boom")):
+        assert drain_queue() == 1
+    row = db.execute(
+        "SELECT status, attempts, run_after > CURRENT_TIMESTAMP FROM achievement_jobs WHERE user_email = 'queue6@test.com'"
+    ).fetchone()
+    assert row == ("queued", 1, True)
+    assert drain_queue() == 0
+
+    # Once the wait is over the job runs again.
+    db.execute("UPDATE achievement_jobs SET run_after = CURRENT_TIMESTAMP WHERE user_email = 'queue6@test.com'")
+    assert drain_queue() == 1
+    status = db.execute("SELECT status FROM achievement_jobs WHERE user_email = 'queue6@test.com'").fetchone()[0]
+    assert status == "done"
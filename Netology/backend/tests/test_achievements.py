@@ -8,25 +8,29 @@ test_achievements.py - Achievement System Tests
 ---
 This file checks the achievement engine and the achievements API.
 
-It tests four parts:
+It tests five parts:
   1. Rule parsing from plain dicts and JSON strings.
-  2. Login streak counting.
-  3. Rule matching against user stats.
-  4. Saving achievements to the live database.
+  2. Rule matching against user stats.
+  3. Compiling the catalog and picking achievements per event.
+  4. Planning chains of unlocks in memory.
+  5. Saving achievements to the live database.
 
 The tests are split into small unit tests and a few integration tests
 so the achievement system stays easy to understand and easy to check.
 """
 
 import json
-from datetime import date, timedelta
 
 import pytest
 
+import catalog_cache
 from achievement_engine import (
+    build_catalog,
+    candidates_for_event,
+    compile_rule,
     evaluate_achievements_for_event,
-    login_streak,
     parse_rule,
+    plan_unlocks,
     rule_matches,
 )
 
@@ -54,33 +58,6 @@ def test_parse_rule_bad_json():
     assert parse_rule("{not valid json}") == {}
 
 
-# login_streak()
-
-def test_streak_one_day():
-    assert login_streak([date.today()]) == 1
-
-def test_streak_three_days():
-    dates = [date.today() - timedelta(days=i) for i in range(3)]
-    assert login_streak(dates) == 3
-
-def test_streak_seven_days():
-    dates = [date.today() - timedelta(days=i) for i in range(7)]
-    assert login_streak(dates) == 7
-
-def test_streak_breaks_on_gap():
-    dates = [date.today(), date.today() - timedelta(days=3)]
-    assert login_streak(dates) == 1
-
-def test_streak_zero_without_today():
-    assert login_streak([date.today() - timedelta(days=1)]) == 0
-
-def test_streak_empty_list():
-    assert login_streak([]) == 0
-
-def test_streak_none():
-    assert login_streak(None) == 0
-
-
 # rule_matches()
 
 def test_matches_logins_total():
@@ -143,6 +120,74 @@ def test_does_not_match_unknown_rule():
     assert rule_matches(rule, stats, "test") is False
 
 
+def test_matches_event_rule():
+    rule = {"type": "event", "event": "onboarding_complete"}
+    assert rule_matches(rule, {}, "onboarding_complete") is True
+    assert rule_matches(rule, {}, "login") is False
+
+
+# compile_rule(), build_catalog() and candidates_for_event()
+
+SAMPLE_CATALOG = [
+    ("first_login", "Welcome Back", "", "bi-door-open-fill", 10, "common", '{"type":"logins_total","value":1}'),
+    ("first_quiz", "Quiz Rookie", "", None, 35, "common", '{"type":"quizzes_completed","value":1}'),
+    ("tour", "Tour Complete", "", None, 60, "common", '{"type":"event","event":"onboarding_complete"}'),
+    ("xp_500_club", "500 XP Club", "", None, 150, "rare", '{"type":"total_xp","value":500}'),
+    ("all_rounder", "All-Rounder", "", None, 180, "epic",
+     '{"type":"all_of","rules":[{"type":"lessons_completed","value":1},{"type":"quizzes_completed","value":1}]}'),
+]
+
+def candidate_ids(event):
+    return [entry["id"] for entry in candidates_for_event(build_catalog(SAMPLE_CATALOG), event)]
+
+def test_compile_rule_lists_metrics():
+    rule = compile_rule(parse_rule(SAMPLE_CATALOG[4][6]))
+    assert rule.metrics == {"lessons_completed", "quizzes_completed"}
+
+def test_compile_rule_lists_events():
+    assert compile_rule({"type": "event", "event": "Login"}).events == {"login"}
+
+def test_compiled_rule_checks_threshold():
+    check = compile_rule({"type": "total_xp", "value": 500}).check
+    assert check({"total_xp": 500}, "") is True
+    assert check({"total_xp": 499}, "") is False
+
+def test_quiz_event_only_checks_quiz_and_xp_rules():
+    assert candidate_ids("quiz_complete") == ["first_quiz", "xp_500_club", "all_rounder"]
+
+def test_login_event_skips_quiz_rules():
+    assert candidate_ids("login") == ["first_login", "xp_500_club"]
+
+def test_event_rule_is_indexed_by_event():
+    assert "tour" in candidate_ids("onboarding_complete")
+
+def test_unknown_event_checks_everything():
+    assert len(candidate_ids("something_new")) == len(SAMPLE_CATALOG)
+
+
+# plan_unlocks()
+
+def planned_ids(stats, done=(), event="login"):
+    candidates = build_catalog(SAMPLE_CATALOG)["entries"]
+    return [entry["id"] for entry in plan_unlocks(candidates, stats, set(done), event)]
+
+def test_plan_follows_bonus_xp_chain():
+    stats = {"total_xp": 490, "level": 3, "logins_total": 1}
+    assert planned_ids(stats) == ["first_login", "xp_500_club"]
+
+def test_plan_skips_done_achievements():
+    stats = {"total_xp": 600, "level": 3, "logins_total": 1}
+    assert planned_ids(stats, done={"first_login"}) == ["xp_500_club"]
+
+def test_plan_does_not_change_given_stats():
+    stats = {"total_xp": 490, "level": 3, "logins_total": 1}
+    planned_ids(stats)
+    assert stats["total_xp"] == 490
+
+def test_plan_is_empty_when_nothing_matches():
+    assert planned_ids({"total_xp": 0, "level": 1}) == []
+
+
 # GET /api/user/achievements
 
 def test_achievements_returns_lists(integration_client, make_user):
@@ -156,6 +201,22 @@ def test_achievements_missing_email(integration_client):
     resp = integration_client.get("/api/user/achievements")
     assert resp.status_code == 400
 
+@pytest.mark.integration
+def test_achievements_etag_changes_after_catalog_reload(integration_client, make_user, db):
+    make_user("ach_etag@test.com")
+    url = "/api/user/achievements?user_email=ach_etag@test.com"
+    first = integration_client.get(url)
+    # Change the catalog the way another worker would, then clear this one's copy.
+    db.execute("UPDATE achievements SET description = description || ' ' WHERE id = 'first_login'")
+    try:
+        catalog_cache.invalidate("achievements")
+        second = integration_client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+        assert second.status_code == 200
+        assert second.headers["ETag"] != first.headers["ETag"]
+    finally:
+        db.execute("UPDATE achievements SET description = rtrim(description) WHERE id = 'first_login'")
+        catalog_cache.invalidate("achievements")
+
 
 @pytest.mark.integration
 def test_first_login_awards(make_user):
@@ -198,3 +259,14 @@ def test_no_awards_for_new_user(make_user):
     make_user("ach5@test.com", xp=0, logins=0)
     awarded = evaluate_achievements_for_event("ach5@test.com", "login")
     assert awarded == []
+
+@pytest.mark.integration
+def test_bonus_xp_chain_unlocks_in_one_call(make_user, db):
+    make_user("ach6@test.com", xp=490, logins=1)
+    awarded = [a["id"] for a in evaluate_achievements_for_event("ach6@test.com", "login")]
+    assert "first_login" in awarded
+    assert "xp_500_club" in awarded
+    logged = db.execute(
+        "SELECT COUNT(*) FROM xp_log WHERE user_email = 'ach6@test.com' AND action LIKE 'Achievement:%'"
+    ).fetchone()[0]
+    assert logged == len(awarded)
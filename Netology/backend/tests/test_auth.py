@@ -13,14 +13,19 @@ It covers:
   2. Register, login, user info, login recording, forgot password,
      and delete account routes.
   3. A few real-database checks for the full auth flow.
+  4. No database connection being held while a password is hashed.
 
 """
 
 import json
+import time
 
 import pytest
 
+import auth_routes
 from auth_routes import start_level, valid_email, xp_payload
+from db import get_db_connection, pool_stats
+import password_hashing
 
 # valid_email()
 
@@ -304,3 +309,70 @@ def test_delete_account_removes_user(integration_client, make_user, db):
     integration_client.post("/delete-account", data={"email": "delete2@test.com"})
     row = db.execute("SELECT email FROM users WHERE email = 'delete2@test.com'").fetchone()
     assert row is None
+
+
+@pytest.mark.integration
+def test_register_race_on_username_is_409(integration_client, monkeypatch):
+    real_hash = auth_routes.hash_password
+
+    def hash_while_someone_signs_up(password):
+        # Another signup takes the username while this one is hashing.
+        conn = get_db_connection()
+        conn.execute(
+            """
+            INSERT INTO users (first_name, last_name, username, email, password_hash, dob)
+            VALUES ('Bob', 'Smith', 'alicesmith', 'bob@test.com', 'x', '2000-01-01')
+            """
+        )
+        conn.commit()
+        conn.close()
+        return real_hash(password)
+
+    monkeypatch.setattr(auth_routes, "hash_password", hash_while_someone_signs_up)
+    resp = integration_client.post("/register", data=USER_DATA)
+    assert resp.status_code == 409
+    assert "username" in json.loads(resp.data)["message"]
+
+
+# Password hashing and the database pool
+
+@pytest.mark.integration
+@pytest.mark.parametrize("name, path, kwargs", [
+    ("check_password", "/login", {"data": {"email": "held@test.com", "password": "TestPass123!"}}),
+    ("hash_password", "/register", {"data": {**USER_DATA, "email": "held2@test.com", "username": "held2"}}),
+    ("hash_password", "/forgot-password", {"json": {"email": "held@test.com", "password": "NewPass123!"}}),
+])
+def test_no_connection_held_while_hashing(integration_client, make_user, monkeypatch, name, path, kwargs):
+    make_user("held@test.com")
+    monkeypatch.setenv("PASSWORD_HASH_QUEUE", "1")
+    # Start a fresh hashing pool so it picks up the one-slot queue.
+    password_hashing.shutdown()
+    password_hashing.get_executor()
+    real = getattr(auth_routes, name)
+    seen = []
+
+    def watch_pool(*args):
+        # A connection the pool is still opening or taking back shows up
+        # as "not available" for a moment, so give it a second to settle.
+        # One held by this request would never come back.
+        deadline = time.monotonic() + 2
+        stats = pool_stats()
+        while stats["size"] != stats["available"] and time.monotonic() < deadline:
+            time.sleep(0.02)
+            stats = pool_stats()
+        seen.append(stats)
+        return real(*args)
+
+    monkeypatch.setattr(auth_routes, name, watch_pool)
+
+    # Hold every hashing slot so the request waits on the pool and is refused.
+    assert password_hashing._slots.acquire(blocking=False)
+    try:
+        resp = integration_client.post(path, **kwargs)
+    finally:
+        password_hashing._slots.release()
+        password_hashing.shutdown()
+
+    assert resp.status_code == 503
+    assert seen and seen[0]["open"]
+    assert seen[0]["size"] - seen[0]["available"] == 0
@@ -0,0 +1,115 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_catalog_cache.py - Catalog Cache Tests
+---
+This file checks the shared catalog cache in catalog_cache.py.
+
+It covers:
+  1. Loading a catalog once and serving it from memory after that.
+  2. Reloading once the time to live runs out or the cache is cleared.
+  3. Clearing catalogs from NOTIFY messages.
+
+These tests use a fake loader, so no database is needed.
+"""
+
+import pytest
+
+import catalog_cache
+from catalog_cache import CatalogCache, handle_notify, register_cache, stamp
+
+
+class FakeLoader:
+    # Count how many times the catalog is loaded.
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, cur):
+        self.calls += 1
+        rows = [(1, "Networking Basics"), (2, f"Load {self.calls}")]
+        return rows, stamp(rows)
+
+
+@pytest.fixture(autouse=True)
+def keep_registry():
+    # Put the real caches back after each test.
+    saved = dict(catalog_cache._caches)
+    yield
+    catalog_cache._caches.clear()
+    catalog_cache._caches.update(saved)
+
+
+def test_first_get_is_a_miss_then_hits():
+    loader = FakeLoader()
+    cache = CatalogCache("test", loader, ttl=60)
+    first = cache.get(cur=object())
+    second = cache.get(cur=object())
+    assert first is second
+    assert loader.calls == 1
+    assert cache.misses == 1
+    assert cache.hits == 1
+
+
+def test_expired_cache_reloads():
+    loader = FakeLoader()
+    cache = CatalogCache("test", loader, ttl=0)
+    cache.get(cur=object())
+    cache.get(cur=object())
+    assert loader.calls == 2
+    assert cache.misses == 2
+
+
+def test_invalidate_forces_reload():
+    loader = FakeLoader()
+    cache = CatalogCache("test", loader, ttl=60)
+    cache.get(cur=object())
+    cache.invalidate()
+    assert cache.stats()["cached"] is False
+    cache.get(cur=object())
+    assert loader.calls == 2
+    assert cache.invalidations == 1
+
+
+def test_version_changes_with_rows():
+    loader = FakeLoader()
+    cache = CatalogCache("test", loader, ttl=60)
+    first = cache.current_version(cur=object())
+    cache.invalidate()
+    second = cache.current_version(cur=object())
+    assert first != second
+
+
+def test_ttl_read_from_environment(monkeypatch):
+    monkeypatch.setenv("CATALOG_CACHE_TTL", "42")
+    assert CatalogCache("test", FakeLoader()).ttl_seconds() == 42
+
+
+def test_notify_clears_named_catalog_only():
+    courses = register_cache("courses", FakeLoader(), ttl=60)
+    achievements = register_cache("achievements", FakeLoader(), ttl=60)
+    courses.get(cur=object())
+    achievements.get(cur=object())
+    handle_notify("courses")
+    assert courses.stats()["cached"] is False
+    assert achievements.stats()["cached"] is True
+
+
+def test_empty_notify_clears_every_catalog():
+    courses = register_cache("courses", FakeLoader(), ttl=60)
+    achievements = register_cache("achievements", FakeLoader(), ttl=60)
+    courses.get(cur=object())
+    achievements.get(cur=object())
+    handle_notify("")
+    assert courses.stats()["cached"] is False
+    assert achievements.stats()["cached"] is False
+
+
+def test_cache_stats_lists_registered_catalogs():
+    register_cache("courses", FakeLoader(), ttl=60).get(cur=object())
+    stats = catalog_cache.cache_stats()
+    assert stats["courses"]["misses"] == 1
+    assert stats["courses"]["hits"] == 0
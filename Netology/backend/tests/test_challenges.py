@@ -12,12 +12,15 @@ It covers:
   1. Challenge target values.
   2. Challenge progress values from user stats.
   3. The challenge, streak, and activity API routes.
+  4. The one-request dashboard and its saved snapshot.
 
 """
 
 import json
 
-from user_routes import _challenge_progress_value, _challenge_target
+import catalog_cache
+from db import get_db_connection
+from user_routes import _challenge_progress_value, _challenge_target, seed_challenges_if_empty
 
 
 # _challenge_target()
@@ -134,6 +137,118 @@ def test_activity_returns_data(integration_client, make_user):
     assert "activity" in body
 
 
+def test_activity_counts_todays_completions(integration_client, make_user, db):
+    make_user("activity_log@test.com")
+    course_id = db.execute("SELECT id FROM courses ORDER BY id LIMIT 1").fetchone()[0]
+    db.execute(
+        "INSERT INTO user_lessons (user_email, course_id, lesson_number) VALUES (%s, %s, 1)",
+        ("activity_log@test.com", course_id),
+    )
+    db.execute(
+        "INSERT INTO user_quizzes (user_email, course_id, lesson_number) VALUES (%s, %s, 1)",
+        ("activity_log@test.com", course_id),
+    )
+    db.execute(
+        "INSERT INTO xp_log (user_email, action, xp_awarded) VALUES (%s, 'Lesson Completed', 10), (%s, 'Quiz Completed', 5)",
+        ("activity_log@test.com", "activity_log@test.com"),
+    )
+    resp = integration_client.get("/api/user/activity?user_email=activity_log@test.com")
+    today = json.loads(resp.data)["activity"][-1]
+    assert today["xp"] == 15
+    assert today["lessons"] == 1
+    assert today["quizzes"] == 1
+
+
 def test_activity_missing_email(integration_client):
     resp = integration_client.get("/api/user/activity")
     assert resp.status_code == 400
+
+
+# GET /api/user/dashboard
+
+def get_json(client, url, **kwargs):
+    resp = client.get(url, **kwargs)
+    return resp, json.loads(resp.data) if resp.data else None
+
+
+def test_dashboard_missing_email(integration_client):
+    resp = integration_client.get("/api/user/dashboard")
+    assert resp.status_code == 400
+
+
+def test_dashboard_unknown_user(integration_client):
+    resp = integration_client.get("/api/user/dashboard?user_email=nobody_dash@test.com")
+    assert resp.status_code == 404
+
+
+def test_dashboard_parts_match_their_routes(integration_client, make_user):
+    email = "dash1@test.com"
+    make_user(email, logins=2)
+    integration_client.post("/complete-lesson", data={"email": email, "course_id": "1", "lesson_number": "1", "earned_xp": "10"})
+
+    _, dashboard = get_json(integration_client, f"/api/user/dashboard?user_email={email}")
+    parts = {
+        "user": f"/user-info?email={email}",
+        "progress_summary": f"/user-progress-summary?email={email}",
+        "courses": f"/user-courses?email={email}",
+        "achievements": f"/api/user/achievements?user_email={email}",
+        "streaks": f"/api/user/streaks?user_email={email}",
+        "activity": f"/api/user/activity?user_email={email}",
+    }
+    for key, url in parts.items():
+        assert dashboard[key] == get_json(integration_client, url)[1], key
+    for kind in ("daily", "weekly"):
+        url = f"/api/user/challenges?type={kind}&user_email={email}"
+        assert dashboard["challenges"][kind] == get_json(integration_client, url)[1]
+
+
+def test_dashboard_is_saved_and_revalidated(integration_client, make_user, db):
+    make_user("dash2@test.com")
+    first, _ = get_json(integration_client, "/api/user/dashboard?user_email=dash2@test.com")
+    saved = db.execute("SELECT snapshot_key FROM user_dashboard_snapshots WHERE user_email = 'dash2@test.com'").fetchone()
+    assert saved == (first.headers["ETag"].strip('"'),)
+
+    repeat = integration_client.get(
+        "/api/user/dashboard?user_email=dash2@test.com", headers={"If-None-Match": first.headers["ETag"]},
+    )
+    assert repeat.status_code == 304
+
+
+def test_dashboard_changes_after_a_write(integration_client, make_user):
+    make_user("dash3@test.com")
+    first, _ = get_json(integration_client, "/api/user/dashboard?user_email=dash3@test.com")
+    integration_client.post("/award-xp", json={"email": "dash3@test.com", "action": "Dashboard test", "xp": 40})
+
+    second, body = get_json(integration_client, "/api/user/dashboard?user_email=dash3@test.com")
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert body["user"]["xp"] == 40
+
+
+def test_cold_dashboard_uses_one_connection(integration_client, make_user):
+    # With every catalog cleared, the catalogs load on the request's own
+    # connection instead of borrowing another from the pool.
+    make_user("dash4@test.com")
+    catalog_cache.invalidate()
+    catalog_cache.get_db_connection.reset_mock()
+    resp = integration_client.get("/api/user/dashboard?user_email=dash4@test.com")
+    assert resp.status_code == 200
+    assert catalog_cache.get_db_connection.call_count == 0
+
+
+# seed_challenges_if_empty()
+
+def test_seed_fills_an_empty_challenges_table():
+    # Run inside a transaction that is rolled back, so the real rows stay.
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM challenges")
+        seed_challenges_if_empty(cur)
+        cur.execute("SELECT COUNT(*) FROM challenges")
+        assert cur.fetchone()[0] == 10
+        seed_challenges_if_empty(cur)
+        cur.execute("SELECT COUNT(*) FROM challenges")
+        assert cur.fetchone()[0] == 10
+    finally:
+        conn.rollback()
+        conn.close()
@@ -0,0 +1,92 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_course_progress.py - Course Progress Tests
+---
+This file checks the set-based course progress recount.
+
+It covers:
+  1. Counting progress for one user and course.
+  2. Keeping the higher stored value after a completion.
+  3. Rebuilding every user of a course after its size changes.
+  4. The manage.py command that wraps the rebuild.
+
+"""
+
+import pytest
+
+from course_progress import recalculate_progress
+from manage import build_parser
+
+
+def add_lessons(db, email, course_id, count):
+    db.execute(
+        "INSERT INTO user_lessons (user_email, course_id, lesson_number) SELECT %s, %s, n FROM generate_series(1, %s) n",
+        (email, course_id, count),
+    )
+
+
+def progress_of(db, email, course_id):
+    return db.execute(
+        "SELECT progress, completed FROM user_courses WHERE user_email = %s AND course_id = %s",
+        (email, course_id),
+    ).fetchone()
+
+
+@pytest.fixture
+def course_size(db):
+    # Let a test change a course's size and put it back afterwards.
+    saved = db.execute("SELECT id, total_lessons, module_count FROM courses").fetchall()
+    yield
+    for course_id, total_lessons, module_count in saved:
+        db.execute(
+            "UPDATE courses SET total_lessons = %s, module_count = %s WHERE id = %s",
+            (total_lessons, module_count, course_id),
+        )
+
+
+# manage.py command
+
+def test_manage_parses_recalc_progress():
+    args = build_parser().parse_args(["recalc-progress", "--course-id", "3"])
+    assert args.course_id == 3
+    assert args.email is None
+
+
+# Real database checks
+
+@pytest.mark.integration
+def test_counts_one_user_and_course(make_user, db, course_size):
+    make_user("progress1@test.com")
+    db.execute("UPDATE courses SET total_lessons = 6, module_count = 2 WHERE id = 1")
+    add_lessons(db, "progress1@test.com", 1, 5)
+    recalculate_progress(db.cursor(), "progress1@test.com", [1])
+    assert progress_of(db, "progress1@test.com", 1) == (50, False)
+
+
+@pytest.mark.integration
+def test_completion_keeps_higher_progress(make_user, db):
+    make_user("progress2@test.com")
+    db.execute("INSERT INTO user_courses (user_email, course_id, progress) VALUES ('progress2@test.com', 1, 80)")
+    add_lessons(db, "progress2@test.com", 1, 1)
+    cur = db.cursor()
+    recalculate_progress(cur, "progress2@test.com", [1])
+    assert progress_of(db, "progress2@test.com", 1)[0] == 80
+
+    recalculate_progress(cur, "progress2@test.com", [1], exact=True)
+    assert progress_of(db, "progress2@test.com", 1)[0] < 80
+
+
+@pytest.mark.integration
+def test_rebuild_updates_every_user_of_a_course(make_user, db, course_size):
+    for email in ("progress3@test.com", "progress4@test.com"):
+        make_user(email)
+        add_lessons(db, email, 1, 3)
+    db.execute("UPDATE courses SET total_lessons = 1, module_count = 1 WHERE id = 1")
+
+    assert recalculate_progress(db.cursor(), course_ids=[1], exact=True) >= 2
+    assert progress_of(db, "progress3@test.com", 1) == (100, True)
+    assert progress_of(db, "progress4@test.com", 1) == (100, True)
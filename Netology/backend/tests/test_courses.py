@@ -13,6 +13,7 @@ It covers:
   2. The course list and single course routes.
   3. Lesson, quiz, and challenge completion routes.
   4. User progress and course status routes.
+  5. Saving many completions at once with /progress/batch.
 
 """
 
@@ -236,6 +237,28 @@ def test_user_course_status_returns_parts(integration_client, make_user):
     assert "challenges" in body
 
 
+def test_courses_list_repeat_load_is_not_modified(integration_client):
+    first = integration_client.get("/courses")
+    etag = first.headers["ETag"]
+    resp = integration_client.get("/courses", headers={"If-None-Match": etag})
+    assert resp.status_code == 304
+    assert resp.data == b""
+
+
+def test_user_course_status_etag_changes_after_lesson(integration_client, make_user):
+    make_user("status_etag@test.com")
+    url = "/user-course-status?email=status_etag@test.com&course_id=1"
+    etag = integration_client.get(url).headers["ETag"]
+    assert integration_client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    integration_client.post("/complete-lesson", json={
+        "email": "status_etag@test.com", "course_id": 1, "lesson_number": 1, "earned_xp": 10,
+    })
+    resp = integration_client.get(url, headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert json.loads(resp.data)["lessons"] == [1]
+
+
 def test_user_course_status_missing_email(integration_client):
     resp = integration_client.get("/user-course-status?course_id=1")
     assert resp.status_code == 400
@@ -321,3 +344,83 @@ def test_complete_lesson_only_saves_once(integration_client, make_user, db):
         "WHERE user_email = 'learner3@test.com' AND course_id = 1 AND lesson_number = 1"
     ).fetchone()[0]
     assert count == 1
+
+
+def test_complete_lesson_saves_xp_log_and_achievements_together(integration_client, make_user, db):
+    make_user("learner4@test.com", xp=0)
+    resp = integration_client.post(
+        "/complete-lesson",
+        data={"email": "learner4@test.com", "course_id": "1", "lesson_number": "1", "earned_xp": "30"},
+    )
+    body = json.loads(resp.data)
+    assert "first_lesson" in [a["id"] for a in body["newly_unlocked"]]
+    logged = db.execute(
+        "SELECT COALESCE(SUM(xp_awarded), 0) FROM xp_log WHERE user_email = 'learner4@test.com'"
+    ).fetchone()[0]
+    xp = db.execute("SELECT xp FROM users WHERE email = 'learner4@test.com'").fetchone()[0]
+    assert logged == xp == 30 + body["achievement_xp_added"]
+
+
+def test_complete_lesson_repeat_reports_already_completed(integration_client, make_user):
+    make_user("learner5@test.com")
+    lesson_data = {"email": "learner5@test.com", "course_id": "1", "lesson_number": "2", "earned_xp": "30"}
+    integration_client.post("/complete-lesson", data=lesson_data)
+    body = json.loads(integration_client.post("/complete-lesson", data=lesson_data).data)
+    assert body["already_completed"] is True
+    assert body["xp_added"] == 0
+
+
+# POST /progress/batch
+
+def test_progress_batch_needs_completions(integration_client):
+    resp = integration_client.post("/progress/batch", json={"email": "user@test.com", "completions": []})
+    assert resp.status_code == 400
+
+
+def test_progress_batch_rejects_unknown_type(integration_client):
+    resp = integration_client.post("/progress/batch", json={
+        "email": "user@test.com",
+        "completions": [{"type": "exam", "course_id": 1, "lesson_number": 1}],
+    })
+    assert resp.status_code == 400
+
+
+def test_progress_batch_rejects_too_many(integration_client, monkeypatch):
+    monkeypatch.setenv("PROGRESS_BATCH_MAX", "2")
+    item = {"type": "lesson", "course_id": 1, "lesson_number": 1}
+    resp = integration_client.post("/progress/batch", json={"email": "user@test.com", "completions": [item] * 3})
+    assert resp.status_code == 413
+
+
+def test_progress_batch_saves_everything_once(integration_client, make_user, db):
+    make_user("batch1@test.com", xp=0)
+    completions = [
+        {"type": "lesson", "course_id": 1, "lesson_number": 1, "xp": 10},
+        {"type": "lesson", "course_id": 1, "lesson_number": 2, "xp": 10},
+        {"type": "lesson", "course_id": 1, "lesson_number": 2, "xp": 10},
+        {"type": "quiz", "course_id": 1, "lesson_number": 4},
+        {"type": "challenge", "course_id": 2, "lesson_number": 3},
+    ]
+    body = json.loads(integration_client.post(
+        "/progress/batch", json={"email": "batch1@test.com", "completions": completions},
+    ).data)
+    assert body["saved"] == 4
+    assert body["already_completed"] == 1
+    assert body["xp_added"] == 40
+    assert body["courses_updated"] == [1, 2]
+    assert "first_lesson" in [a["id"] for a in body["newly_unlocked"]]
+
+    xp = db.execute("SELECT xp FROM users WHERE email = 'batch1@test.com'").fetchone()[0]
+    assert xp == 40 + body["achievement_xp_added"]
+    progress = db.execute(
+        "SELECT course_id, progress > 0 FROM user_courses WHERE user_email = 'batch1@test.com' ORDER BY course_id"
+    ).fetchall()
+    assert progress == [(1, True), (2, True)]
+
+
+def test_progress_batch_repeat_adds_nothing(integration_client, make_user):
+    make_user("batch2@test.com")
+    payload = {"email": "batch2@test.com", "completions": [{"type": "lesson", "course_id": 1, "lesson_number": 1}]}
+    integration_client.post("/progress/batch", json=payload)
+    body = json.loads(integration_client.post("/progress/batch", json=payload).data)
+    assert (body["saved"], body["already_completed"], body["xp_added"]) == (0, 1, 0)
@@ -0,0 +1,80 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_daily_activity.py - Daily Activity Tests
+---
+This file checks the user_daily_activity rows behind the heatmap.
+
+It covers:
+  1. The database triggers that add each lesson, login and XP entry.
+  2. Backfilling history written before the triggers, safely re-run.
+  3. Reading the rows back for the activity route.
+  4. The manage.py command that wraps the backfill.
+
+"""
+
+import pytest
+
+from daily_activity import backfill_daily_activity, load_daily_activity
+from manage import build_parser
+
+
+def today_row(db, email):
+    return db.execute(
+        """
+        SELECT xp_earned, lessons_completed, login_count
+        FROM user_daily_activity WHERE user_email = %s AND activity_date = CURRENT_DATE
+        """,
+        (email,),
+    ).fetchone()
+
+
+# manage.py command
+
+def test_manage_parses_backfill_activity():
+    args = build_parser().parse_args(["backfill-activity", "--email", "a@test.com"])
+    assert args.email == "a@test.com"
+
+
+# Real database checks
+
+@pytest.mark.integration
+def test_triggers_add_todays_activity(integration_client, make_user, db):
+    make_user("daily1@test.com", logins=1)
+    integration_client.post(
+        "/complete-lesson",
+        data={"email": "daily1@test.com", "course_id": "2", "lesson_number": "1", "earned_xp": "10"},
+    )
+    xp, lessons, logins = today_row(db, "daily1@test.com")
+    assert lessons == 1
+    assert logins == 1
+    assert xp == db.execute("SELECT xp FROM users WHERE email = 'daily1@test.com'").fetchone()[0]
+
+
+@pytest.mark.integration
+def test_backfill_is_safe_to_run_twice(make_user, db):
+    make_user("daily2@test.com", logins=3)
+    db.execute("INSERT INTO xp_log (user_email, action, xp_awarded) VALUES ('daily2@test.com', 'Lesson Completed', 10)")
+    before = db.execute("SELECT * FROM user_daily_activity WHERE user_email = 'daily2@test.com' ORDER BY activity_date").fetchall()
+
+    # Lose the rows, then backfill them twice.
+    db.execute("DELETE FROM user_daily_activity WHERE user_email = 'daily2@test.com'")
+    cur = db.cursor()
+    assert backfill_daily_activity(cur, "daily2@test.com") == 3
+    backfill_daily_activity(cur, "daily2@test.com")
+
+    after = db.execute("SELECT * FROM user_daily_activity WHERE user_email = 'daily2@test.com' ORDER BY activity_date").fetchall()
+    assert [row[1:9] for row in after] == [row[1:9] for row in before]
+    assert today_row(db, "daily2@test.com") == (10, 0, 1)
+
+
+@pytest.mark.integration
+def test_load_returns_oldest_first(make_user, db):
+    make_user("daily3@test.com", logins=3)
+    activity = load_daily_activity(db.cursor(), "daily3@test.com", 365)
+    assert [day["logins"] for day in activity] == [1, 1, 1]
+    assert activity[0]["date"] < activity[-1]["date"]
+    assert activity[-1]["count"] == 1
@@ -11,10 +11,14 @@ This file checks the small helper functions in db.py.
 It covers:
   1. Converting values to integers safely.
   2. Cleaning email values for database use.
+  3. Reading on/off settings from the environment.
+  4. Borrowing and returning pooled connections.
 
 """
 
-from db import email_from, to_int
+import pytest
+
+from db import email_from, env_flag, get_db_connection, pool_stats, to_int
 
 
 # to_int()
@@ -87,3 +91,60 @@ def test_email_from_with_empty_string():
 
 def test_email_from_with_whitespace():
     assert email_from("   ") == ""
+
+
+# env_flag()
+
+def test_env_flag_uses_default_when_missing(monkeypatch):
+    monkeypatch.delenv("NETOLOGY_TEST_FLAG", raising=False)
+    assert env_flag("NETOLOGY_TEST_FLAG", True) is True
+
+
+def test_env_flag_reads_off_values(monkeypatch):
+    monkeypatch.setenv("NETOLOGY_TEST_FLAG", "off")
+    assert env_flag("NETOLOGY_TEST_FLAG", True) is False
+
+
+def test_env_flag_reads_on_values(monkeypatch):
+    monkeypatch.setenv("NETOLOGY_TEST_FLAG", "1")
+    assert env_flag("NETOLOGY_TEST_FLAG", False) is True
+
+
+# get_db_connection() with the pool
+
+@pytest.mark.integration
+def test_closed_connection_goes_back_to_pool(clean_db):
+    before = pool_stats().get("checkouts", 0)
+    conn = get_db_connection()
+    conn.execute("SELECT 1")
+    conn.close()
+    assert conn.closed is True
+    assert pool_stats()["checkouts"] > before
+
+
+@pytest.mark.integration
+def test_closing_twice_is_safe(clean_db):
+    conn = get_db_connection()
+    conn.close()
+    conn.close()
+    assert conn.closed is True
+
+
+@pytest.mark.integration
+def test_uncommitted_work_is_dropped_on_close(make_user, db):
+    make_user("pool@test.com", xp=0)
+    conn = get_db_connection()
+    conn.execute("UPDATE users SET xp = 500 WHERE email = 'pool@test.com'")
+    conn.close()
+    row = db.execute("SELECT xp FROM users WHERE email = 'pool@test.com'").fetchone()
+    assert row[0] == 0
+
+
+@pytest.mark.integration
+def test_autocommit_is_reset_for_next_borrower(clean_db):
+    conn = get_db_connection()
+    conn.autocommit = True
+    conn.close()
+    again = get_db_connection()
+    assert again.autocommit is False
+    again.close()
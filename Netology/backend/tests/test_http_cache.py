@@ -0,0 +1,110 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_http_cache.py - Conditional GET Tests
+---
+This file checks the ETag helpers in http_cache.py.
+
+It covers:
+  1. Building stable ETags from version values.
+  2. Answering If-None-Match and If-Modified-Since with 304.
+  3. Setting the ETag and Cache-Control headers on responses.
+
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask, jsonify
+
+from http_cache import PRIVATE_CACHE_CONTROL, add_cache_headers, make_etag, not_modified
+
+app = Flask(__name__)
+
+# make_etag()
+
+def test_make_etag_is_stable():
+    assert make_etag("courses", "abc") == make_etag("courses", "abc")
+
+
+def test_make_etag_changes_with_version():
+    assert make_etag("courses", 1) != make_etag("courses", 2)
+
+
+# not_modified()
+
+def test_not_modified_without_headers():
+    with app.test_request_context("/"):
+        assert not_modified(make_etag(1), PRIVATE_CACHE_CONTROL) is None
+
+
+def test_not_modified_matching_etag():
+    etag = make_etag(1)
+    with app.test_request_context("/", headers={"If-None-Match": f'"{etag}"'}):
+        response = not_modified(etag, PRIVATE_CACHE_CONTROL)
+        assert response.status_code == 304
+        assert response.headers["ETag"] == f'"{etag}"'
+        assert response.headers["Cache-Control"] == PRIVATE_CACHE_CONTROL
+
+
+def test_not_modified_other_etag():
+    with app.test_request_context("/", headers={"If-None-Match": f'"{make_etag(1)}"'}):
+        assert not_modified(make_etag(2), PRIVATE_CACHE_CONTROL) is None
+
+
+def test_not_modified_weak_etag_does_not_match():
+    etag = make_etag(1)
+    with app.test_request_context("/", headers={"If-None-Match": f'W/"{etag}"'}):
+        assert not_modified(etag, PRIVATE_CACHE_CONTROL) is None
+
+
+def test_not_modified_since_last_change():
+    changed = datetime(2026, 4, 16, 12, 0, 0, 500, tzinfo=timezone.utc)
+    with app.test_request_context("/", headers={"If-Modified-Since": "Thu, 16 Apr 2026 12:00:01 GMT"}):
+        assert not_modified(make_etag(1), PRIVATE_CACHE_CONTROL, changed).status_code == 304
+
+
+def test_change_later_in_the_same_second_is_modified():
+    changed = datetime(2026, 4, 16, 12, 0, 0, 500, tzinfo=timezone.utc)
+    with app.test_request_context("/", headers={"If-Modified-Since": "Thu, 16 Apr 2026 12:00:00 GMT"}):
+        assert not_modified(make_etag(1), PRIVATE_CACHE_CONTROL, changed) is None
+
+
+def test_etag_wins_over_modified_since():
+    changed = datetime(2026, 4, 16, 12, 0, 0, tzinfo=timezone.utc)
+    headers = {"If-None-Match": f'"{make_etag(1)}"', "If-Modified-Since": "Thu, 16 Apr 2026 13:00:00 GMT"}
+    with app.test_request_context("/", headers=headers):
+        assert not_modified(make_etag(2), PRIVATE_CACHE_CONTROL, changed) is None
+
+
+def test_modified_after_last_check():
+    changed = datetime(2026, 4, 16, 12, 0, 0, tzinfo=timezone.utc) + timedelta(minutes=1)
+    with app.test_request_context("/", headers={"If-Modified-Since": "Thu, 16 Apr 2026 12:00:00 GMT"}):
+        assert not_modified(make_etag(1), PRIVATE_CACHE_CONTROL, changed) is None
+
+
+# add_cache_headers()
+
+def test_add_cache_headers_sets_etag_and_cache_control():
+    etag = make_etag(1)
+    with app.test_request_context("/"):
+        response = add_cache_headers(jsonify({"ok": True}), etag, PRIVATE_CACHE_CONTROL)
+        assert response.headers["ETag"] == f'"{etag}"'
+        assert response.headers["Cache-Control"] == PRIVATE_CACHE_CONTROL
+        assert "Last-Modified" not in response.headers
+
+
+def test_last_modified_is_rounded_up():
+    changed = datetime(2026, 4, 16, 12, 0, 0, 500, tzinfo=timezone.utc)
+    with app.test_request_context("/"):
+        response = add_cache_headers(jsonify({"ok": True}), make_etag(1), PRIVATE_CACHE_CONTROL, changed)
+        assert response.headers["Last-Modified"] == "Thu, 16 Apr 2026 12:00:01 GMT"
+
+
+def test_last_modified_left_off_during_its_second():
+    changed = datetime.now(timezone.utc) + timedelta(milliseconds=500)
+    with app.test_request_context("/"):
+        response = add_cache_headers(jsonify({"ok": True}), make_etag(1), PRIVATE_CACHE_CONTROL, changed)
+        assert "Last-Modified" not in response.headers
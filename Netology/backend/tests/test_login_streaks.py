@@ -0,0 +1,133 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_login_streaks.py - Login Streak Tests
+---
+This file checks the login streaks the database keeps in user_stats.
+
+It covers:
+  1. Counting the current and longest streak as logins are added.
+  2. Keeping the streaks right when logins are removed.
+  3. Rebuilding and checking the stored streaks.
+  4. The streaks route, /record-login, and the achievement stats.
+
+"""
+
+from datetime import date, timedelta
+import json
+
+import pytest
+
+from achievement_engine import load_stats
+from login_streaks import (
+    load_login_streak,
+    load_streak_history,
+    rebuild_login_streaks,
+    verify_login_streaks,
+)
+
+
+def add_logins(db, email, *days_ago):
+    for days in days_ago:
+        db.execute(
+            "INSERT INTO user_logins (user_email, login_date) VALUES (%s, %s)",
+            (email, date.today() - timedelta(days=days)),
+        )
+
+
+# Real database checks
+
+@pytest.mark.integration
+def test_streak_ending_today(make_user, db):
+    make_user("streak1@test.com", logins=3)
+    streak = load_login_streak(db.cursor(), "streak1@test.com")
+    assert streak == {"current_streak": 3, "longest_streak": 3, "last_login_date": date.today()}
+
+
+@pytest.mark.integration
+def test_gap_starts_a_new_streak(make_user, db):
+    make_user("streak2@test.com", logins=1)
+    add_logins(db, "streak2@test.com", 10, 11, 12, 13, 14)
+    cur = db.cursor()
+    streak = load_login_streak(cur, "streak2@test.com")
+    assert streak["current_streak"] == 1
+    assert streak["longest_streak"] == 5
+
+    history = load_streak_history(cur, "streak2@test.com")
+    assert [run["days"] for run in history] == [5, 1]
+    assert history[0]["end"] == (date.today() - timedelta(days=10)).isoformat()
+
+
+@pytest.mark.integration
+def test_no_current_streak_without_today(make_user, db):
+    make_user("streak3@test.com")
+    add_logins(db, "streak3@test.com", 1, 2)
+    streak = load_login_streak(db.cursor(), "streak3@test.com")
+    assert streak["current_streak"] == 0
+    assert streak["longest_streak"] == 2
+
+
+@pytest.mark.integration
+def test_new_user_has_no_streak(make_user, db):
+    make_user("streak4@test.com")
+    streak = load_login_streak(db.cursor(), "streak4@test.com")
+    assert streak == {"current_streak": 0, "longest_streak": 0, "last_login_date": None}
+
+
+@pytest.mark.integration
+def test_removing_a_login_splits_the_streak(make_user, db):
+    make_user("streak5@test.com", logins=5)
+    db.execute(
+        "DELETE FROM user_logins WHERE user_email = 'streak5@test.com' AND login_date = %s",
+        (date.today() - timedelta(days=2),),
+    )
+    streak = load_login_streak(db.cursor(), "streak5@test.com")
+    assert streak["current_streak"] == 2
+    assert streak["longest_streak"] == 2
+
+
+@pytest.mark.integration
+def test_rebuild_fixes_drifted_streaks(make_user, db):
+    make_user("streak6@test.com", logins=4)
+    db.execute("UPDATE user_stats SET current_streak = 0, longest_streak = 9 WHERE user_email = 'streak6@test.com'")
+    cur = db.cursor()
+    drift = verify_login_streaks(cur, "streak6@test.com")
+    assert {column for _, column, _, _ in drift} == {"current_streak", "longest_streak"}
+
+    assert rebuild_login_streaks(cur, "streak6@test.com") == 1
+    assert verify_login_streaks(cur, "streak6@test.com") == []
+    assert load_login_streak(cur, "streak6@test.com")["longest_streak"] == 4
+
+
+@pytest.mark.integration
+def test_streaks_route_returns_longest_and_history(integration_client, make_user, db):
+    make_user("streak7@test.com", logins=2)
+    add_logins(db, "streak7@test.com", 5, 6, 7)
+    resp = integration_client.get("/api/user/streaks?user_email=streak7@test.com")
+    body = json.loads(resp.data)
+    assert body["current_streak"] == 2
+    assert body["longest_streak"] == 3
+    assert body["last_login_date"] == date.today().isoformat()
+    assert [run["days"] for run in body["history"]] == [3, 2]
+
+
+@pytest.mark.integration
+def test_record_login_returns_streak_and_recent_days(integration_client, make_user, db):
+    make_user("streak8@test.com")
+    add_logins(db, "streak8@test.com", 1, 2, 40, 100)
+    resp = integration_client.post("/record-login", json={"email": "streak8@test.com"})
+    body = json.loads(resp.data)
+    assert body["current_streak"] == 3
+    assert body["longest_streak"] == 3
+    # The login 100 days ago is outside both the heatmap and the streak.
+    assert len(body["log"]) == 4
+    assert body["log"][-1] == date.today().isoformat()
+
+
+@pytest.mark.integration
+def test_achievement_stats_use_stored_streak(make_user, db):
+    make_user("streak9@test.com", logins=3)
+    assert load_stats(db.cursor(), "streak9@test.com")["login_streak"] == 3
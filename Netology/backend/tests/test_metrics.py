@@ -0,0 +1,114 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_metrics.py - Prometheus Metrics Tests
+---
+This file checks the counters served on /metrics by metrics.py.
+
+It covers:
+  1. Counting requests, latency, XP, unlocks and cache reads.
+  2. Adding up the numbers written by separate worker processes.
+
+"""
+
+from pathlib import Path
+import subprocess
+import sys
+
+from flask import Flask, jsonify
+from prometheus_client import REGISTRY
+
+import metrics
+import query_log
+from catalog_cache import CatalogCache
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def make_app():
+    app = Flask(__name__)
+    query_log.init_app(app)
+    metrics.init_app(app)
+
+    @app.get("/run")
+    def run():
+        query_log.record("SELECT 1", None, 4.0, 1)
+        return jsonify({"ok": True})
+
+    return app
+
+
+# Counters
+
+def test_request_is_counted_with_latency_and_db_time():
+    before = sample("netology_http_requests_total", method="GET", endpoint="run", status="200")
+    before_queries = sample("netology_db_queries_total", endpoint="run")
+    before_count = sample("netology_http_request_duration_seconds_count", method="GET", endpoint="run")
+
+    assert make_app().test_client().get("/run").status_code == 200
+
+    assert sample("netology_http_requests_total", method="GET", endpoint="run", status="200") == before + 1
+    assert sample("netology_db_queries_total", endpoint="run") == before_queries + 1
+    assert sample("netology_http_request_duration_seconds_count", method="GET", endpoint="run") == before_count + 1
+
+
+def test_unknown_urls_share_one_label():
+    before = sample("netology_http_requests_total", method="GET", endpoint="unmatched", status="404")
+    make_app().test_client().get("/no/such/page")
+    assert sample("netology_http_requests_total", method="GET", endpoint="unmatched", status="404") == before + 1
+
+
+def test_metrics_route_serves_text_format():
+    resp = make_app().test_client().get("/metrics")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    assert b"netology_http_requests_total" in resp.data
+
+
+def test_xp_and_unlocks_are_counted():
+    before_xp = sample("netology_xp_awarded_total", category="achievement")
+    before_badge = sample("netology_achievement_unlocks_total", achievement="metrics_test")
+
+    metrics.record_xp([("achievement", 25), ("achievement", 0)])
+    metrics.record_unlocks({"metrics_test"})
+
+    assert sample("netology_xp_awarded_total", category="achievement") == before_xp + 25
+    assert sample("netology_achievement_unlocks_total", achievement="metrics_test") == before_badge + 1
+
+
+def test_catalog_cache_hits_and_misses_are_counted():
+    cache = CatalogCache("metrics_test", lambda cur: ("value", "v1"), ttl=60)
+    cache.get(cur=object())
+    cache.get()
+    cache.get()
+    assert sample("netology_catalog_cache_requests_total", cache="metrics_test", result="miss") == 1
+    assert sample("netology_catalog_cache_requests_total", cache="metrics_test", result="hit") == 2
+
+
+# Several worker processes
+
+def run_python(code, folder):
+    env = {"PROMETHEUS_MULTIPROC_DIR": str(folder), "PATH": "", "DB_POOL_ENABLED": "0"}
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND, env=env, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_metrics_add_up_across_processes(tmp_path):
+    # Two "workers" award XP, then a third renders /metrics.
+    for amount in (10, 15):
+        run_python(f"import metrics; metrics.record_xp([('quiz', {amount})])", tmp_path)
+
+    output = run_python(
+        "import sys, metrics; sys.stdout.write(metrics.render().get_data(as_text=True))", tmp_path,
+    )
+    assert 'netology_xp_awarded_total{category="quiz"} 25.0' in output
@@ -0,0 +1,111 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_password_hashing.py - Password Hashing Tests
+---
+This file checks the password hashing pool in password_hashing.py.
+
+It covers:
+  1. Hashing and checking passwords in the pool and inline.
+  2. Hashes that Flask-Bcrypt made still being accepted.
+  3. Refusing work with HashingBusy when the queue is full or a
+     hash takes too long, and replacing a broken pool.
+
+A low bcrypt cost is used so the tests stay quick.
+"""
+
+import os
+import time
+
+import pytest
+from flask_bcrypt import Bcrypt
+
+import password_hashing
+from password_hashing import HashingBusy, check_password, hash_password, hashing_stats
+
+
+@pytest.fixture(autouse=True)
+def quick_hashes(monkeypatch):
+    monkeypatch.setenv("BCRYPT_LOG_ROUNDS", "4")
+    yield
+    password_hashing.shutdown()
+
+
+def test_hash_and_check_in_pool():
+    pw_hash = hash_password("TestPass123!")
+    assert pw_hash.startswith("$2b$04$")
+    assert check_password(pw_hash, "TestPass123!") is True
+    assert check_password(pw_hash, "wrong-password") is False
+
+
+def test_hash_and_check_inline(monkeypatch):
+    monkeypatch.setenv("PASSWORD_HASH_POOL", "0")
+    pw_hash = hash_password("TestPass123!")
+    assert check_password(pw_hash, "TestPass123!") is True
+
+
+def test_flask_bcrypt_hashes_still_match(monkeypatch):
+    monkeypatch.setenv("PASSWORD_HASH_POOL", "0")
+    pw_hash = Bcrypt().generate_password_hash("TestPass123!", 4).decode()
+    assert check_password(pw_hash, "TestPass123!") is True
+
+
+def test_empty_or_bad_hash_never_matches(monkeypatch):
+    monkeypatch.setenv("PASSWORD_HASH_POOL", "0")
+    assert check_password(None, "TestPass123!") is False
+    assert check_password("not-a-hash", "TestPass123!") is False
+
+
+def test_full_queue_raises_busy(monkeypatch):
+    monkeypatch.setenv("PASSWORD_HASH_QUEUE", "1")
+    password_hashing.get_executor()
+    before = hashing_stats()["rejected"]
+
+    # Hold the only slot so the next request is refused.
+    assert password_hashing._slots.acquire(blocking=False)
+    try:
+        with pytest.raises(HashingBusy):
+            hash_password("TestPass123!")
+    finally:
+        password_hashing._slots.release()
+    assert hashing_stats()["rejected"] == before + 1
+
+
+def test_stats_count_hashes():
+    before = hashing_stats()["hashes"]
+    hash_password("TestPass123!")
+    stats = hashing_stats()
+    assert stats["hashes"] == before + 1
+    assert stats["max_ms"] > 0
+
+
+def test_timeout_is_busy_and_keeps_the_slot(monkeypatch):
+    monkeypatch.setenv("PASSWORD_HASH_QUEUE", "1")
+    monkeypatch.setenv("PASSWORD_HASH_TIMEOUT", "0")
+    with pytest.raises(HashingBusy):
+        hash_password("TestPass123!")
+
+    # The hash is still running in the pool, so its slot is still taken.
+    slots = password_hashing._slots
+    assert slots.acquire(blocking=False) is False
+
+    # Once it finishes the slot comes back.
+    deadline = time.monotonic() + 30
+    while not slots.acquire(blocking=False):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    slots.release()
+
+
+def test_dead_child_process_gets_a_new_pool():
+    broken = password_hashing.get_executor()
+    with pytest.raises(HashingBusy):
+        password_hashing.run("checks", os._exit, 1)
+    assert password_hashing._executor is None
+
+    pw_hash = hash_password("TestPass123!")
+    assert password_hashing.get_executor() is not broken
+    assert check_password(pw_hash, "TestPass123!") is True
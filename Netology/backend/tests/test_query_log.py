@@ -0,0 +1,133 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_query_log.py - Query Stats Tests
+---
+This file checks the per-request query stats in query_log.py.
+
+It covers:
+  1. Adding up query count, time, rows and the slowest statement.
+  2. Cleaning SQL and hiding parameter values.
+  3. The Server-Timing header and the slow query log line.
+  4. Capturing statements for scripts/explain_queries.py.
+
+"""
+
+import json
+
+from flask import Flask, jsonify
+
+import query_log
+from query_log import QueryStats, record, redacted_params, server_timing, sql_text
+
+
+def make_app():
+    app = Flask(__name__)
+    query_log.init_app(app)
+
+    @app.get("/run")
+    def run():
+        # Pretend two statements ran during the request.
+        record("SELECT 1", None, 2.5, 1)
+        record("SELECT * FROM users WHERE email = %s", ("a@test.com",), 7.5, 3)
+        return jsonify({"ok": True})
+
+    return app
+
+
+# QueryStats
+
+def test_stats_add_up():
+    stats = QueryStats()
+    stats.add("SELECT 1", 2.0, 1)
+    stats.add("SELECT 2", 5.0, 4)
+    assert stats.count == 2
+    assert stats.total_ms == 7.0
+    assert stats.rows == 5
+    assert stats.slowest_sql == "SELECT 2"
+
+
+# sql_text() and redacted_params()
+
+def test_sql_text_collapses_whitespace():
+    assert sql_text("SELECT id\n    FROM users\n   WHERE x = %s") == "SELECT id FROM users WHERE x = %s"
+
+
+def test_sql_text_reads_bytes():
+    assert sql_text(b"SELECT 1") == "SELECT 1"
+
+
+def test_redacted_params_hide_values():
+    assert redacted_params(("secret@test.com", 5)) == ["str", "int"]
+
+
+def test_redacted_params_with_names():
+    assert redacted_params({"email": "secret@test.com"}) == {"email": "str"}
+
+
+def test_redacted_params_none():
+    assert redacted_params(None) == []
+
+
+# server_timing()
+
+def test_server_timing_header():
+    stats = QueryStats()
+    stats.add("SELECT 1", 4.0, 2)
+    header = server_timing(stats, 10.0)
+    assert 'db;dur=4.00;desc="1 queries, 2 rows"' in header
+    assert "app;dur=6.00" in header
+    assert "total;dur=10.00" in header
+
+
+# Request hooks
+
+def test_request_gets_server_timing(monkeypatch, capsys):
+    monkeypatch.setenv("REQUEST_LOG", "1")
+    monkeypatch.setenv("SLOW_QUERY_MS", "1000")
+    resp = make_app().test_client().get("/run")
+    assert 'desc="2 queries, 4 rows"' in resp.headers["Server-Timing"]
+
+    line = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert line["event"] == "request"
+    assert line["queries"] == 2
+    assert line["slowest_sql"] == "SELECT * FROM users WHERE email = %s"
+
+
+def test_request_log_can_be_turned_off(monkeypatch, capsys):
+    monkeypatch.setenv("REQUEST_LOG", "0")
+    monkeypatch.setenv("SLOW_QUERY_MS", "1000")
+    make_app().test_client().get("/run")
+    assert capsys.readouterr().out == ""
+
+
+def test_slow_query_is_logged_without_values(monkeypatch, capsys):
+    monkeypatch.setenv("REQUEST_LOG", "0")
+    monkeypatch.setenv("SLOW_QUERY_MS", "5")
+    make_app().test_client().get("/run")
+    output = capsys.readouterr().out
+    assert "a@test.com" not in output
+    line = json.loads(output.strip())
+    assert line["event"] == "slow_query"
+    assert line["params"] == ["str"]
+    assert line["path"] == "/run"
+
+
+def test_stats_cleared_after_request():
+    make_app().test_client().get("/run")
+    assert query_log.current_stats() is None
+
+
+def test_capture_keeps_statements_with_params():
+    query_log.start_capture()
+    record("SELECT 1", None, 1.0, 1)
+    record("SELECT * FROM users WHERE email = %s", ("a@test.com",), 1.0, 1)
+    captured = query_log.stop_capture()
+    assert captured == [("SELECT 1", None), ("SELECT * FROM users WHERE email = %s", ("a@test.com",))]
+
+    # Nothing is kept once capturing stops.
+    record("SELECT 2", None, 1.0, 1)
+    assert query_log.stop_capture() == []
@@ -0,0 +1,119 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_static_assets.py - Frontend File Serving Tests
+---
+This file checks how static_assets.py serves the docs folder.
+
+It covers:
+  1. Fingerprinted names and the rewritten HTML links.
+  2. Picking gzip or plain responses from Accept-Encoding.
+  3. Cache headers and 304 replies for repeat loads.
+
+The tests build a small docs folder in a temporary directory.
+"""
+
+import gzip
+
+import pytest
+from flask import Flask
+
+from static_assets import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, AssetStore, fingerprint
+
+PAGE = b'<link rel="stylesheet" href="css/style.css" />\n<script src="js/app.js"></script>\n<a href="login.html">Login</a>'
+STYLE = b"body { color: #123456; }\n" * 100
+SCRIPT = b"console.log('netology');\n" * 100
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / "css").mkdir()
+    (tmp_path / "js").mkdir()
+    (tmp_path / "index.html").write_bytes(PAGE)
+    (tmp_path / "css" / "style.css").write_bytes(STYLE)
+    (tmp_path / "js" / "app.js").write_bytes(SCRIPT)
+    (tmp_path / ".DS_Store").write_bytes(b"junk")
+    return AssetStore(tmp_path).build()
+
+
+@pytest.fixture
+def app(store):
+    flask_app = Flask(__name__, static_folder=None)
+
+    @flask_app.get("/<path:filename>")
+    def frontend_file(filename):
+        return store.serve(filename)
+
+    return flask_app
+
+
+# fingerprint() and build()
+
+def test_fingerprint_keeps_folder_and_suffix():
+    name = fingerprint("css/style.css", STYLE)
+    assert name.startswith("css/style.")
+    assert name.endswith(".css")
+    assert name != "css/style.css"
+
+
+def test_fingerprint_changes_with_content():
+    assert fingerprint("js/app.js", SCRIPT) != fingerprint("js/app.js", SCRIPT + b"\n")
+
+
+def test_build_skips_hidden_files(store):
+    assert ".DS_Store" not in store.assets
+
+
+def test_page_links_point_at_fingerprinted_names(store):
+    page = store.assets["index.html"].body.decode()
+    assert f'href="{store.url_for("css/style.css")}"' in page
+    assert f'src="{store.url_for("js/app.js")}"' in page
+    assert 'href="login.html"' in page
+
+
+# serve()
+
+def test_fingerprinted_file_is_immutable(app, store):
+    resp = app.test_client().get("/" + store.url_for("css/style.css"))
+    assert resp.status_code == 200
+    assert resp.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert resp.data == STYLE
+
+
+def test_plain_name_is_revalidated(app):
+    resp = app.test_client().get("/js/app.js")
+    assert resp.headers["Cache-Control"] == REVALIDATE_CACHE_CONTROL
+    assert resp.data == SCRIPT
+
+
+def test_gzip_sent_when_accepted(app):
+    resp = app.test_client().get("/js/app.js", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert gzip.decompress(resp.data) == SCRIPT
+
+
+def test_plain_sent_without_accept_encoding(app):
+    resp = app.test_client().get("/js/app.js")
+    assert "Content-Encoding" not in resp.headers
+
+
+def test_repeat_load_is_not_modified(app):
+    client = app.test_client()
+    first = client.get("/index.html", headers={"Accept-Encoding": "gzip"})
+    resp = client.get("/index.html", headers={"Accept-Encoding": "gzip", "If-None-Match": first.headers["ETag"]})
+    assert resp.status_code == 304
+
+
+def test_encodings_have_different_etags(app):
+    client = app.test_client()
+    plain = client.get("/index.html")
+    zipped = client.get("/index.html", headers={"Accept-Encoding": "gzip"})
+    assert plain.headers["ETag"] != zipped.headers["ETag"]
+
+
+def test_missing_file_is_not_found(app):
+    assert app.test_client().get("/missing.js").status_code == 404
@@ -0,0 +1,113 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_user_stats.py - User Stats Counter Tests
+---
+This file checks the user_stats counter row and its helpers.
+
+It covers:
+  1. Turning counter rows into dictionaries.
+  2. The database triggers that keep the counters up to date.
+  3. Verifying and rebuilding the counters from the source tables.
+  4. The manage.py commands that wrap them.
+
+"""
+
+import pytest
+
+from manage import build_parser
+from user_stats import (
+    STAT_COLUMNS,
+    empty_stats,
+    load_user_stats,
+    rebuild_user_stats,
+    stats_from_row,
+    verify_user_stats,
+)
+
+
+# empty_stats() and stats_from_row()
+
+def test_empty_stats_has_every_column():
+    assert set(empty_stats()) == set(STAT_COLUMNS)
+
+
+def test_empty_stats_is_all_zero():
+    assert sum(empty_stats().values()) == 0
+
+
+def test_stats_from_row_keeps_order():
+    stats = stats_from_row(range(len(STAT_COLUMNS)))
+    assert stats["logins_total"] == 0
+    assert stats["lesson_sessions"] == len(STAT_COLUMNS) - 1
+
+
+def test_stats_from_row_handles_none():
+    assert stats_from_row([None] * len(STAT_COLUMNS)) == empty_stats()
+
+
+# manage.py commands
+
+def test_manage_parses_rebuild_stats():
+    args = build_parser().parse_args(["rebuild-stats", "--email", "a@test.com"])
+    assert args.email == "a@test.com"
+
+
+def test_manage_parses_verify_stats():
+    args = build_parser().parse_args(["verify-stats"])
+    assert args.email is None
+
+
+# Real database checks
+
+@pytest.mark.integration
+def test_new_user_gets_stats_row(make_user, db):
+    make_user("stats1@test.com")
+    row = db.execute("SELECT logins_total FROM user_stats WHERE user_email = 'stats1@test.com'").fetchone()
+    assert row == (0,)
+
+
+@pytest.mark.integration
+def test_logins_are_counted(make_user, db):
+    make_user("stats2@test.com", logins=3)
+    cur = db.cursor()
+    assert load_user_stats(cur, "stats2@test.com")["logins_total"] == 3
+
+
+@pytest.mark.integration
+def test_lesson_completion_updates_counters(integration_client, make_user, db):
+    make_user("stats3@test.com")
+    integration_client.post(
+        "/complete-lesson",
+        data={"email": "stats3@test.com", "course_id": "2", "lesson_number": "1", "earned_xp": "10"},
+    )
+    stats = load_user_stats(db.cursor(), "stats3@test.com")
+    assert stats["lessons_completed"] == 1
+    assert stats["courses_started"] == 1
+    assert stats["courses_in_progress"] == 1
+
+
+@pytest.mark.integration
+def test_deleted_rows_are_uncounted(make_user, db):
+    make_user("stats4@test.com", logins=2)
+    db.execute("DELETE FROM user_logins WHERE user_email = 'stats4@test.com' AND login_date < CURRENT_DATE")
+    assert load_user_stats(db.cursor(), "stats4@test.com")["logins_total"] == 1
+
+
+@pytest.mark.integration
+def test_verify_finds_no_drift(make_user, db):
+    make_user("stats5@test.com", logins=2)
+    assert verify_user_stats(db.cursor(), "stats5@test.com") == []
+
+
+@pytest.mark.integration
+def test_rebuild_fixes_drift(make_user, db):
+    make_user("stats6@test.com", logins=2)
+    db.execute("UPDATE user_stats SET logins_total = 40 WHERE user_email = 'stats6@test.com'")
+    cur = db.cursor()
+    assert verify_user_stats(cur, "stats6@test.com") == [("stats6@test.com", "logins_total", 40, 2)]
+    rebuild_user_stats(cur, "stats6@test.com")
+    assert verify_user_stats(cur, "stats6@test.com") == []
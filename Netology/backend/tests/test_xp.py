@@ -10,15 +10,33 @@ This file checks the XP progression helpers and the award-xp route.
 
 It covers:
   1. Level calculation from XP.
-  2. Rank labels for each level.
-  3. Validation in add_xp_to_user().
-  4. The /award-xp API route and database writes.
+  2. The closed-form and table-driven level curves.
+  3. Rank labels for each level.
+  4. Validation in add_xp_to_user().
+  5. Adding XP inside a caller's transaction with award_xp().
+  6. The /award-xp API route, its Idempotency-Key header, and database writes.
+  7. The category and action key on each xp_log row.
 
 """
 
+import json
+
 import pytest
 
-from xp_system import add_xp_to_user, get_level_progress, rank_for_level
+from db import get_db_connection
+from xp_system import (
+    XP_ACHIEVEMENT,
+    XP_AWARD,
+    XP_LESSON,
+    XP_OTHER,
+    StepCurve,
+    XpCurve,
+    add_xp_to_user,
+    award_xp,
+    category_for_action,
+    get_level_progress,
+    rank_for_level,
+)
 
 
 # get_level_progress()
@@ -98,6 +116,43 @@ def test_string_xp_is_allowed():
     assert level == 3
 
 
+# XpCurve and StepCurve
+
+def loop_level_progress(total_xp):
+    # The original loop, used to check the faster curves give the same answer.
+    xp, level, needed = max(0, total_xp), 1, 100
+    while xp >= needed:
+        xp -= needed
+        level += 1
+        needed += 100
+    return level, xp, needed
+
+
+def test_step_curve_matches_loop():
+    for xp in list(range(0, 20000, 7)) + [999999, 10 ** 9]:
+        assert get_level_progress(xp) == loop_level_progress(xp)
+
+
+def test_table_curve_matches_loop():
+    curve = XpCurve(lambda level: 100 * level, table_levels=20)
+    for xp in list(range(0, 50000, 13)) + [10 ** 7]:
+        assert curve.progress(xp) == loop_level_progress(xp)
+
+
+def test_step_curve_level_start():
+    assert StepCurve(100).level_start(5) == 1000
+
+
+def test_table_curve_level_start_past_table():
+    curve = XpCurve(lambda level: 100 * level, table_levels=3)
+    assert curve.level_start(5) == 1000
+
+
+def test_flat_curve_can_be_plugged_in():
+    flat = XpCurve(lambda level: 250)
+    assert get_level_progress(1000, curve=flat) == (5, 0, 250)
+
+
 # rank_for_level()
 
 def test_level_one_is_novice():
@@ -124,6 +179,20 @@ def test_level_ten_is_advanced():
     assert rank_for_level(10) == "Advanced"
 
 
+# category_for_action()
+
+def test_completion_actions_have_their_own_category():
+    assert category_for_action("Lesson Completed") == XP_LESSON
+
+
+def test_achievement_actions_are_grouped():
+    assert category_for_action("Achievement: first_lesson") == XP_ACHIEVEMENT
+
+
+def test_unknown_actions_are_other():
+    assert category_for_action("made up action") == XP_OTHER
+
+
 # add_xp_to_user()
 
 def test_add_xp_empty_email_returns_zero():
@@ -153,6 +222,53 @@ def test_award_xp_ok(integration_client, make_user):
     assert resp.status_code == 200
 
 
+def test_award_xp_pays_each_action_once(integration_client, make_user, db):
+    make_user("xp_once@test.com")
+    body = {"email": "xp_once@test.com", "action": "Sandbox first device", "xp": 20}
+    first = json.loads(integration_client.post("/award-xp", json=body).data)
+    second = json.loads(integration_client.post("/award-xp", json=body).data)
+    assert first["xp_added"] == 20
+    assert second["xp_added"] == 0
+    rows = db.execute(
+        "SELECT category, action_key FROM xp_log WHERE user_email = 'xp_once@test.com' AND action = 'Sandbox first device'"
+    ).fetchall()
+    assert rows == [(XP_AWARD, "Sandbox first device")]
+
+
+def test_award_xp_retry_with_same_key_gets_first_result(integration_client, make_user, db):
+    make_user("xp_retry@test.com")
+    body = {"email": "xp_retry@test.com", "action": "Sandbox first link", "xp": 15}
+    headers = {"Idempotency-Key": "retry-1"}
+    first = json.loads(integration_client.post("/award-xp", json=body, headers=headers).data)
+    retry = json.loads(integration_client.post("/award-xp", json=body, headers=headers).data)
+    assert (first["xp_added"], first["replayed"]) == (15, False)
+    assert (retry["xp_added"], retry["replayed"]) == (15, True)
+    assert db.execute("SELECT xp FROM users WHERE email = 'xp_retry@test.com'").fetchone()[0] == 15
+
+
+def test_award_xp_new_key_for_paid_action_gets_nothing(integration_client, make_user):
+    make_user("xp_newkey@test.com")
+    body = {"email": "xp_newkey@test.com", "action": "Sandbox first link", "xp": 15}
+    integration_client.post("/award-xp", json=body, headers={"Idempotency-Key": "a"})
+    again = json.loads(integration_client.post("/award-xp", json=body, headers={"Idempotency-Key": "b"}).data)
+    assert (again["xp_added"], again["replayed"]) == (0, False)
+
+
+def test_award_xp_key_reused_for_other_action(integration_client, make_user):
+    make_user("xp_reuse@test.com")
+    headers = {"Idempotency-Key": "reused"}
+    integration_client.post("/award-xp", json={"email": "xp_reuse@test.com", "action": "One", "xp": 5}, headers=headers)
+    resp = integration_client.post("/award-xp", json={"email": "xp_reuse@test.com", "action": "Two", "xp": 5}, headers=headers)
+    assert resp.status_code == 422
+
+
+def test_award_xp_long_key_is_rejected(integration_client):
+    resp = integration_client.post(
+        "/award-xp", json={"email": "user@test.com", "action": "test", "xp": 5}, headers={"Idempotency-Key": "k" * 256},
+    )
+    assert resp.status_code == 400
+
+
 def test_award_xp_missing_email(integration_client):
     resp = integration_client.post("/award-xp", json={"action": "Lesson Completed", "xp": 50})
     assert resp.status_code == 400
@@ -208,3 +324,29 @@ def test_add_xp_unknown_user_returns_zero(clean_db):
     xp_added, level = add_xp_to_user("nobody@test.com", 100)
     assert xp_added == 0
     assert level == 1
+
+
+@pytest.mark.integration
+def test_award_xp_waits_for_caller_commit(make_user, db):
+    make_user("xp5@test.com", xp=0)
+    conn = get_db_connection()
+    cur = conn.cursor()
+    assert award_xp(cur, "xp5@test.com", 120) == (120, 2)
+    conn.rollback()
+    cur.close()
+    conn.close()
+    row = db.execute("SELECT xp FROM users WHERE email = 'xp5@test.com'").fetchone()
+    assert row[0] == 0
+
+
+@pytest.mark.integration
+def test_completion_log_row_has_category_and_key(integration_client, make_user, db):
+    make_user("xp6@test.com")
+    integration_client.post(
+        "/complete-lesson",
+        data={"email": "xp6@test.com", "course_id": "2", "lesson_number": "3", "earned_xp": "10"},
+    )
+    row = db.execute(
+        "SELECT category, action_key FROM xp_log WHERE user_email = 'xp6@test.com' AND action = 'Lesson Completed'"
+    ).fetchone()
+    assert row == (XP_LESSON, "2:3")
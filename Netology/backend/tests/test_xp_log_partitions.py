@@ -0,0 +1,118 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+test_xp_log_partitions.py - XP Log Partition Tests
+---
+This file checks the monthly xp_log partitions and their upkeep.
+
+It covers:
+  1. Working out which months fall outside the retention period.
+  2. New rows landing in their month's partition.
+  3. Moving rows out of the default partition when a month is added.
+  4. Rolling an old month up into user_daily_activity and dropping it.
+
+"""
+
+from datetime import date
+
+import pytest
+
+from manage import build_parser
+from xp_log_partitions import ensure_partitions, list_partitions, old_partitions, retention_cutoff, retire_partition
+
+# A month far enough back that no other test writes to it.
+OLD_MONTH = date(2001, 1, 1)
+OLD_PARTITION = "xp_log_2001_01"
+
+
+# retention_cutoff()
+
+def test_cutoff_counts_back_whole_months():
+    assert retention_cutoff(12, today=date(2026, 4, 16)) == date(2025, 4, 1)
+
+
+def test_cutoff_crosses_year_boundary():
+    assert retention_cutoff(2, today=date(2026, 1, 31)) == date(2025, 11, 1)
+
+
+def test_cutoff_zero_keeps_current_month_only():
+    assert retention_cutoff(0, today=date(2026, 4, 16)) == date(2026, 4, 1)
+
+
+def test_manage_parses_maintain_xp_log():
+    args = build_parser().parse_args(["maintain-xp-log", "--keep-months", "6", "--drop"])
+    assert args.keep_months == 6
+    assert args.drop is True
+
+
+# Database checks
+
+@pytest.fixture
+def old_partition_gone(db):
+    db.execute(f"DROP TABLE IF EXISTS {OLD_PARTITION}")
+    yield
+    db.execute(f"DROP TABLE IF EXISTS {OLD_PARTITION}")
+
+
+@pytest.mark.integration
+def test_current_month_has_a_partition(db):
+    cur = db.cursor()
+    ensure_partitions(cur)
+    months = {first_day for _, first_day in list_partitions(cur)}
+    assert date.today().replace(day=1) in months
+
+
+@pytest.mark.integration
+def test_new_rows_go_to_their_month(make_user, db):
+    make_user("xplog1@test.com")
+    db.execute("INSERT INTO xp_log (user_email, action, xp_awarded) VALUES ('xplog1@test.com', 'Lesson Completed', 10)")
+    table = db.execute("SELECT tableoid::regclass::text FROM xp_log WHERE user_email = 'xplog1@test.com'").fetchone()[0]
+    assert table == "xp_log_" + date.today().strftime("%Y_%m")
+
+
+@pytest.mark.integration
+def test_rollup_fills_in_days_missing_from_daily_activity(make_user, db, old_partition_gone):
+    make_user("xplog3@test.com")
+    db.execute("INSERT INTO xp_log (user_email, action, xp_awarded, created_at) VALUES ('xplog3@test.com', 'Lesson Completed', 10, '2001-01-20')")
+    # Pretend the row was logged before the daily activity triggers existed.
+    db.execute("DELETE FROM user_daily_activity WHERE user_email = 'xplog3@test.com'")
+    db.execute("SELECT xp_log_create_partition(%s)", (OLD_MONTH,))
+
+    retire_partition(db.cursor(), OLD_PARTITION, drop=True)
+    row = db.execute("SELECT xp_earned FROM user_daily_activity WHERE user_email = 'xplog3@test.com'").fetchone()
+    assert row == (10,)
+
+
+@pytest.mark.integration
+def test_old_month_is_rolled_up_and_dropped(make_user, db, old_partition_gone):
+    make_user("xplog2@test.com")
+    db.execute(
+        """
+        INSERT INTO xp_log (user_email, action, xp_awarded, created_at) VALUES
+            ('xplog2@test.com', 'Lesson Completed', 10, '2001-01-15 10:00'),
+            ('xplog2@test.com', 'Quiz Completed', 5, '2001-01-15 11:00')
+        """
+    )
+    # With no partition for the month the rows wait in the default one.
+    table = db.execute("SELECT DISTINCT tableoid::regclass::text FROM xp_log WHERE user_email = 'xplog2@test.com'").fetchone()[0]
+    assert table == "xp_log_default"
+
+    db.execute("SELECT xp_log_create_partition(%s)", (OLD_MONTH,))
+    table = db.execute("SELECT DISTINCT tableoid::regclass::text FROM xp_log WHERE user_email = 'xplog2@test.com'").fetchone()[0]
+    assert table == OLD_PARTITION
+
+    cur = db.cursor()
+    assert OLD_PARTITION in old_partitions(cur, keep_months=12)
+    retire_partition(cur, OLD_PARTITION, drop=True)
+
+    row = db.execute(
+        """
+        SELECT xp_earned FROM user_daily_activity
+        WHERE user_email = 'xplog2@test.com' AND activity_date = '2001-01-15'
+        """
+    ).fetchone()
+    assert row == (15,)
+    assert db.execute("SELECT to_regclass(%s)", (OLD_PARTITION,)).fetchone()[0] is None
@@ -12,12 +12,39 @@ lists, and login streak data used across the main app pages.
 
 These routes are mainly used by dashboard.js, progress.js,
 and account.js.
+
+Login streaks are read from the columns the database keeps in
+user_stats (see login_streaks.py) instead of walking the login days.
+
+The challenge and achievement lists send ETags built from the
+catalog version and the user's progress_version, so a dashboard
+refresh with nothing new gets a 304.
+
+/api/user/dashboard returns everything the dashboard shows in one
+response, with each part in the same shape as its own route. It is
+built on one connection, sharing the counters and login streak between
+the parts, and saved in user_dashboard_snapshots under a key made
+from the user's progress_version, today's date and the catalog
+versions. Any write that changes the user's progress bumps the
+version, so the next load rebuilds the snapshot.
 """
 
-from flask import Blueprint, jsonify, request
+from datetime import date
+import json
 
-from achievement_engine import login_streak
-from db import email_from, get_db_connection
+from flask import Blueprint, jsonify, request
+import psycopg
+
+from achievement_engine import ACHIEVEMENT_CACHE, load_catalog
+from achievement_queue import take_pending_unlocks
+from auth_routes import user_info_payload
+from catalog_cache import register_cache, stamp
+from course_routes import COURSE_CACHE, progress_summary_payload, user_courses_payload
+from daily_activity import load_daily_activity
+from db import connection_dsn, email_from, get_db_connection
+from http_cache import PRIVATE_CACHE_CONTROL, add_cache_headers, make_etag, not_modified
+from login_streaks import load_login_streak, load_streak_history
+from user_stats import load_progress_version, load_user_stats
 
 user_api = Blueprint("user_api", __name__)
 
@@ -37,7 +64,8 @@ _DEFAULT_CHALLENGES = [
 ]
 
 
-def _seed_challenges_if_empty(cur, conn):
+def seed_challenges_if_empty(cur):
+    # Add the default challenges the first time the table is empty.
     cur.execute("SELECT COUNT(*) FROM challenges")
     if cur.fetchone()[0] == 0:
         cur.executemany(
@@ -48,7 +76,40 @@ def _seed_challenges_if_empty(cur, conn):
             """,
             _DEFAULT_CHALLENGES,
         )
-        conn.commit()
+
+
+def seed_challenges_now():
+    # Same as seed_challenges_if_empty, on a connection of its own. Gunicorn
+    # runs it once at startup, so loading the catalog in a request only reads
+    # and can use the request's own cursor.
+    try:
+        with psycopg.connect(connection_dsn()) as conn:
+            seed_challenges_if_empty(conn.cursor())
+    except psycopg.Error as e:
+        print("Challenge seed error:", e)
+
+
+def load_challenge_rows(cur):
+    # Read the active challenges for the catalog cache, grouped by type.
+    # This only reads, so it can share a request's cursor and transaction.
+    cur.execute(
+        """
+        SELECT c.id, c.title, c.description, c.xp_reward, c.required_action, c.action_target, c.challenge_type
+        FROM challenges c
+        WHERE c.is_active = TRUE
+        ORDER BY c.id
+        """
+    )
+    rows = cur.fetchall()
+
+    by_type = {}
+    for row in rows:
+        by_type.setdefault((row[6] or "").lower(), []).append(row[:6])
+    return by_type, stamp(rows)
+
+
+# Active challenges, shared by every request in this process.
+CHALLENGE_CACHE = register_cache("challenges", load_challenge_rows)
 
 
 def _challenge_target(required_action, challenge_type, action_target):
@@ -97,8 +158,9 @@ def _challenge_progress_value(required_action, metrics):
     return 0
 
 
-def _load_challenge_metrics(cur, email):
+def _load_challenge_metrics(cur, email, counts=None, streak=None):
     # Load the counts used to calculate challenge progress.
+    # The dashboard passes in the counters and login streak it already has.
     metrics = {
         "lessons_done": 0,
         "quizzes_done": 0,
@@ -113,44 +175,56 @@ def _load_challenge_metrics(cur, email):
         return metrics
 
     try:
-        cur.execute(
-            """
-            SELECT
-              (SELECT COUNT(*) FROM user_lessons WHERE user_email = %s),
-              (SELECT COUNT(*) FROM user_quizzes WHERE user_email = %s),
-              (SELECT COUNT(*) FROM user_challenges WHERE user_email = %s),
-              (SELECT COUNT(*) FROM user_courses WHERE user_email = %s AND progress > 0),
-              (SELECT COUNT(*) FROM user_courses WHERE user_email = %s AND completed = TRUE),
-              (SELECT COUNT(*) FROM saved_topologies WHERE user_email = %s),
-              (SELECT COUNT(*) FROM lesson_sessions WHERE user_email = %s)
-            """,
-            (email, email, email, email, email, email, email),
-        )
-        row = cur.fetchone()
-        if row:
-            metrics["lessons_done"] = int(row[0] or 0)
-            metrics["quizzes_done"] = int(row[1] or 0)
-            metrics["challenges_done"] = int(row[2] or 0)
-            metrics["courses_started"] = int(row[3] or 0)
-            metrics["courses_done"] = int(row[4] or 0)
-            metrics["topologies_saved"] = int(row[5] or 0)
-            metrics["lesson_sessions"] = int(row[6] or 0)
+        counts = counts or load_user_stats(cur, email)
+        metrics["lessons_done"] = counts["lessons_completed"]
+        metrics["quizzes_done"] = counts["quizzes_completed"]
+        metrics["challenges_done"] = counts["challenges_completed"]
+        metrics["courses_started"] = counts["courses_active"]
+        metrics["courses_done"] = counts["courses_completed"]
+        metrics["topologies_saved"] = counts["topologies_saved"]
+        metrics["lesson_sessions"] = counts["lesson_sessions"]
     except Exception as e:
         print("challenge metrics count error:", e)
 
     try:
-        cur.execute(
-            "SELECT login_date FROM user_logins WHERE user_email = %s ORDER BY login_date DESC LIMIT 365",
-            (email,),
-        )
-        dates = sorted({r[0] for r in cur.fetchall()}, reverse=True)
-        metrics["streak_days"] = int(login_streak(dates))
+        streak = streak or load_login_streak(cur, email)
+        metrics["streak_days"] = streak["current_streak"]
     except Exception as e:
         print("challenge metrics streak error:", e)
 
     return metrics
 
 
+def challenges_payload(cur, email, challenge_type, metrics=None):
+    # Build the /api/user/challenges response for one challenge type.
+    rows = CHALLENGE_CACHE.get(cur).get(challenge_type, [])[:5]
+    if metrics is None:
+        metrics = _load_challenge_metrics(cur, email) if email else {}
+
+    challenges = []
+    for row in rows:
+        required_action = row[4] if len(row) > 4 else None
+        action_target = row[5] if len(row) > 5 else None
+        target = _challenge_target(required_action, challenge_type, action_target)
+        progress_value = _challenge_progress_value(required_action, metrics) if metrics else 0
+        if target <= 0:
+            progress_percent = 0
+        else:
+            progress_percent = max(0, min(100, int((progress_value / target) * 100)))
+        challenges.append({
+            "id": row[0],
+            "title": row[1],
+            "description": row[2],
+            "xp_reward": row[3],
+            "required_action": required_action,
+            "progress_value": progress_value,
+            "progress_target": target,
+            "progress_percent": progress_percent,
+            "completed": bool(progress_value >= target if target > 0 else False),
+        })
+    return {"success": True, "challenges": challenges}
+
+
 @user_api.get("/api/user/challenges")
 def get_user_challenges():
     # Return daily or weekly challenges for the dashboard.
@@ -160,56 +234,18 @@ def get_user_challenges():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        _seed_challenges_if_empty(cur, conn)
-        try:
-            cur.execute(
-                """
-                SELECT c.id, c.title, c.description, c.xp_reward, c.required_action, c.action_target
-                FROM challenges c
-                WHERE c.challenge_type = %s AND c.is_active = TRUE
-                ORDER BY c.id
-                LIMIT 5
-                """,
-                (challenge_type,),
-            )
-            rows = cur.fetchall()
-        except Exception:
-            cur.execute(
-                """
-                SELECT c.id, c.title, c.description, c.xp_reward, c.required_action, NULL::text AS action_target
-                FROM challenges c
-                WHERE c.challenge_type = %s AND c.is_active = TRUE
-                ORDER BY c.id
-                LIMIT 5
-                """,
-                (challenge_type,),
-            )
-            rows = cur.fetchall()
-
-        metrics = _load_challenge_metrics(cur, user_email) if user_email else {}
-        challenges = []
-        for row in rows:
-            required_action = row[4] if len(row) > 4 else None
-            action_target = row[5] if len(row) > 5 else None
-            target = _challenge_target(required_action, challenge_type, action_target)
-            progress_value = _challenge_progress_value(required_action, metrics) if metrics else 0
-            if target <= 0:
-                progress_percent = 0
-            else:
-                progress_percent = max(0, min(100, int((progress_value / target) * 100)))
-            challenges.append({
-                "id": row[0],
-                "title": row[1],
-                "description": row[2],
-                "xp_reward": row[3],
-                "required_action": required_action,
-                "progress_value": progress_value,
-                "progress_target": target,
-                "progress_percent": progress_percent,
-                "completed": bool(progress_value >= target if target > 0 else False),
-            })
-
-        return jsonify({"success": True, "challenges": challenges})
+        # The streak part of the progress depends on today's date as well.
+        version, updated_at = load_progress_version(cur, user_email) if user_email else (0, None)
+        etag = make_etag("challenges", challenge_type, CHALLENGE_CACHE.current_version(cur), user_email, version, date.today())
+        if version is not None:
+            cached = not_modified(etag, PRIVATE_CACHE_CONTROL)
+            if cached:
+                return cached
+
+        response = jsonify(challenges_payload(cur, user_email, challenge_type))
+        if version is None:
+            return response
+        return add_cache_headers(response, etag, PRIVATE_CACHE_CONTROL)
     except Exception as e:
         print("get_user_challenges error:", e)
         return jsonify({"success": False, "challenges": [], "message": "Could not load challenges"}), 500
@@ -219,9 +255,15 @@ def get_user_challenges():
 
 
 # User activity and Progress Heatmap
+def activity_payload(cur, email, range_days):
+    # Build the /api/user/activity response.
+    # One row per active day, kept up to date by triggers on the write path.
+    return {"success": True, "activity": load_daily_activity(cur, email, range_days)}
+
+
 @user_api.get("/api/user/activity")
 def get_user_activity():
-    # Return merged daily activity data for the heatmap.
+    # Return daily activity data for the heatmap.
     email = email_from(request.args.get("user_email"))
     if not email:
         return jsonify({"success": False, "message": "user_email required"}), 400
@@ -234,101 +276,7 @@ def get_user_activity():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        by_date = {}
-
-        # Pull from the daily summary table if it exists.
-        try:
-            cur.execute(
-                """
-                SELECT activity_date,
-                       COALESCE(xp_earned, 0), COALESCE(lessons_completed, 0),
-                       COALESCE(quizzes_completed, 0), COALESCE(challenges_completed, 0),
-                       COALESCE(login_count, 0)
-                FROM user_daily_activity
-                WHERE user_email = %s AND activity_date >= CURRENT_DATE - (%s::int - 1)
-                ORDER BY activity_date
-                """,
-                (email, range_days),
-            )
-            for row in cur.fetchall():
-                key = str(row[0])
-                by_date[key] = {
-                    "xp": int(row[1]),
-                    "lessons": int(row[2]),
-                    "quizzes": int(row[3]),
-                    "challenges": int(row[4]),
-                    "logins": int(row[5]),
-                }
-        except Exception as e:
-            print("get_user_activity (daily_activity table) error:", e)
-
-        # Fill in any gaps from xp_log.
-        try:
-            cur.execute(
-                """
-                SELECT DATE(created_at),
-                       COALESCE(SUM(xp_awarded), 0),
-                       SUM(CASE WHEN LOWER(action) LIKE '%lesson%'    THEN 1 ELSE 0 END),
-                       SUM(CASE WHEN LOWER(action) LIKE '%quiz%'      THEN 1 ELSE 0 END),
-                       SUM(CASE WHEN LOWER(action) LIKE '%challenge%' THEN 1 ELSE 0 END)
-                FROM xp_log
-                WHERE user_email = %s
-                  AND created_at >= CURRENT_DATE - (%s::int - 1) * INTERVAL '1 day'
-                GROUP BY DATE(created_at)
-                """,
-                (email, range_days),
-            )
-            for row in cur.fetchall():
-                key = str(row[0])
-                ex = by_date.get(key, {})
-                by_date[key] = {
-                    "xp": max(ex.get("xp", 0), int(row[1])),
-                    "lessons": max(ex.get("lessons", 0), int(row[2])),
-                    "quizzes": max(ex.get("quizzes", 0), int(row[3])),
-                    "challenges": max(ex.get("challenges", 0), int(row[4])),
-                    "logins": ex.get("logins", 0),
-                }
-        except Exception as e:
-            print("get_user_activity (xp_log fallback) error:", e)
-
-        # Add login counts from user_logins.
-        try:
-            cur.execute(
-                """
-                SELECT login_date, COUNT(*)
-                FROM user_logins
-                WHERE user_email = %s AND login_date >= CURRENT_DATE - (%s::int - 1)
-                GROUP BY login_date
-                """,
-                (email, range_days),
-            )
-            for row in cur.fetchall():
-                key = str(row[0])
-                ex = by_date.get(key, {})
-                ex["logins"] = max(ex.get("logins", 0), int(row[1]))
-                by_date[key] = ex
-        except Exception as e:
-            print("get_user_activity (user_logins) error:", e)
-
-        activity = []
-        for date_key in sorted(by_date.keys()):
-            d = by_date[date_key]
-            lessons = d.get("lessons", 0)
-            quizzes = d.get("quizzes", 0)
-            challenges = d.get("challenges", 0)
-            logins = d.get("logins", 0)
-            xp = d.get("xp", 0)
-            activity.append({
-                "date": date_key,
-                "xp": xp,
-                "lessons": lessons,
-                "quizzes": quizzes,
-                "challenges": challenges,
-                "logins": logins,
-                "count": lessons + quizzes + challenges + logins,
-            })
-
-        return jsonify({"success": True, "activity": activity})
+        return jsonify(activity_payload(cur, email, range_days))
     except Exception as e:
         print("get_user_activity error:", e)
         return jsonify({"success": False, "message": "Could not load activity"}), 500
@@ -338,6 +286,42 @@ def get_user_activity():
 
 
 # User Achievements
+def achievements_payload(cur, email):
+    # Build the /api/user/achievements response: the catalog split by what the user has earned.
+    # Every achievement in the catalog comes from the shared cache.
+    catalog = load_catalog(cur)["entries"]
+
+    # Fetch the ones this user has already earned.
+    cur.execute(
+        """
+        SELECT achievement_id, earned_at
+        FROM user_achievements
+        WHERE user_email = %s
+        """,
+        (email,),
+    )
+    earned = {row[0]: row[1] for row in cur.fetchall()}
+
+    unlocked = []
+    locked = []
+    for item in catalog:
+        aid = item["id"]
+        entry = {
+            "id": aid,
+            "name": item["name"],
+            "description": item["description"],
+            "icon": item["icon"] or "bi-award-fill",
+            "xp_reward": int(item["xp_reward"] or 0),
+            "rarity": item["rarity"] or "common",
+        }
+        if aid in earned:
+            entry["earned_at"] = earned[aid].isoformat() if earned[aid] else None
+            unlocked.append(entry)
+        else:
+            locked.append(entry)
+    return {"success": True, "unlocked": unlocked, "locked": locked}
+
+
 @user_api.get("/api/user/achievements")
 def get_user_achievements():
     # Return all achievements split into unlocked and locked lists for a user.
@@ -348,45 +332,19 @@ def get_user_achievements():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        # Fetch every achievement in the catalog.
-        cur.execute(
-            """
-            SELECT id, name, description, icon, xp_reward, rarity
-            FROM achievements
-            ORDER BY id
-            """
-        )
-        catalog = cur.fetchall()
-
-        # Fetch the ones this user has already earned.
-        cur.execute(
-            """
-            SELECT achievement_id, earned_at
-            FROM user_achievements
-            WHERE user_email = %s
-            """,
-            (email,),
-        )
-        earned = {row[0]: row[1] for row in cur.fetchall()}
-
-        unlocked = []
-        locked = []
-        for aid, name, desc, icon, xp_reward, rarity in catalog:
-            entry = {
-                "id": aid,
-                "name": name,
-                "description": desc,
-                "icon": icon or "bi-award-fill",
-                "xp_reward": int(xp_reward or 0),
-                "rarity": rarity or "common",
-            }
-            if aid in earned:
-                entry["earned_at"] = earned[aid].isoformat() if earned[aid] else None
-                unlocked.append(entry)
-            else:
-                locked.append(entry)
-
-        return jsonify({"success": True, "unlocked": unlocked, "locked": locked})
+        # New unlocks bump the user's progress_version. current_version()
+        # reloads a cleared catalog first, so its ETag is never stale.
+        version, updated_at = load_progress_version(cur, email)
+        etag = make_etag("achievements", ACHIEVEMENT_CACHE.current_version(cur), version)
+        if version is not None:
+            cached = not_modified(etag, PRIVATE_CACHE_CONTROL, updated_at)
+            if cached:
+                return cached
+
+        response = jsonify(achievements_payload(cur, email))
+        if version is None:
+            return response
+        return add_cache_headers(response, etag, PRIVATE_CACHE_CONTROL, updated_at)
     except Exception as e:
         print("get_user_achievements error:", e)
         return jsonify({"success": False, "unlocked": [], "locked": [], "message": "Could not load achievements"}), 500
@@ -395,10 +353,51 @@ def get_user_achievements():
         conn.close()
 
 
+@user_api.get("/api/user/achievements/pending")
+def get_pending_achievements():
+    # Return badges unlocked by background checks since the user last asked.
+    # "queued" tells the frontend whether it is worth asking again shortly.
+    email = email_from(request.args.get("user_email"))
+    if not email:
+        return jsonify({"success": False, "message": "user_email required"}), 400
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        unlocked, queued = take_pending_unlocks(cur, email)
+        conn.commit()
+        return jsonify({
+            "success": True,
+            "newly_unlocked": unlocked,
+            "achievement_xp_added": sum(int(item.get("xp_added") or 0) for item in unlocked),
+            "queued": queued,
+        })
+    except Exception as e:
+        print("get_pending_achievements error:", e)
+        return jsonify({"success": False, "newly_unlocked": [], "queued": 0, "message": "Could not load achievements"}), 500
+    finally:
+        cur.close()
+        conn.close()
+
+
 # User Streaks
+def streaks_payload(cur, email, streak=None):
+    # Build the /api/user/streaks response: the stored streaks plus the
+    # user's longest past runs, worked out in the database.
+    streak = streak or load_login_streak(cur, email)
+    last_login = streak["last_login_date"]
+    return {
+        "success": True,
+        "current_streak": streak["current_streak"],
+        "longest_streak": streak["longest_streak"],
+        "last_login_date": last_login.isoformat() if last_login else None,
+        "history": load_streak_history(cur, email),
+    }
+
+
 @user_api.get("/api/user/streaks")
 def get_user_streaks():
-    # Current login streak for a user.
+    # Current and longest login streaks for a user.
     email = email_from(request.args.get("user_email"))
     if not email:
         return jsonify({"success": False, "message": "user_email required"}), 400
@@ -406,15 +405,113 @@ def get_user_streaks():
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute(
-            "SELECT login_date FROM user_logins WHERE user_email = %s ORDER BY login_date DESC LIMIT 365",
-            (email,),
-        )
-        dates = sorted({r[0] for r in cur.fetchall()}, reverse=True)
-        return jsonify({"success": True, "current_streak": login_streak(dates)})
+        return jsonify(streaks_payload(cur, email))
     except Exception as e:
         print("get_user_streaks error:", e)
         return jsonify({"success": False, "message": "Could not load streaks"}), 500
     finally:
         cur.close()
         conn.close()
+
+
+# Dashboard snapshot
+
+# Heatmap days included in the dashboard (the activity route's default).
+DASHBOARD_ACTIVITY_DAYS = 90
+
+
+def dashboard_key(cur, version):
+    # Everything the dashboard depends on besides the user's own rows.
+    # Streaks and challenges also change with the date.
+    return make_etag(
+        "dashboard", version, date.today(), DASHBOARD_ACTIVITY_DAYS,
+        COURSE_CACHE.current_version(cur), ACHIEVEMENT_CACHE.current_version(cur),
+        CHALLENGE_CACHE.current_version(cur),
+    )
+
+
+def build_dashboard(cur, email):
+    # Build every dashboard part on one cursor, or None if there is no such user.
+    user = user_info_payload(cur, email)
+    if not user:
+        return None
+
+    counts = load_user_stats(cur, email)
+    streak = load_login_streak(cur, email)
+    metrics = _load_challenge_metrics(cur, email, counts, streak)
+    return {
+        "success": True,
+        "user": user,
+        "progress_summary": progress_summary_payload(cur, email, counts),
+        "courses": user_courses_payload(cur, email),
+        "challenges": {kind: challenges_payload(cur, email, kind, metrics) for kind in ("daily", "weekly")},
+        "achievements": achievements_payload(cur, email),
+        "streaks": streaks_payload(cur, email, streak),
+        "activity": activity_payload(cur, email, DASHBOARD_ACTIVITY_DAYS),
+    }
+
+
+def load_dashboard_snapshot(cur, email, key):
+    # Return the saved dashboard if it was built under the same key.
+    cur.execute(
+        "SELECT payload FROM user_dashboard_snapshots WHERE user_email = %s AND snapshot_key = %s",
+        (email, key),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None
+    return row[0] if isinstance(row[0], dict) else json.loads(row[0])
+
+
+def save_dashboard_snapshot(conn, cur, email, key, payload):
+    # Save a freshly built dashboard. A failed save only costs a rebuild next time.
+    try:
+        cur.execute(
+            """
+            INSERT INTO user_dashboard_snapshots (user_email, snapshot_key, payload)
+            VALUES (%s, %s, %s::jsonb)
+            ON CONFLICT (user_email) DO UPDATE SET
+                snapshot_key = EXCLUDED.snapshot_key,
+                payload      = EXCLUDED.payload,
+                built_at     = CURRENT_TIMESTAMP
+            """,
+            (email, key, json.dumps(payload, default=str)),
+        )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print("save_dashboard_snapshot error:", e)
+
+
+@user_api.get("/api/user/dashboard")
+def get_user_dashboard():
+    # Return the whole dashboard in one response.
+    email = email_from(request.args.get("user_email"))
+    if not email:
+        return jsonify({"success": False, "message": "user_email required"}), 400
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        version, _ = load_progress_version(cur, email)
+        if version is None:
+            return jsonify({"success": False, "message": "User not found."}), 404
+
+        key = dashboard_key(cur, version)
+        cached = not_modified(key, PRIVATE_CACHE_CONTROL)
+        if cached:
+            return cached
+
+        payload = load_dashboard_snapshot(cur, email, key)
+        if payload is None:
+            payload = build_dashboard(cur, email)
+            if payload is None:
+                return jsonify({"success": False, "message": "User not found."}), 404
+            save_dashboard_snapshot(conn, cur, email, key, payload)
+        return add_cache_headers(jsonify(payload), key, PRIVATE_CACHE_CONTROL)
+    except Exception as e:
+        print("get_user_dashboard error:", e)
+        return jsonify({"success": False, "message": "Could not load dashboard"}), 500
+    finally:
+        cur.close()
+        conn.close()
@@ -0,0 +1,138 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+user_stats.py - Per-User Counters
+---
+This file reads the user_stats table, which keeps one row of
+running counts per user (logins, lessons, quizzes, challenges,
+courses, saved topologies, and lesson sessions).
+
+The counts are kept up to date by database triggers in
+netology_schema.sql, so pages can load them with one primary key
+lookup instead of counting every table on each request.
+
+Every change to the row also bumps its progress_version, which the
+read routes use to build ETags for the user's progress pages.
+
+It also has the rebuild and verify helpers used by manage.py to
+recount everything from the source tables and spot any drift.
+"""
+
+from db import to_int
+
+# The counter columns in user_stats, in table order.
+STAT_COLUMNS = (
+    "logins_total",
+    "lessons_completed",
+    "quizzes_completed",
+    "challenges_completed",
+    "courses_started",
+    "courses_active",
+    "courses_in_progress",
+    "courses_completed",
+    "topologies_saved",
+    "lesson_sessions",
+)
+
+# Count every stat straight from the source tables.
+SOURCE_COUNTS_SQL = """
+    SELECT u.email,
+           (SELECT COUNT(*) FROM user_logins      WHERE user_email = u.email),
+           (SELECT COUNT(*) FROM user_lessons     WHERE user_email = u.email),
+           (SELECT COUNT(*) FROM user_quizzes     WHERE user_email = u.email),
+           (SELECT COUNT(*) FROM user_challenges  WHERE user_email = u.email),
+           (SELECT COUNT(*) FROM user_courses     WHERE user_email = u.email),
+           (SELECT COUNT(*) FROM user_courses     WHERE user_email = u.email AND progress > 0),
+           (SELECT COUNT(*) FROM user_courses     WHERE user_email = u.email AND completed = FALSE AND progress > 0),
+           (SELECT COUNT(*) FROM user_courses     WHERE user_email = u.email AND completed = TRUE),
+           (SELECT COUNT(*) FROM saved_topologies WHERE user_email = u.email),
+           (SELECT COUNT(*) FROM lesson_sessions  WHERE user_email = u.email)
+    FROM users u
+"""
+
+
+def empty_stats():
+    # Return a stats dictionary with every count set to zero.
+    return {column: 0 for column in STAT_COLUMNS}
+
+
+def stats_from_row(row):
+    # Turn a row of counter values (in STAT_COLUMNS order) into a dictionary.
+    return {column: to_int(value) for column, value in zip(STAT_COLUMNS, row)}
+
+
+def count_user_stats(cur, email):
+    # Count one user's stats from the source tables.
+    cur.execute(SOURCE_COUNTS_SQL + " WHERE u.email = %s", (email,))
+    row = cur.fetchone()
+    return stats_from_row(row[1:]) if row else empty_stats()
+
+
+def load_user_stats(cur, email):
+    # Load one user's counters with a single primary key lookup.
+    # Falls back to counting the source tables if the row is missing.
+    cur.execute(
+        f"SELECT {', '.join(STAT_COLUMNS)} FROM user_stats WHERE user_email = %s",
+        (email,),
+    )
+    row = cur.fetchone()
+    if row:
+        return stats_from_row(row)
+    return count_user_stats(cur, email)
+
+
+def load_progress_version(cur, email):
+    # Return (progress_version, updated_at) for one user, or (None, None)
+    # if the user has no counter row yet.
+    cur.execute(
+        "SELECT progress_version, updated_at::timestamptz FROM user_stats WHERE user_email = %s",
+        (email,),
+    )
+    row = cur.fetchone()
+    if not row:
+        return None, None
+    return to_int(row[0]), row[1]
+
+
+def rebuild_user_stats(cur, email=None):
+    # Recount user_stats from the source tables for one user or everyone.
+    # Returns how many rows were written.
+    where = " WHERE u.email = %s" if email else ""
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in STAT_COLUMNS)
+    cur.execute(
+        f"""
+        INSERT INTO user_stats (user_email, {', '.join(STAT_COLUMNS)})
+        {SOURCE_COUNTS_SQL}{where}
+        ON CONFLICT (user_email) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP
+        """,
+        (email,) if email else None,
+    )
+    return cur.rowcount
+
+
+def verify_user_stats(cur, email=None):
+    # Compare the stored counters with the source tables.
+    # Returns one (email, column, stored, actual) tuple per difference.
+    where = " WHERE u.email = %s" if email else ""
+    stored_columns = ", ".join(f"COALESCE(s.{column}, 0)" for column in STAT_COLUMNS)
+    cur.execute(
+        f"""
+        SELECT src.*, {stored_columns}
+        FROM ({SOURCE_COUNTS_SQL}{where}) src
+        LEFT JOIN user_stats s ON s.user_email = src.email
+        ORDER BY src.email
+        """,
+        (email,) if email else None,
+    )
+    drift = []
+    size = len(STAT_COLUMNS)
+    for row in cur.fetchall():
+        actual = row[1:1 + size]
+        stored = row[1 + size:]
+        for column, want, have in zip(STAT_COLUMNS, actual, stored):
+            if to_int(want) != to_int(have):
+                drift.append((row[0], column, to_int(have), to_int(want)))
+    return drift
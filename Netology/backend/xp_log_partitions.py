@@ -0,0 +1,115 @@
+"""
+Student Number: C22320301
+Student Name: Jamie O'Neill
+Course Code: TU857/4
+Date: 16/04/2026
+
+xp_log_partitions.py - XP Log Partitions
+---
+This file looks after the monthly partitions of the xp_log table
+(set up in netology_schema.sql).
+
+New months are created ahead of time by the database function
+xp_log_ensure_partitions(), which Gunicorn calls when it starts and
+manage.py calls on each maintenance run. Rows for a month without a
+partition land in xp_log_default and are moved across when that
+month's partition is made.
+
+Months older than XP_LOG_RETENTION_MONTHS (default 12) have their
+daily XP totals checked into user_daily_activity, so the activity
+heatmap keeps its history, and are then detached from xp_log (or
+dropped with --drop).
+
+Run from the backend folder with:
+    python manage.py maintain-xp-log [--keep-months 12] [--drop]
+"""
+
+from datetime import date
+import re
+
+import psycopg
+from psycopg import sql
+
+from db import connection_dsn, env_int
+
+# Monthly partitions are named xp_log_<year>_<month>.
+PARTITION_NAME = re.compile(r"^xp_log_(\d{4})_(\d{2})$")
+
+# Add up one month of XP per user and day. The user_daily_activity
+# triggers already count XP as it is logged, so GREATEST only fills in
+# days from before the triggers and never counts a day twice.
+ROLLUP_SQL = """
+    INSERT INTO user_daily_activity AS d (user_email, activity_date, xp_earned)
+    SELECT user_email, created_at::date, COALESCE(SUM(xp_awarded), 0)
+    FROM {partition}
+    WHERE user_email IS NOT NULL
+    GROUP BY user_email, created_at::date
+    ON CONFLICT (user_email, activity_date) DO UPDATE SET
+        xp_earned  = GREATEST(d.xp_earned, EXCLUDED.xp_earned),
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def ensure_partitions(cur, months_ahead=3):
+    # Create any missing partitions up to months_ahead months from now.
+    cur.execute("SELECT xp_log_ensure_partitions(%s)", (months_ahead,))
+    return cur.fetchone()[0]
+
+
+def ensure_partitions_now(months_ahead=3):
+    # Same as ensure_partitions, on a connection of its own (used at startup).
+    try:
+        with psycopg.connect(connection_dsn()) as conn:
+            created = ensure_partitions(conn.cursor(), months_ahead)
+        if created:
+            print(f"Created {created} xp_log partition(s).")
+    except psycopg.Error as e:
+        print("XP log partition error:", e)
+
+
+def retention_cutoff(keep_months, today=None):
+    # Return the first day of the oldest month that is kept.
+    today = today or date.today()
+    months = today.year * 12 + today.month - 1 - max(0, keep_months)
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def list_partitions(cur):
+    # Return (name, first day) for every monthly partition, oldest first.
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'xp_log'::regclass
+        """
+    )
+    partitions = []
+    for (name,) in cur.fetchall():
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda item: item[1])
+
+
+def old_partitions(cur, keep_months=None):
+    # Return the names of the partitions older than the retention period.
+    if keep_months is None:
+        keep_months = env_int("XP_LOG_RETENTION_MONTHS", 12)
+    cutoff = retention_cutoff(keep_months)
+    return [name for name, first_day in list_partitions(cur) if first_day < cutoff]
+
+
+def roll_up_partition(cur, name):
+    # Add one partition into user_daily_activity. Returns the day rows written.
+    cur.execute(sql.SQL(ROLLUP_SQL).format(partition=sql.Identifier(name)))
+    return cur.rowcount
+
+
+def retire_partition(cur, name, drop=False):
+    # Roll up one old partition, then detach it (or drop it).
+    # Detaching locks xp_log, so commit straight after each partition.
+    days = roll_up_partition(cur, name)
+    cur.execute(sql.SQL("ALTER TABLE xp_log DETACH PARTITION {}").format(sql.Identifier(name)))
+    if drop:
+        cur.execute(sql.SQL("DROP TABLE {}").format(sql.Identifier(name)))
+    return days
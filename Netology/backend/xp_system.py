@@ -10,11 +10,58 @@ This file handles the XP and level system for Netology.
 It works out the user's level, rank, and progress to the
 next level, and it also saves new XP when the user earns it.
 
+Levels come from an XP curve object. The default curve needs
+100 XP for level 1, 200 for level 2, 300 for level 3 and so on,
+and works the level out directly instead of looping. Other
+curves can be plugged in with XpCurve.
+
 It is mainly used when lessons, quizzes, challenges,
 and achievements give XP rewards.
+
+Every xp_log row has a small category number (lesson, quiz and so
+on) and an action key saying which one (e.g. "3:7" for lesson 7 of
+course 3, or an achievement id), next to the readable action text.
 """
 
+from bisect import bisect_right
+from math import isqrt
+
 from db import email_from, get_db_connection, to_int
+from metrics import record_xp
+
+# xp_log.category values. Keep in step with the XP LOG section of
+# netology_schema.sql.
+XP_OTHER = 0
+XP_LESSON = 1
+XP_QUIZ = 2
+XP_CHALLENGE = 3
+XP_ACHIEVEMENT = 4
+XP_AWARD = 5
+
+XP_CATEGORY_NAMES = {
+    XP_OTHER: "other",
+    XP_LESSON: "lesson",
+    XP_QUIZ: "quiz",
+    XP_CHALLENGE: "challenge",
+    XP_ACHIEVEMENT: "achievement",
+    XP_AWARD: "award",
+}
+
+# Categories for the fixed action texts the routes write.
+ACTION_CATEGORIES = {
+    "Lesson Completed": XP_LESSON,
+    "Quiz Completed": XP_QUIZ,
+    "Challenge Completed": XP_CHALLENGE,
+}
+
+
+def category_for_action(action):
+    # Work out the category for an action text with no category given.
+    if action in ACTION_CATEGORIES:
+        return ACTION_CATEGORIES[action]
+    if str(action).startswith("Achievement:"):
+        return XP_ACHIEVEMENT
+    return XP_OTHER
 
 def rank_for_level(level):
     # Convert a numeric level into the matching rank name.
@@ -25,18 +72,120 @@ def rank_for_level(level):
     return "Novice"
 
 
-def get_level_progress(total_xp):
+class XpCurve:
+    # A level curve built from the XP each level needs before the next one.
+    # needed_for(level) must return a positive number. The running totals are
+    # worked out once into a table and looked up with bisect, and anything past
+    # the end of the table carries on one level at a time.
+
+    def __init__(self, needed_for, table_levels=1000):
+        self.needed_for = needed_for
+        self.thresholds = [0]
+        for level in range(1, max(1, table_levels)):
+            self.thresholds.append(self.thresholds[-1] + needed_for(level))
+
+    def level_start(self, level):
+        # Return the total XP needed to reach a level.
+        level = max(1, to_int(level, 1))
+        if level <= len(self.thresholds):
+            return self.thresholds[level - 1]
+        start = self.thresholds[-1]
+        for past in range(len(self.thresholds), level):
+            start += self.needed_for(past)
+        return start
+
+    def progress(self, total_xp):
+        # Return the level, XP into that level, and XP needed for the next one.
+        xp = max(0, to_int(total_xp))
+        level = bisect_right(self.thresholds, xp)
+        start = self.thresholds[level - 1]
+        while level >= len(self.thresholds) and xp >= start + self.needed_for(level):
+            start += self.needed_for(level)
+            level += 1
+        return level, xp - start, self.needed_for(level)
+
+
+class StepCurve(XpCurve):
+    # Each level needs `step` more XP than the one before: 100, 200, 300, ...
+    # Level L starts at step * L * (L - 1) / 2 total XP, so the level can be
+    # found straight away with an integer square root.
+
+    def __init__(self, step=100):
+        self.step = max(1, to_int(step, 100))
+        super().__init__(lambda level: self.step * level, table_levels=1)
+
+    def level_start(self, level):
+        level = max(1, to_int(level, 1))
+        return self.step * level * (level - 1) // 2
+
+    def progress(self, total_xp):
+        xp = max(0, to_int(total_xp))
+        # Largest level L where L * (L - 1) <= 2 * xp / step.
+        pairs = 2 * xp // self.step
+        level = (isqrt(4 * pairs + 1) + 1) // 2
+        return level, xp - self.level_start(level), self.step * level
+
+
+# The curve used across Netology.
+LEVEL_CURVE = StepCurve(100)
+
+
+def get_level_progress(total_xp, curve=None):
     # Return the level, XP into that level, and XP needed for the next one.
-    xp = max(0, to_int(total_xp))
-    level = 1
-    needed = 100
+    return (curve or LEVEL_CURVE).progress(total_xp)
 
-    while xp >= needed:
-        xp -= needed
-        level += 1
-        needed += 100
 
-    return level, xp, needed
+def award_xp_batch(cur, email, entries):
+    # Add several XP awards on an open cursor without committing.
+    # entries is a list of (action, amount, category, key) tuples, where
+    # category and key may be left off. The XP total and every xp_log row
+    # are written in one statement, and the level is only rewritten when
+    # it actually changes. Returns (xp_added, new_level).
+    email = email_from(email)
+    rows = []
+    for action, amount, *rest in entries or []:
+        category = rest[0] if rest and rest[0] is not None else category_for_action(action)
+        key = rest[1] if len(rest) > 1 else None
+        amount = max(0, to_int(amount))
+        if amount > 0:
+            rows.append((str(action), amount, category, None if key is None else str(key)))
+    total = sum(row[1] for row in rows)
+    if not email or total <= 0:
+        return 0, 1
+
+    cur.execute(
+        """
+        WITH updated AS (
+            UPDATE users SET xp = xp + %s WHERE email = %s
+            RETURNING email, xp, numeric_level, level
+        ), logged AS (
+            INSERT INTO xp_log (user_email, action, xp_awarded, category, action_key)
+            SELECT updated.email, awards.action, awards.amount, awards.category, awards.action_key
+            FROM updated, unnest(%s::varchar[], %s::int[], %s::smallint[], %s::varchar[])
+                AS awards(action, amount, category, action_key)
+        )
+        SELECT xp, numeric_level, level FROM updated
+        """,
+        (total, email, *([row[i] for row in rows] for i in range(4))),
+    )
+    row = cur.fetchone()
+    if not row:
+        return 0, 1
+
+    record_xp([(XP_CATEGORY_NAMES.get(category, "other"), amount) for _, amount, category, _ in rows])
+    new_level, _, _ = get_level_progress(row[0])
+    new_rank = rank_for_level(new_level)
+    if row[1] != new_level or row[2] != new_rank:
+        cur.execute(
+            "UPDATE users SET numeric_level = %s, level = %s WHERE email = %s",
+            (new_level, new_rank, email),
+        )
+    return total, new_level
+
+
+def award_xp(cur, email, amount, action="Lesson Completed", category=None, key=None):
+    # Add XP on an open cursor without committing, so it can share a transaction.
+    return award_xp_batch(cur, email, [(action, amount, category, key)])
 
 
 def add_xp_to_user(email, amount, action="Lesson Completed"):
@@ -49,23 +198,9 @@ def add_xp_to_user(email, amount, action="Lesson Completed"):
     conn = get_db_connection()
     cur = conn.cursor()
     try:
-        cur.execute("UPDATE users SET xp = xp + %s WHERE email = %s RETURNING xp", (amount, email))
-        row = cur.fetchone()
-        if not row:
-            return 0, 1
-
-        new_level, _, _ = get_level_progress(row[0])
-        new_rank = rank_for_level(new_level)
-        cur.execute(
-            "UPDATE users SET numeric_level = %s, level = %s WHERE email = %s",
-            (new_level, new_rank, email),
-        )
-        cur.execute(
-            "INSERT INTO xp_log (user_email, action, xp_awarded) VALUES (%s, %s, %s)",
-            (email, action, amount),
-        )
+        xp_added, new_level = award_xp(cur, email, amount, action)
         conn.commit()
-        return amount, new_level
+        return xp_added, new_level
     except Exception as e:
         print("XP system error:", e)
         return 0, 1
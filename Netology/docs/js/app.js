@@ -62,11 +62,15 @@ streak counting and daily challenge logic.
       completeChallenge:   "/complete-challenge"
     },
     progress: {
+      dashboard:    "/api/user/dashboard",
       userActivity: "/api/user/activity",
       userStreaks:  "/api/user/streaks"
     },
     challenges:   { list: "/api/user/challenges" },
-    achievements: { list: "/api/user/achievements" },
+    achievements: {
+      list:    "/api/user/achievements",
+      pending: "/api/user/achievements/pending"
+    },
     sandbox: {
       lessonSessionSave: "/lesson-session/save",
       lessonSessionLoad: "/lesson-session/load",
@@ -627,6 +631,38 @@ streak counting and daily challenge logic.
     });
   }
 
+  // When the server queues achievement checks (ACHIEVEMENTS_ASYNC), the badges
+  // are unlocked a moment later by a worker. Ask for them a few times, stopping
+  // once nothing is left in the queue for this user.
+  function pollPendingAchievements(email, attemptsLeft) {
+    var cleanEmail = normaliseEmail(email);
+    if (!cleanEmail || !API_BASE) { return; }
+    var remaining = attemptsLeft === undefined ? 5 : attemptsLeft;
+    if (remaining <= 0) { return; }
+
+    var path = (ENDPOINTS.achievements && ENDPOINTS.achievements.pending) || "/api/user/achievements/pending";
+    setTimeout(function () {
+      fetch(buildFullUrl(path) + "?user_email=" + encodeURIComponent(cleanEmail))
+        .then(function (res) { return res.json(); })
+        .then(function (data) {
+          if (!data || !data.success) { return; }
+
+          var unlocks = Array.isArray(data.newly_unlocked) ? data.newly_unlocked : [];
+          if (unlocks.length) { queueAchievementUnlocks(cleanEmail, unlocks); }
+
+          var bonusXp = Number(data.achievement_xp_added || 0);
+          if (bonusXp > 0) { updateLocalXp(cleanEmail, bonusXp); }
+
+          if (Number(data.queued || 0) > 0) {
+            pollPendingAchievements(cleanEmail, remaining - 1);
+          }
+        })
+        .catch(function () {});
+    }, 1500);
+  }
+
+  window.NetologyAchievements.pollPending = pollPendingAchievements;
+
   // POST today's login to the backend. If the server responds with newly
   // unlocked achievements or bonus XP, process them locally.
   function syncLoginWithServer(email) {
@@ -655,6 +691,9 @@ streak counting and daily challenge logic.
       // Apply any XP awarded alongside the achievements.
       var bonusXp = Number(data.achievement_xp_added || 0);
       if (bonusXp > 0) { updateLocalXp(email, bonusXp); }
+
+      // Collect the badges later if the check was queued for a worker.
+      if (data.achievements_pending) { pollPendingAchievements(email); }
     })
     .catch(function () {});
   }
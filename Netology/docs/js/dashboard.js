@@ -9,6 +9,8 @@ dashboard.js - Dashboard Page Script
 This file handles the main dashboard page for Netology.
 It loads the user's profile, progress, achievements, courses,
 and challenges, then updates the dashboard cards and panels.
+Everything comes from one /api/user/dashboard request; the
+separate routes are only used if that request fails.
 
 It also controls the stats carousel, the daily networking tips,
 the login streak calendar, and the first-login welcome flow.
@@ -27,6 +29,7 @@ the login streak calendar, and the first-login welcome flow.
     achievements: { all: [], unlocked: [], locked: [] },
     challenges: { daily: [], weekly: [] },
     courses: [],
+    snapshot: null,
     listenersAttached: false
   };
 
@@ -60,16 +63,47 @@ the login streak calendar, and the first-login welcome flow.
     localStorage.setItem("netology_user", JSON.stringify(userData));
   }
 
-  // Get the user profile from the server and merge it with saved data.
-  async function fetchUserProfileFromServer() {
+  // Get the email of the saved (or last) user.
+  function readSavedUserEmail() {
     var savedUser = readSavedUserFromLocalStorage();
-    var userEmail = "";
-
     if (savedUser && savedUser.email) {
-      userEmail = savedUser.email;
-    } else {
-      userEmail = localStorage.getItem("netology_last_email") || "";
+      return savedUser.email;
     }
+    return localStorage.getItem("netology_last_email") || "";
+  }
+
+  // Load every dashboard part in one request. The fetch functions below
+  // use its parts and only call their own routes when it is missing.
+  async function fetchDashboardSnapshot() {
+    dashboardState.snapshot = null;
+    var userEmail = readSavedUserEmail();
+    if (!userEmail) return null;
+
+    try {
+      var endpoint = (ENDPOINTS.progress && ENDPOINTS.progress.dashboard) || "/api/user/dashboard";
+      var serverData = await apiGet(endpoint, { user_email: userEmail });
+      if (serverData && serverData.success) {
+        dashboardState.snapshot = serverData;
+      }
+    } catch (error) {
+      console.warn("Could not fetch dashboard:", error);
+    }
+    return dashboardState.snapshot;
+  }
+
+  // Return one part of the dashboard snapshot, or fetch it from its own route.
+  function loadDashboardPart(partName, endpoint, params) {
+    var snapshot = dashboardState.snapshot;
+    if (snapshot && snapshot[partName]) {
+      return Promise.resolve(snapshot[partName]);
+    }
+    return apiGet(endpoint, params);
+  }
+
+  // Get the user profile from the server and merge it with saved data.
+  async function fetchUserProfileFromServer() {
+    var savedUser = readSavedUserFromLocalStorage();
+    var userEmail = readSavedUserEmail();
 
     if (!userEmail) {
       return savedUser;
@@ -77,7 +111,7 @@ the login streak calendar, and the first-login welcome flow.
 
     try {
       var endpoint = (ENDPOINTS.auth && ENDPOINTS.auth.userInfo) || "/user-info";
-      var serverData = await apiGet(endpoint, { email: userEmail });
+      var serverData = await loadDashboardPart("user", endpoint, { email: userEmail });
 
       if (!serverData || !serverData.success) {
         return savedUser;
@@ -123,7 +157,7 @@ the login streak calendar, and the first-login welcome flow.
 
     try {
       var endpoint = (ENDPOINTS.courses && ENDPOINTS.courses.userProgressSummary) || "/user-progress-summary";
-      var serverData = await apiGet(endpoint, { email: userEmail });
+      var serverData = await loadDashboardPart("progress_summary", endpoint, { email: userEmail });
 
       if (serverData && (serverData.lessons_done !== undefined || serverData.quizzes_done !== undefined || serverData.total_xp !== undefined)) {
         dashboardState.progress = {
@@ -161,7 +195,7 @@ the login streak calendar, and the first-login welcome flow.
 
     try {
       var endpoint = (ENDPOINTS.achievements && ENDPOINTS.achievements.list) || "/api/user/achievements";
-      var serverData = await apiGet(endpoint, { user_email: userEmail });
+      var serverData = await loadDashboardPart("achievements", endpoint, { user_email: userEmail });
 
       if (serverData && (serverData.unlocked || serverData.locked || serverData.achievements)) {
         var unlockedList = (serverData.unlocked || []).map(function (achievement) {
@@ -190,8 +224,10 @@ the login streak calendar, and the first-login welcome flow.
   // Get challenges of a specific type.
   async function fetchChallengesOfType(userEmail, challengeType) {
     var endpoint = (ENDPOINTS.challenges && ENDPOINTS.challenges.list) || "/api/user/challenges";
+    var snapshot = dashboardState.snapshot;
     try {
-      var serverData = await apiGet(endpoint, { type: challengeType, user_email: userEmail });
+      var serverData = (snapshot && snapshot.challenges && snapshot.challenges[challengeType])
+        || await apiGet(endpoint, { type: challengeType, user_email: userEmail });
       return Array.isArray(serverData) ? serverData : (serverData.challenges || []);
     } catch (error) {
       console.warn("Could not fetch " + challengeType + " challenges:", error);
@@ -265,7 +301,7 @@ the login streak calendar, and the first-login welcome flow.
 
     try {
       var endpoint = (ENDPOINTS.courses && ENDPOINTS.courses.userCourses) || "/user-courses";
-      var serverData = await apiGet(endpoint, { email: userEmail });
+      var serverData = await loadDashboardPart("courses", endpoint, { email: userEmail });
       var courseList = Array.isArray(serverData)
         ? serverData
         : (Array.isArray(serverData.courses) ? serverData.courses : []);
@@ -979,6 +1015,7 @@ the login streak calendar, and the first-login welcome flow.
 
   // Fetch everything and redraw the whole dashboard.
   async function refreshEntireDashboard() {
+    await fetchDashboardSnapshot();
     var userData = await fetchUserProfileFromServer();
 
     if (userData && userData.email) {
@@ -1021,6 +1058,7 @@ the login streak calendar, and the first-login welcome flow.
       displayContinueLearningCourses();
     }
 
+    await fetchDashboardSnapshot();
     var userData = await fetchUserProfileFromServer();
 
     if (userData && userData.email) {
@@ -726,6 +726,9 @@ It is used by Lesson.html and keeps the lesson flow in one file.
       if (newlyUnlocked.length && window.NetologyAchievements && window.NetologyAchievements.queueUnlocks) {
         window.NetologyAchievements.queueUnlocks(lessonState.userEmail, newlyUnlocked);
       }
+      if (serverData.achievements_pending && window.NetologyAchievements && window.NetologyAchievements.pollPending) {
+        window.NetologyAchievements.pollPending(lessonState.userEmail);
+      }
 
       return {
         experiencePointsAdded: Number(serverData.xp_added || 0),
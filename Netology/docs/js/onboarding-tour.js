@@ -723,6 +723,9 @@ It is used by the main page scripts and keeps the tour logic in one place.
         if (unlocks.length && window.NetologyAchievements && window.NetologyAchievements.queueUnlocks) {
           window.NetologyAchievements.queueUnlocks(normalizedEmail, unlocks);
         }
+        if (result && result.achievements_pending && window.NetologyAchievements && window.NetologyAchievements.pollPending) {
+          window.NetologyAchievements.pollPending(normalizedEmail);
+        }
         var achievementXp = Number((result && result.achievement_xp_added) || 0);
         if (achievementXp > 0) {
           bumpStoredUserXp(normalizedEmail, achievementXp);
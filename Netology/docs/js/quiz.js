@@ -427,6 +427,9 @@ It is used by Quiz.html and keeps the quiz flow in one place.
         if (unlockedAchievements.length > 0 && window.NetologyAchievements && window.NetologyAchievements.queueUnlocks) {
           window.NetologyAchievements.queueUnlocks(quizState.userEmail, unlockedAchievements);
         }
+        if (responseData.achievements_pending && window.NetologyAchievements && window.NetologyAchievements.pollPending) {
+          window.NetologyAchievements.pollPending(quizState.userEmail);
+        }
 
         return {
           xpAwarded: Number(responseData.xp_added || 0),